@@ -4,28 +4,39 @@
 #-------------------------------------------------------------------------
 
 import os
-import json
+import logging
 
 import py_api_consts as cts
 import rest_products as rest
 import py_api_functions as fns
 
-from flask import Flask, request
+from flask import Flask, Response, request
 
 # Define tipo do ambiente de execução...
 in_production = (os.environ.get('IN_PRODUCTION') != None and os.environ['IN_PRODUCTION'] == "1")
 
+# Logs da API("pyapi.*": contadores dos caches, queries lentas...) na saída padrão, sem alterar
+# uma configuração de logging já feita pelo servidor...
+logging.basicConfig(level=os.environ.get('PYAPI_LOG_LEVEL', 'INFO'), format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
 application = Flask(__name__)
 @application.route('/', methods=cts._HTTP_METHODS)
 def api():   
     request_pars = {'httpMethod': request.method}    
+    # Identificação do cliente(janela read-your-writes das réplicas de leitura)...
+    request_pars['clientId'] = request.headers.get('X-Client-Id') or request.remote_addr
+    # ETag(s) já recebido(s) pelo cliente(detalhes de produto: 304 quando não modificado)...
+    request_pars['ifNoneMatch'] = request.headers.get('If-None-Match')
+    # Token do profiling sob demanda da requisição(py_api_profiling)...
+    request_pars['profileToken'] = request.headers.get(cts._PROFILE_TOKEN_HEADER)
     # Conversões & adaptações...
     request_pars['body'] = ''
     if request.method == cts._GET:
+        # Os parâmetros seguem como dict até as facades, sem json encode/decode...
         if type(request.json) is dict and 'queryStringParameters' in request.json:
-            request_pars['body'] = json.dumps(request.json['queryStringParameters'])
+            request_pars['body'] = request.json['queryStringParameters']
         else:
-            request_pars['body'] = json.dumps(request.values.to_dict())
+            request_pars['body'] = request.values.to_dict()
     elif type(request.json) is dict:
         if 'body' in request.json:
             request_pars['body'] = request.json['body']   
@@ -34,7 +45,17 @@ def api():
     #   
     response = rest.handler(request=request_pars, in_production=in_production)      
     #
-    return response
+    # ETag(e o profiling) também no header HTTP, para os caches/clientes HTTP...
+    headers = {name: response['headers'][name] for name in cts._API_HTTP_HEADERS if name in response['headers']}
+    if response['statusCode'] == 304:
+        # Não modificado - HTTP 304 sem body...
+        return Response(status=304, headers=headers)
+    if response['headers']['Content-Type'] == cts._EXPORT_NDJSON_MIMETYPE:
+        # Exportação - Generator dos chunks NDJSON, enviados conforme lidos do banco...
+        return Response(response['body'], mimetype=cts._EXPORT_NDJSON_MIMETYPE, headers=headers, direct_passthrough=True)
+    #
+    # Json encode único de toda a resposta(o "body" é um objeto dentro do envelope)...
+    return Response(fns.json_encode(response), mimetype='application/json', headers=headers)
 
 if __name__ == '__main__':
     # Quando esse script é executado diretamente(__main__), será em debug mode na porta 5000.
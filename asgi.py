@@ -0,0 +1,98 @@
+#-------------------------------------------------------------------------
+# Starter ASGI da API(backend assíncrono).
+# --> Utilize com um servidor ASGI, por exemplo:
+#     >uvicorn asgi:application --port 8080 --workers 2
+#-------------------------------------------------------------------------
+
+import os
+import logging
+
+from urllib.parse import parse_qsl
+
+import py_api_consts as cts
+import py_api_functions as fns
+import rest_products_async as rest
+
+# Define tipo do ambiente de execução...
+in_production = (os.environ.get('IN_PRODUCTION') != None and os.environ['IN_PRODUCTION'] == "1")
+
+# Logs da API("pyapi.*": contadores dos caches, queries lentas...) na saída padrão, sem alterar
+# uma configuração de logging já feita pelo servidor...
+logging.basicConfig(level=os.environ.get('PYAPI_LOG_LEVEL', 'INFO'), format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+async def read_body(receive) -> bytes:
+    """ Lê o body completo da requisição HTTP. """
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    return body
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+    #
+    request_pars = {'httpMethod': scope['method']}
+    # ETag(s) já recebido(s) pelo cliente(detalhes de produto: 304 quando não modificado)...
+    headers = dict(scope.get('headers', []))
+    if b'if-none-match' in headers:
+        request_pars['ifNoneMatch'] = headers[b'if-none-match'].decode('latin-1')
+    # Conversões & adaptações(as mesmas do app.py)...
+    request_pars['body'] = ''
+    try:
+        payload = fns.json_decode(await read_body(receive) or b'null')
+    except ValueError:
+        payload = None
+    if scope['method'] == cts._GET:
+        # Os parâmetros seguem como dict, sem json encode/decode...
+        if type(payload) is dict and 'queryStringParameters' in payload:
+            request_pars['body'] = payload['queryStringParameters']
+        else:
+            request_pars['body'] = dict(parse_qsl(scope.get('query_string', b'').decode('utf-8')))
+    elif type(payload) is dict:
+        if 'body' in payload:
+            request_pars['body'] = payload['body']
+        else:
+            request_pars['body'] = payload
+    #
+    response = await rest.handler(request=request_pars, in_production=in_production)
+    #
+    # ETag também no header HTTP, para os caches/clientes HTTP...
+    etag = [(b'etag', response['headers']['ETag'].encode('latin-1'))] if 'ETag' in response['headers'] else []
+    if response['statusCode'] == 304:
+        # Não modificado - HTTP 304 sem body...
+        await send({'type': 'http.response.start', 'status': 304, 'headers': etag})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    if response['headers']['Content-Type'] == cts._EXPORT_NDJSON_MIMETYPE:
+        # Exportação - Chunks NDJSON enviados conforme lidos do banco...
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [(b'content-type', cts._EXPORT_NDJSON_MIMETYPE.encode('latin-1'))]})
+        try:
+            async for chunk in response['body']:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            # Devolve a conexão ao pool, inclusive na desconexão do cliente...
+            await response['body'].aclose()
+        return
+    #
+    # Mesmo envelope do app.py(Flask): HTTP 200 com o dict de retorno do handler em json(encode único)...
+    await send({
+                  'type': 'http.response.start',
+                  'status': 200,
+                  'headers': [(b'content-type', b'application/json')] + etag
+               })
+    await send({
+                  'type': 'http.response.body',
+                  'body': fns.json_encode(response)
+               })
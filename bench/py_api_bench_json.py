@@ -0,0 +1,69 @@
+# coding:utf-8
+
+#--------------------------------------------------------------------
+# BENCHMARK - Parcela da serialização json na latência das consultas
+# (GET): latência total pelo Flask test client e custo do encode da
+# resposta no pipeline anterior(json.dumps do body + jsonify de todo o
+# dict) x encode único(json padrão e orjson, quando instalado).
+#--------------------------------------------------------------------
+# Executa no banco configurado em "db/pg_conn.py":
+#    $ python3 bench/py_api_bench_json.py --n=500 --page=1
+#--------------------------------------------------------------------
+
+import sys
+import json
+import time
+
+from pathlib import Path
+
+# Bibliotecas...
+root_dir = str(Path(__file__).parent.parent)
+sys.path.append(root_dir)
+
+import py_api_functions as fns
+
+from app import application
+#----------------------------------------------------------------------------------
+
+def old_encode(response:dict) -> bytes:
+    """ Pipeline anterior: body em string json e o dict inteiro encoded de novo(jsonify do Flask). """
+    envelope = dict(response, body=json.dumps(response['body']))
+    return json.dumps(envelope).encode('utf-8')
+
+def std_encode(response:dict) -> bytes:
+    """ Encode único com o json padrão. """
+    return json.dumps(response, default=fns.json_default, ensure_ascii=False).encode('utf-8')
+
+def measure(fn, arg, n:int) -> float:
+    """ Retorna o tempo médio(microssegundos) por chamada. """
+    start = time.perf_counter()
+    for i in range(n):
+        fn(arg)
+    return (time.perf_counter() - start) * 1000000.0 / n
+
+if __name__ == '__main__':
+    n = int(fns.get_cmd_arg(sys.argv, '--n', default='500'))
+    page = fns.get_cmd_arg(sys.argv, '--page', default='1')
+    #
+    client = application.test_client()
+    for label, query in (('Listagem', '/?page=' + page + '&order=name'), ('Detalhes', None)):
+        if query is None:
+            # Detalhes do primeiro produto da listagem...
+            rows = client.get('/?page=' + page).get_json()['body'].get('rows', [])
+            if len(rows) == 0:
+                continue
+            query = '/?id=' + str(rows[0]['id'])
+        #
+        start = time.perf_counter()
+        for i in range(n):
+            response = client.get(query)
+        latency = (time.perf_counter() - start) * 1000000.0 / n
+        response = response.get_json()
+        #
+        print('--> ' + label + ' (' + query + ', ' + str(n) + ' requisições): latência média={:.1f}us'.format(latency))
+        encoders = [('Anterior(2 encodes)', old_encode), ('Único(json)', std_encode)]
+        if fns.orjson is not None:
+            encoders.append(('Único(orjson)', fns.json_encode))
+        for name, fn in encoders:
+            cost = measure(fn, response, n)
+            print('    {:<22} encode={:9.1f}us  parcela da latência={:5.1f}%'.format(name, cost, cost * 100.0 / latency))
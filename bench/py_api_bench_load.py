@@ -0,0 +1,259 @@
+# coding:utf-8
+
+#--------------------------------------------------------------------
+# BENCHMARK - Carga concorrente na API(app.application pelo Flask
+# test client, sem servidor HTTP): mix de PUT/POST/GET/DELETE por
+# níveis de concorrência(threads), com req/s, latências p50/p95/p99
+# e taxa de erros por método, e o resultado em json para comparar
+# builds.
+#--------------------------------------------------------------------
+# Executa no banco configurado em "db/pg_conn.py"(os produtos incluídos
+# pelo benchmark ficam no banco, desativados pelos DELETEs ou não):
+#    $ python3 bench/py_api_bench_load.py --levels=1,4,16 --duration=10 --mix=put:1,post:2,get:6,delete:1
+#    --levels:   Níveis de concorrência(threads simultâneas), separados por vírgula(default 1,4,16)
+#    --duration: Segundos de carga por nível(default 10)
+#    --warmup:   Segundos de aquecimento, não medidos, antes de cada nível(default 1)
+#    --mix:      Pesos dos métodos(default put:1,post:2,get:6,delete:1)
+#    --output:   Arquivo json para o resultado(default bench_load.json)
+#    --label:    Identificação do build no resultado(Ex: hash do commit)
+#    --compare:  Arquivo json de um resultado anterior, para as diferenças por método
+#    --memory:   Executa no banco em memória do processo(py_api_memory_db), sem o PostgreSQL,
+#                para medir somente o custo da API em Python
+#--------------------------------------------------------------------
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import platform
+import threading
+import collections
+
+from pathlib import Path
+
+# Bibliotecas...
+root_dir = str(Path(__file__).parent.parent)
+sys.path.append(root_dir)
+
+import py_api_consts as cts
+import py_api_functions as fns
+
+# Banco em memória: selecionado pelo ambiente antes da carga da aplicação...
+if '--memory' in sys.argv:
+    os.environ[cts._DB_BACKEND_ENV] = cts._DB_BACKEND_MEMORY
+
+from app import application
+#----------------------------------------------------------------------------------
+
+_PERCENTILES = (50, 95, 99)
+
+# Produtos incluídos pelo benchmark, alvos dos POSTs, GETs e DELETEs...
+_PRODUCTS = collections.deque(maxlen=10000)
+_PRODUCTS_LOCK = threading.Lock()
+
+def new_product(manufacturer:dict, seq:str) -> dict:
+    return {
+              "name": "Bench product " + seq,
+              "description": "Produto incluído pelo benchmark de carga",
+              "barcode": seq[-13:].rjust(13, '0'),
+              "manufacturer": manufacturer,
+              "unitPrice": 10.5
+           }
+
+def pick_product(remove:bool=False):
+    """ "id" de um produto incluído pelo benchmark(None sem produtos). """
+    with _PRODUCTS_LOCK:
+        if len(_PRODUCTS) == 0:
+            return None
+        if remove:
+            return _PRODUCTS.popleft()
+        return _PRODUCTS[random.randrange(len(_PRODUCTS))]
+
+def is_success(response, detail:bool=False) -> bool:
+    """ 
+    Sucesso: HTTP 200 com o envelope também 200(ou 304). 
+    Nos detalhes(GET com "id") o produto também deve vir nas "rows"(lista vazia = produto não encontrado).
+    """
+    if response.status_code == 304:
+        return True
+    if response.status_code != 200:
+        return False
+    payload = response.get_json(silent=True)
+    if type(payload) is not dict or payload.get('statusCode') not in (200, 304):
+        return False
+    if detail and payload.get('statusCode') == 200:
+        body = payload.get('body')
+        return type(body) is dict and len(body.get('rows') or []) > 0
+    return True
+
+def do_put(client, manufacturer:dict, seq:str):
+    response = client.put('/', json={'body': new_product(manufacturer, seq)})
+    if is_success(response):
+        with _PRODUCTS_LOCK:
+            _PRODUCTS.append(response.get_json()['body']['id'])
+    return response
+
+def do_post(client, manufacturer:dict, seq:str):
+    product_id = pick_product()
+    if product_id is None:
+        return None
+    product = dict(new_product(manufacturer, seq), id=product_id, name='Bench product updated ' + seq)
+    return client.post('/', json={'body': product})
+
+def do_get(client, manufacturer:dict, seq:str):
+    product_id = pick_product()
+    if product_id is None or random.random() < 0.2:
+        return client.get('/?page=1'), False
+    return client.get('/?id=' + str(product_id)), True
+
+def do_delete(client, manufacturer:dict, seq:str):
+    product_id = pick_product(remove=True)
+    if product_id is None:
+        return None
+    return client.delete('/', json={'body': {'id': product_id}})
+
+_OPERATIONS = {cts._PUT: do_put, cts._POST: do_post, cts._GET: do_get, cts._DEL: do_delete}
+
+def parse_mix(value:str) -> dict:
+    """ "put:1,post:2,get:6,delete:1" -> {'PUT': 1.0, ...}(somente os pesos > 0). """
+    mix = {}
+    for item in value.split(','):
+        method, weight = item.split(':')
+        method = method.strip().upper()
+        if method not in _OPERATIONS:
+            raise ValueError('Método "{}" inválido no --mix.'.format(method))
+        if float(weight) > 0:
+            mix[method] = float(weight)
+    return mix
+
+def worker(manufacturer:dict, mix:dict, deadline:float, measure_from:float, samples:dict, worker_id:int):
+    """ 
+    Executa requisições do mix até o deadline; as iniciadas após measure_from são medidas. 
+    Sucesso pelo status HTTP e pelo "statusCode" do envelope(e nos detalhes, pelo produto retornado).
+    """
+    client = application.test_client()
+    methods, weights = list(mix.keys()), list(mix.values())
+    rnd = random.Random(worker_id)
+    count = 0
+    while True:
+        start = time.perf_counter()
+        if start >= deadline:
+            break
+        method = rnd.choices(methods, weights)[0]
+        count += 1
+        seq = '{}{:03d}{:07d}'.format(int(time.time()), worker_id % 1000, count)
+        try:
+            response, detail = _OPERATIONS[method](client, manufacturer, seq), False
+            if type(response) is tuple:
+                response, detail = response
+            if response is None:
+                # Sem produto alvo(POST/DELETE) - Não medido...
+                continue
+            success = is_success(response, detail)
+        except Exception:
+            success = False
+        if start >= measure_from:
+            samples[method].append(((time.perf_counter() - start) * 1000.0, success))
+
+def percentile(values:list, p:float) -> float:
+    """ Percentil(nearest-rank) de uma lista ordenada. """
+    if not values:
+        return 0.0
+    return values[max(0, min(len(values) - 1, math.ceil(p / 100.0 * len(values)) - 1))]
+
+def summarize(samples:list, seconds:float) -> dict:
+    latencies = sorted(s[0] for s in samples)
+    errors = sum(1 for s in samples if not s[1])
+    summary = {
+                 'requests': len(samples),
+                 'errors': errors,
+                 'errorRate': errors / len(samples) if samples else 0.0,
+                 'rps': len(samples) / seconds if seconds > 0 else 0.0,
+                 'mean': sum(latencies) / len(latencies) if latencies else 0.0,
+                 'max': latencies[-1] if latencies else 0.0
+              }
+    for p in _PERCENTILES:
+        summary['p' + str(p)] = percentile(latencies, p)
+    return summary
+
+def run_level(manufacturer:dict, mix:dict, concurrency:int, duration:float, warmup:float) -> dict:
+    """ Carga com "concurrency" threads: warmup(não medido) e "duration" segundos medidos. """
+    samples = {method: [] for method in mix}
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + duration
+    threads = [threading.Thread(target=worker, args=(manufacturer, mix, deadline, measure_from, samples, i))
+               for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    #
+    methods = {method: summarize(method_samples, duration) for method, method_samples in samples.items()}
+    return {
+              'concurrency': concurrency,
+              'duration': duration,
+              'methods': methods,
+              'total': summarize([s for method_samples in samples.values() for s in method_samples], duration)
+           }
+
+def report(level:dict, baseline:dict=None):
+    print('\n--> Concorrência {} ({}s)'.format(level['concurrency'], level['duration']))
+    print('    {:<7} {:>8} {:>9} {:>9} {:>9} {:>9} {:>8}'.format('Método', 'req/s', 'p50(ms)', 'p95(ms)', 'p99(ms)', 'max(ms)', 'erros'))
+    rows = list(level['methods'].items()) + [('Total', level['total'])]
+    for method, s in rows:
+        line = '    {:<7} {:>8.1f} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f} {:>7.2f}%'.format(method, s['rps'], s['p50'], s['p95'],
+                                                                                      s['p99'], s['max'], s['errorRate'] * 100.0)
+        if baseline is not None:
+            before = baseline['total'] if method == 'Total' else baseline['methods'].get(method)
+            if before and before['rps'] > 0 and before['p95'] > 0:
+                line += '  (req/s {:+.1f}%, p95 {:+.1f}%)'.format((s['rps'] - before['rps']) * 100.0 / before['rps'],
+                                                                  (s['p95'] - before['p95']) * 100.0 / before['p95'])
+        print(line)
+
+def setup_manufacturer(seq:str) -> dict:
+    """ 
+    Fabricante dos produtos do benchmark(incluído junto com o primeiro produto). 
+    --> Referenciado pelo "name"(upsert): com o "id" o produto fica sem a associação com o fabricante
+        (productmanufacturer) e não é encontrado pelos POSTs, GETs e DELETEs.
+    """
+    manufacturer = {'name': 'Bench manufacturer ' + seq}
+    response = application.test_client().put('/', json={'body': new_product(manufacturer, seq)})
+    if not is_success(response):
+        print('Falha na inclusão do produto inicial: ' + response.get_data(as_text=True))
+        sys.exit(1)
+    _PRODUCTS.append(response.get_json()['body']['id'])
+    return manufacturer
+
+if __name__ == '__main__':
+    levels = [int(c) for c in fns.get_cmd_arg(sys.argv, '--levels', default='1,4,16').split(',')]
+    duration = float(fns.get_cmd_arg(sys.argv, '--duration', default='10'))
+    warmup = float(fns.get_cmd_arg(sys.argv, '--warmup', default='1'))
+    mix = parse_mix(fns.get_cmd_arg(sys.argv, '--mix', default='put:1,post:2,get:6,delete:1'))
+    output = fns.get_cmd_arg(sys.argv, '--output', default='bench_load.json')
+    label = fns.get_cmd_arg(sys.argv, '--label', default='')
+    compare = fns.get_cmd_arg(sys.argv, '--compare', default='')
+    #
+    baseline = {}
+    if compare != '':
+        with open(compare, encoding='utf-8') as file:
+            baseline = {level['concurrency']: level for level in json.load(file)['levels']}
+    #
+    manufacturer = setup_manufacturer(str(int(time.time())))
+    result = {
+                'label': label,
+                'timestamp': fns.now(format='%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'backend': os.environ.get(cts._DB_BACKEND_ENV, cts._DB_BACKEND),
+                'mix': mix,
+                'levels': []
+             }
+    for concurrency in levels:
+        level = run_level(manufacturer, mix, concurrency, duration, warmup)
+        result['levels'].append(level)
+        report(level, baseline.get(concurrency))
+    #
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(result, file, indent=2)
+    print('\nResultado em ' + output)
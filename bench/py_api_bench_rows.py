@@ -0,0 +1,83 @@
+# coding:utf-8
+
+#--------------------------------------------------------------------
+# BENCHMARK - Memória(tracemalloc) e tempo de uma listagem de 10k
+# rows: rows DictCursor + cópia para dicts x rows compactas(tuplas
+# e um mapa de colunas) com projeção direta.
+#--------------------------------------------------------------------
+# Executa no banco configurado em "db/pg_conn.py"(não usa tabelas,
+# as rows são geradas pelo generate_series):
+#    $ python3 bench/py_api_bench_rows.py --rows=10000 --n=20 --env=devel
+#--------------------------------------------------------------------
+
+import sys
+import time
+import statistics
+import tracemalloc
+
+from pathlib import Path
+
+# Bibliotecas...
+root_dir = str(Path(__file__).parent.parent)
+sys.path.append(root_dir)
+
+import py_api_classes as cls
+import py_api_functions as fns
+
+from db.pg_conn import _PG_CONNECTION
+#----------------------------------------------------------------------------------
+
+_SQL = ("SELECT g AS id, 'Product name number ' || g AS name "+
+        "FROM generate_series(1, %(rows)s) AS g ORDER BY g")
+
+def dict_rows(db:cls.DBPostgres, rows:int) -> list:
+    """ Comportamento anterior: DictCursor e cópia de cada row para um novo dict. """
+    db.query(sql=_SQL, pars={'rows': rows}, commit=True)
+    result = []
+    for row in db.get_rows():
+        result.append({'id': row['id'], 'name': row['name']})
+    return result
+
+def compact_rows(db:cls.DBPostgres, rows:int) -> list:
+    """ Comportamento atual: tuplas simples projetadas pelo mapa de colunas. """
+    db.query(sql=_SQL, pars={'rows': rows}, commit=True, compact=True)
+    cols = db.get_columns()
+    c_id, c_name = cols['id'], cols['name']
+    return [{'id': row[c_id], 'name': row[c_name]} for row in db.get_rows()]
+
+def measure(db:cls.DBPostgres, fn, rows:int, n:int):
+    timings = []
+    peaks = []
+    for i in range(n):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = fn(db, rows)
+        timings.append((time.perf_counter() - start) * 1000.0)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024.0)
+        tracemalloc.stop()
+        assert len(result) == rows, db.get_error_message()
+        del result
+    return statistics.mean(timings), statistics.mean(peaks)
+
+if __name__ == '__main__':
+    rows = int(fns.get_cmd_arg(sys.argv, '--rows', default='10000'))
+    n = int(fns.get_cmd_arg(sys.argv, '--n', default='20'))
+    env = fns.get_cmd_arg(sys.argv, '--env', default='devel')
+    #
+    db = cls.DBPostgres()
+    if not db.connect(conn_pars=_PG_CONNECTION[env]):
+        print(db.get_error_message())
+        sys.exit(1)
+    #
+    print('--> Listagem de ' + str(rows) + ' rows (' + str(n) + ' iterações, tempo com tracemalloc ligado)')
+    results = {}
+    for label, fn in (('DictCursor + cópia', dict_rows), ('Compacta + projeção', compact_rows)):
+        results[label] = measure(db, fn, rows, n)
+        print('{:<22} tempo médio={:9.3f}ms  pico de memória médio={:10.1f}KiB'.format(label, *results[label]))
+    #
+    before, after = results['DictCursor + cópia'], results['Compacta + projeção']
+    print('{:<22} tempo={:.1f}%  memória={:.1f}%'.format('Redução',
+                                                        (before[0] - after[0]) * 100.0 / before[0],
+                                                        (before[1] - after[1]) * 100.0 / before[1]))
+    #
+    db.close_connection()
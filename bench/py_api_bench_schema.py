@@ -0,0 +1,68 @@
+# coding:utf-8
+
+#--------------------------------------------------------------------
+# BENCHMARK - Custo da validação do request pelo schema json, por
+# requisição: jsonschema.validate()(confere o schema e monta um novo
+# validador a cada chamada) x validador pré-compilado do registro
+# x validador gerado em código(fastjsonschema, quando instalado).
+#--------------------------------------------------------------------
+# Não usa o banco:
+#    $ python3 bench/py_api_bench_schema.py --n=20000
+#--------------------------------------------------------------------
+
+import sys
+import time
+import jsonschema
+
+from pathlib import Path
+
+# Bibliotecas...
+root_dir = str(Path(__file__).parent.parent)
+sys.path.append(root_dir)
+
+import py_api_consts as cts
+import py_api_classes as cls
+import py_api_functions as fns
+#----------------------------------------------------------------------------------
+
+# Requests válidos de exemplo, por schema...
+_REQUESTS = {
+    '_INSERT_PRODUCT_JSON_SCHEMA': (cts._INSERT_PRODUCT_JSON_SCHEMA, {
+        "name": "Grape juice 1000ml",
+        "description": "Natural grape juice",
+        "barcode": "7002085002679",
+        "manufacturer": {"name": "Quality farm goods"},
+        "unitPrice": 25.89
+    }),
+    '_UPDATE_PRODUCT_JSON_SCHEMA': (cts._UPDATE_PRODUCT_JSON_SCHEMA, {
+        "id": 359,
+        "name": "Orange juice 1000ml",
+        "manufacturer": {"id": 3},
+        "unitPrice": 20.89
+    }),
+    '_DELETE_PRODUCT_JSON_SCHEMA': (cts._DELETE_PRODUCT_JSON_SCHEMA, {"id": 359}),
+    '_GET_PRODUCT_JSON_SCHEMA': (cts._GET_PRODUCT_JSON_SCHEMA, {"page": "2", "order": "name"}),
+    '_GET_MANUFACTURER_JSON_SCHEMA': (cts._GET_MANUFACTURER_JSON_SCHEMA, {"id": "3"})
+}
+
+def measure(fn, schema:dict, request:dict, n:int) -> float:
+    """ Retorna o custo médio(microssegundos) por validação. """
+    start = time.perf_counter()
+    for i in range(n):
+        fn(instance=request, schema=schema)
+    return (time.perf_counter() - start) * 1000000.0 / n
+
+if __name__ == '__main__':
+    n = int(fns.get_cmd_arg(sys.argv, '--n', default='20000'))
+    #
+    validators = [('jsonschema.validate', jsonschema.validate),
+                  ('Pré-compilado', cls.SchemaValidatorRegistry(fast=False).validate)]
+    if cls.fastjsonschema is not None:
+        validators.append(('Gerado(fastjsonschema)', cls.SchemaValidatorRegistry(fast=True).validate))
+    #
+    print('--> Custo médio por validação em microssegundos (' + str(n) + ' iterações)')
+    print('{:<32}'.format('Schema') + ''.join('{:>24}'.format(label) for label, fn in validators))
+    for name, (schema, request) in _REQUESTS.items():
+        costs = [measure(fn, schema, request, n) for label, fn in validators]
+        print('{:<32}'.format(name) + ''.join('{:>24.2f}'.format(c) for c in costs) +
+              '   (' + ' / '.join('{:.1f}x'.format(costs[0] / c) for c in costs[1:]) + ' mais rápido)')
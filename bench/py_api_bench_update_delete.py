@@ -0,0 +1,81 @@
+# coding:utf-8
+
+#--------------------------------------------------------------------
+# BENCHMARK - Latência do UPDATE/DELETE com e sem o pré-check
+# "count_all"(SELECT COUNT(*)) por requisição.
+#--------------------------------------------------------------------
+# Executa no banco configurado em "db/pg_conn.py", sempre dentro de
+# uma transação que é desfeita(rollback) ao final de cada iteração:
+#    $ python3 bench/py_api_bench_update_delete.py --id=1 --n=500 --env=devel
+#    --id:  "id" de um produto existente(default 1)
+#    --n:   Iterações por cenário(default 500)
+#    --env: "devel" ou "production"(default devel)
+#--------------------------------------------------------------------
+
+import sys
+import time
+import statistics
+
+from pathlib import Path
+
+# Bibliotecas...
+root_dir = str(Path(__file__).parent.parent)
+sys.path.append(root_dir)
+
+import py_api_consts as cts
+import py_api_classes as cls
+import py_api_functions as fns
+
+from db.pg_conn import _PG_CONNECTION
+#----------------------------------------------------------------------------------
+
+def two_round_trips(db:cls.DBPostgres, table:str, pk:dict, fields:dict) -> bool:
+    """ Comportamento anterior: SELECT COUNT(*) e, havendo a chave, o UPDATE. """
+    db.count_all(table=table, condition=pk)
+    if db.get_rows()[0]['count'] == 0:
+        return False
+    sets = ', '.join([c + ' = %(s_' + c + ')s' for c in fields.keys()])
+    where = ' and '.join([c + ' = %(w_' + c + ')s' for c in pk.keys()])
+    pars = {('s_' + c): v for c, v in fields.items()}
+    pars.update({('w_' + c): v for c, v in pk.items()})
+    return db.query(sql='UPDATE ' + table + ' SET ' + sets + ' WHERE ' + where, pars=pars, commit=False)
+
+def one_round_trip(db:cls.DBPostgres, table:str, pk:dict, fields:dict) -> bool:
+    """ Comportamento atual: UPDATE único com a chave inexistente detectada pelo rowcount. """
+    return db.update(table=table, pk=pk, fields=fields)
+
+def measure(db:cls.DBPostgres, fn, n:int, pk:dict) -> list:
+    timings = []
+    for i in range(n):
+        db.start_transaction()
+        start = time.perf_counter()
+        fn(db, 'product', pk, {'active': cts._YES})
+        timings.append((time.perf_counter() - start) * 1000.0)
+        db.rollback()
+    return timings
+
+def report(label:str, timings:list):
+    timings = sorted(timings)
+    print('{:<28} mean={:8.3f}ms  p50={:8.3f}ms  p95={:8.3f}ms'.format(label,
+                                                                     statistics.mean(timings),
+                                                                     timings[len(timings) // 2],
+                                                                     timings[int(len(timings) * 0.95) - 1]))
+    return statistics.mean(timings)
+
+if __name__ == '__main__':
+    product_id = int(fns.get_cmd_arg(sys.argv, '--id', default='1'))
+    n = int(fns.get_cmd_arg(sys.argv, '--n', default='500'))
+    env = fns.get_cmd_arg(sys.argv, '--env', default='devel')
+    #
+    db = cls.DBPostgres()
+    if not db.connect(conn_pars=_PG_CONNECTION[env]):
+        print(db.get_error_message())
+        sys.exit(1)
+    #
+    for label, pk in (('chave existente', {'id': product_id}), ('chave inexistente', {'id': -1})):
+        print('\n--> UPDATE product, ' + label + ' (' + str(n) + ' iterações)')
+        before = report('count_all + UPDATE', measure(db, two_round_trips, n, pk))
+        after = report('UPDATE + rowcount', measure(db, one_round_trip, n, pk))
+        print('{:<28} {:8.3f}ms por requisição ({:.1f}%)'.format('Redução', before - after, (before - after) * 100.0 / before))
+    #
+    db.close_connection()
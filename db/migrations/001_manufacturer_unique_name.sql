@@ -0,0 +1,48 @@
+-----------------------------------------------------------------------
+-- Unicidade do nome do fabricante(normalizado: sem os espaços nas
+-- pontas e sem diferença de maiúsculas/minúsculas), requisito das
+-- inclusões de fabricante por upsert(INSERT ... ON CONFLICT).
+-- --> Execute com: psql -d nome_do_banco -f 001_manufacturer_unique_name.sql
+-- --> Um nome repetido incluído entre o COMMIT da unificação e o fim
+--     da criação do índice faz o CREATE INDEX CONCURRENTLY falhar e
+--     deixa o índice INVALID: execute o arquivo novamente(o índice
+--     inválido é excluído antes da nova criação).
+-----------------------------------------------------------------------
+
+BEGIN;
+
+-- Fabricantes repetidos e o fabricante mantido(o de menor "id") de cada nome...
+CREATE TEMP TABLE manufacturer_dedupe ON COMMIT DROP AS
+SELECT id, min(id) OVER (PARTITION BY lower(btrim(name))) AS keep_id
+  FROM manufacturer;
+
+DELETE FROM manufacturer_dedupe WHERE id = keep_id;
+
+-- Associa os produtos dos repetidos ao fabricante mantido(ativa se alguma das associações estava ativa)...
+INSERT INTO productmanufacturer (product_id, manufacturer_id, active)
+SELECT pm.product_id, d.keep_id, max(pm.active)
+  FROM productmanufacturer pm
+       INNER JOIN manufacturer_dedupe d ON d.id = pm.manufacturer_id
+ GROUP BY pm.product_id, d.keep_id
+    ON CONFLICT (product_id, manufacturer_id)
+    DO UPDATE SET active = greatest(productmanufacturer.active, EXCLUDED.active);
+
+-- Exclui as associações e os fabricantes repetidos...
+DELETE FROM productmanufacturer pm USING manufacturer_dedupe d WHERE pm.manufacturer_id = d.id;
+DELETE FROM manufacturer m USING manufacturer_dedupe d WHERE m.id = d.id;
+
+COMMIT;
+
+-- Índice inválido de uma execução anterior que falhou: o IF NOT EXISTS abaixo o manteria e
+-- o ON CONFLICT do upsert continuaria sem índice único válido...
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_index i
+                 WHERE i.indexrelid = to_regclass('manufacturer_name_key') AND NOT i.indisvalid) THEN
+        DROP INDEX manufacturer_name_key;
+    END IF;
+END
+$$;
+
+-- Índice único(CONCURRENTLY: sem bloquear as escritas, por isso fora da transação)...
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS manufacturer_name_key ON manufacturer (lower(btrim(name)));
@@ -10,13 +10,40 @@ _PG_CONNECTION = {
                        'port': 5432,
                        'name': 'pyapi',
                        'user': 'postgres',
-                        'pwd': 'postgres'
+                        'pwd': 'postgres',
+                       # Opcional - 'memory' para o banco em memória do processo(benchmarks, sem PostgreSQL)...
+                       'backend': 'postgres'
                     },
                     'production': {
                        'host': '35.36.37.38',
                        'port': 5432,
                        'name': 'pyapi',
                        'user': 'postgres',
-                        'pwd': '123321'
+                        'pwd': '123321',
+                       # Opcional - Limites do pool de conexões por processo(padrões em py_api_consts)...
+                       'pool': {
+                          'min': 2,
+                          'max': 20,
+                          'timeout': 5.0,
+                          'max_lifetime': 1800.0
+                       },
+                       # Opcional - Cache(LRU) de prepared statements por conexão...
+                       'prepare': True,
+                       'prepare_max': 100,
+                       # Opcional - Invalidação dos caches entre os processos(workers) por LISTEN/NOTIFY...
+                       'notify': True,
+                       # Opcional - Réplicas de leitura para as consultas(GET). Os atributos não
+                       # informados(name, user, pwd, pool...) são os mesmos do primário...
+                       'replicas': [
+                          {'host': '35.36.37.39', 'port': 5432},
+                          {'host': '35.36.37.40', 'port': 5432}
+                       ],
+                       # Opcional - Roteamento das leituras(padrões em py_api_consts)...
+                       'replica_routing': {
+                          'retry': 30.0,
+                          'health_check': 10.0,
+                          'max_lag': 5.0,
+                          'read_your_writes': 5.0
+                       }
                     }
 }                                            
\ No newline at end of file
@@ -0,0 +1,530 @@
+#--------------------------------------------------------------------
+# Biblioteca de classes base para o backend assíncrono(asyncio)
+# da API: wrapper PostgreSQL sobre o driver asyncpg e seu pool.
+#--------------------------------------------------------------------
+
+import re
+import time
+import asyncio
+import weakref
+import functools
+
+from typing import Union
+
+import py_api_consts as cts
+import py_api_classes as cls
+import py_api_functions as fns
+import py_api_instrumentation as ins
+
+try:
+    import asyncpg
+    _ASYNCPG_ERRORS = (asyncpg.PostgresError, asyncpg.InterfaceError)
+except ImportError:
+    # Dependência opcional, necessária somente para o backend assíncrono...
+    asyncpg = None
+    _ASYNCPG_ERRORS = ()
+
+# Comandos que retornam rows(e não somente o status)...
+_SQL_RETURNING = re.compile(r'\breturning\b', re.IGNORECASE)
+
+# Envio de várias notificações(NOTIFY) numa única ida ao banco...
+_SQL_NOTIFY = ('SELECT pg_notify(n.channel, n.payload) '+
+               'FROM unnest($1::text[], $2::text[]) AS n(channel, payload)')
+
+#---------------------------------------------------------------------------------
+
+@functools.lru_cache(maxsize=cts._SQL_TEMPLATE_CACHE_MAX)
+def asyncpg_sql(sql:str, positional:bool=False) -> tuple:
+    """
+    Converte um SQL no formato do psycopg2(%(nome)s ou %s) para o formato do asyncpg($1, $2...).
+    Retorna uma tupla (sql convertido, lista dos nomes na ordem dos $n). Com parâmetros
+    posicionais(%s) a lista de nomes retorna vazia e os valores seguem a ordem do list.
+    """
+    if not positional:
+        converted = cls.pg_prepare_sql(sql)
+        if converted is not None:
+            return converted[0], converted[1]
+    #
+    total = []
+
+    def replace(match):
+        if match.group(0) == '%%':
+            return '%'
+        total.append(True)
+        return '$' + str(len(total))
+
+    converted = cls._PG_NAMED_PARAMETER.sub(replace, sql).strip()
+    if converted.endswith(';'):
+        converted = converted[:-1]
+    return converted, []
+
+def asyncpg_args(sql:str, pars:Union[dict,list]) -> tuple:
+    """ Retorna o SQL convertido e a lista de valores dos $n para o asyncpg. """
+    if fns.is_empty(pars):
+        return asyncpg_sql(sql)[0], []
+    if type(pars) is dict:
+        converted, names = asyncpg_sql(sql)
+        return converted, [pars[n] for n in names]
+    return asyncpg_sql(sql, positional=True)[0], list(pars)
+
+def asyncpg_row_count(status:str) -> int:
+    """ Total de rows afetadas pelo status do comando(Ex: "UPDATE 1", "INSERT 0 5"). """
+    try:
+        return int(status.split()[-1])
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+#---------------------------------------------------------------------------------
+
+# Pools por event loop(um pool asyncpg não pode ser compartilhado entre loops) e DSN...
+_ASYNC_PG_POOLS = weakref.WeakKeyDictionary()
+
+async def get_async_pg_pool(conn_pars:dict, readonly:bool=False):
+    """
+    Retorna o pool asyncpg do event loop atual para os parâmetros de conexão,
+    criando-o no primeiro uso. Os limites vêm da mesma chave "pool" usada pelo
+    pool síncrono(min, max, max_idle); o "timeout" é aplicado no acquire.
+    """
+    if asyncpg is None:
+        raise RuntimeError('O driver "asyncpg" não está instalado.')
+    #
+    loop = asyncio.get_running_loop()
+    registry = _ASYNC_PG_POOLS.get(loop)
+    if registry is None:
+        registry = {'lock': asyncio.Lock(), 'pools': {}}
+        _ASYNC_PG_POOLS[loop] = registry
+    #
+    key = (cls.pg_dsn(conn_pars), readonly)
+    pool = registry['pools'].get(key)
+    if pool is None:
+        async with registry['lock']:
+            pool = registry['pools'].get(key)
+            if pool is None:
+                pool_pars = conn_pars['pool'] if type(conn_pars.get('pool')) is dict else {}
+                prepare = bool(conn_pars.get('prepare', cts._PG_PREPARED_STATEMENTS))
+                pool = await asyncpg.create_pool(
+                           host=conn_pars['host'],
+                           port=conn_pars['port'],
+                           database=conn_pars['name'],
+                           user=conn_pars['user'],
+                           password=conn_pars['pwd'],
+                           min_size=max(0, int(pool_pars.get('min', cts._PG_POOL_MIN_CONN))),
+                           max_size=max(1, int(pool_pars.get('max', cts._PG_POOL_MAX_CONN))),
+                           max_inactive_connection_lifetime=float(pool_pars.get('max_idle', cts._PG_POOL_MAX_IDLE)),
+                           # Cache(LRU) de prepared statements do próprio asyncpg, por conexão...
+                           statement_cache_size=(int(conn_pars.get('prepare_max', cts._PG_PREPARED_STATEMENTS_MAX)) if prepare else 0),
+                           server_settings=({'default_transaction_read_only': 'on'} if readonly else None)
+                       )
+                registry['pools'][key] = pool
+    return pool
+
+#---------------------------------------------------------------------------------
+
+class AsyncDBPostgres(cls.DatabaseInterface):
+    """
+    Wrapper assíncrono do PostgreSQL(asyncpg), com a mesma interface do DBPostgres.
+    Os métodos que vão ao banco(connect, close_connection, start_transaction, commit,
+    rollback, query, insert, insert_many, update, delete, count_all) são corrotinas
+    e devem ser aguardados(await); stream() é um async generator.
+    """
+
+    def __init__(self, pool=None) -> None:
+        super().__init__()
+        #
+        self.__rows = []
+        self.__row_count = 0
+        self.__columns = {}
+        self.__pool = pool
+        self.__connection = None
+        self.__transaction = None
+        self.__timeout = cts._PG_POOL_TIMEOUT
+
+        self.__key_not_found = False
+
+    def readable_exception(self, exception_err):
+        """
+        Formata e retorna uma mensagem de erro PG, pela exception
+        ocorrida, mais legível.
+        """
+        ret = ''
+        if exception_err:
+            sqlstate = getattr(exception_err, 'sqlstate', None)
+            if sqlstate:
+                ret = fns.to_str(sqlstate)
+            try:
+                message = str(exception_err)
+            except Exception as error:
+                message = str(error)
+            ret += ('' if ret == '' or message == '' else ' - ') + message
+        else:
+            ret = 'Exception desconhecida.'
+        #
+        return ret
+
+    def key_not_found(self) -> bool:
+        """
+        Retornar True logo após a tentativa de uma operação de
+        alteração/exclusão de chave/registro não existente.
+        """
+        return self.__key_not_found
+
+    async def connect(self, conn_pars:dict) -> bool:
+        """
+        Tenta a conexão com o banco PostgreSQL.
+        No modo com pool(pool informado no construtor) a conexão é emprestada
+        do pool e deve ser devolvida com close_connection().
+        Parâmetros:
+          dict conn_pars: Os mesmos atributos do DBPostgres.connect().
+        Retorna:
+          bool True/False quanto ao sucesso da conexão
+        """
+        self.no_errors()
+        pool_pars = conn_pars['pool'] if type(conn_pars.get('pool')) is dict else {}
+        self.__timeout = float(pool_pars.get('timeout', cts._PG_POOL_TIMEOUT))
+        self.set_notify(conn_pars.get('notify', cts._PG_NOTIFY))
+        try:
+            if asyncpg is None:
+                self.set_error(msg='Falha na conexão com o banco. [O driver "asyncpg" não está instalado.]')
+            elif self.__pool is not None:
+                self.__connection = await self.__pool.acquire(timeout=self.__timeout)
+            else:
+                self.__connection = await asyncpg.connect(host=conn_pars['host'],
+                                                          port=conn_pars['port'],
+                                                          database=conn_pars['name'],
+                                                          user=conn_pars['user'],
+                                                          password=conn_pars['pwd'],
+                                                          timeout=self.__timeout)
+        except asyncio.TimeoutError:
+            self.__connection = None
+            self.set_error(msg='Falha na conexão com o banco. [Nenhuma conexão livre em {}s.]'.format(self.__timeout), code=503)
+        except _ASYNCPG_ERRORS + (OSError,) as error:
+            self.__connection = None
+            self.set_error(msg='Falha na conexão com o banco. [{}]'.format(self.readable_exception(error)))
+        #
+        return not self.get_error()
+
+    def get_connection(self):
+        return self.__connection
+
+    def get_pool(self):
+        return self.__pool
+
+    def is_connected(self) -> bool:
+        return self.__connection is not None
+
+    async def close_connection(self, pars: dict = None) -> bool:
+        """ Fecha a conexão ou, no modo com pool, devolve a conexão emprestada ao pool. """
+        if self.is_connected():
+            try:
+                if self.__transaction is not None:
+                    # Transação pendente - Desfaz antes de devolver...
+                    await self.rollback()
+                if self.__pool is not None:
+                    await self.__pool.release(self.__connection)
+                else:
+                    await self.__connection.close()
+            finally:
+                self.__connection = None
+                self.__transaction = None
+                self.discard_commit_hooks()
+        #
+        return True
+
+    async def start_transaction(self) -> bool:
+        self.no_errors()
+        if self.is_connected() and self.__transaction is None:
+            try:
+                self.__transaction = self.__connection.transaction()
+                await self.__transaction.start()
+            except _ASYNCPG_ERRORS as error:
+                self.__transaction = None
+                self.set_error(msg='Erro iniciando transação. [{}]'.format(self.readable_exception(error)))
+        #
+        return self.__transaction is not None
+
+    def in_transaction(self) -> bool:
+        return self.__transaction is not None
+
+    async def commit(self) -> bool:
+        self.no_errors()
+        if self.__transaction is not None:
+            try:
+                notifications = self.pop_notifications()
+                if notifications:
+                    # Enviadas dentro da transação: entregues somente no commit...
+                    await self.__connection.execute(_SQL_NOTIFY, [n[0] for n in notifications], [n[1] for n in notifications])
+                await self.__transaction.commit()
+            except _ASYNCPG_ERRORS as error:
+                self.set_error(msg='Erro finalizando transação. [{}]'.format(self.readable_exception(error)))
+        #
+        self.__transaction = None
+        if self.get_error():
+            self.discard_commit_hooks()
+        else:
+            self.run_commit_hooks()
+        #
+        return not self.get_error()
+
+    async def rollback(self) -> bool:
+        self.no_errors()
+        if self.__transaction is not None:
+            try:
+                await self.__transaction.rollback()
+            except _ASYNCPG_ERRORS as error:
+                self.set_error(msg='Erro cancelando transação. [{}]'.format(self.readable_exception(error)))
+        #
+        self.__transaction = None
+        self.discard_commit_hooks()
+        #
+        return not self.get_error()
+
+    def fetch(self, clause:str, cursor) -> bool:
+        """
+        Popula a propriedade __rows com o retorno(list de Records) da query executada.
+        No asyncpg as rows já chegam no retorno do comando: "cursor" é essa lista.
+        Retorna bool True/False: Quanto ao sucesso na execução.
+        """
+        self.__rows = []
+        if clause == 'select':
+            self.__rows = cursor
+        elif clause == 'insert':
+            # O INSERT pode retornar valores, por exemplo, quando
+            # insere um novo registro e retorna a PK...
+            self.__rows = cursor[0] if len(cursor) > 0 else []
+        #
+        return not self.get_error()
+
+    async def query(self, sql:str, pars:Union[dict,list], commit:False, compact:bool=False):
+        """
+        Executar queries no Postgres.
+        Parâmetros:
+          str sql: SQL para execução(parâmetros no formato do psycopg2: %(nome)s ou %s).
+          mixed pars: Um list/dict com parâmetros e/ou valores dos filtros/colunas(SQL INJECTION SAFE)
+          bool commit: Passe True quando o commit deva ser executado após a execução da query.
+          bool compact: Passe True para o mapa {coluna: índice} em get_columns(). Os Records do
+                        asyncpg já são tuplas indexáveis, sem custo extra por row.
+        Retorna bool True/False: Quanto ao sucesso na execução.
+        """
+        self.no_errors()
+        self.__rows = []
+        self.__row_count = 0
+        self.__columns = {}
+        #
+        # Instrumentação(tempo, rows, fingerprint e origem), somente quando ligada...
+        stats = ins._QUERY_STATS if ins._QUERY_STATS.get_enabled() else None
+        if stats is not None:
+            start = time.perf_counter()
+        #
+        if self.is_connected():
+            try:
+                sql_clause = sql[:6].strip().lower()
+                converted, args = asyncpg_args(sql, pars)
+                if sql_clause == 'select' or _SQL_RETURNING.search(sql):
+                    rows = await self.__connection.fetch(converted, *args)
+                    self.__row_count = len(rows)
+                    if compact and len(rows) > 0:
+                        self.__columns = {k: i for i, k in enumerate(rows[0].keys())}
+                    self.fetch(clause=sql_clause, cursor=rows)
+                else:
+                    status = await self.__connection.execute(converted, *args)
+                    self.__row_count = asyncpg_row_count(status)
+                #
+                if commit:
+                    await self.commit()
+            except _ASYNCPG_ERRORS as error:
+                self.set_error(msg='Falha em execução de query. [{}]'.format(self.readable_exception(error)))
+        else:
+            self.set_error(msg='Sem conexão com o banco.')
+        #
+        if stats is not None:
+            stats.record(sql=sql, pars=pars, duration=time.perf_counter() - start, rows=self.__row_count,
+                         source=self.get_query_source(), error=self.get_error())
+        #
+        return not self.get_error()
+
+    async def stream(self, sql:str, pars:Union[dict,list], itersize:int=cts._PG_STREAM_ITERSIZE, compact:bool=False):
+        """
+        Executa uma consulta no Postgres em modo streaming(async generator).
+        Usa um cursor do asyncpg que busca "itersize" rows por ida ao servidor; fora de
+        uma transação, abre uma somente para a vida do cursor.
+        Em caso de falha o generator termina e o erro fica registrado(get_error/get_error_message).
+        """
+        self.no_errors()
+        self.__rows = []
+        self.__row_count = 0
+        self.__columns = {}
+        if not self.is_connected():
+            self.set_error(msg='Sem conexão com o banco.')
+            return
+        #
+        # Instrumentação(do cursor até o final da leitura das rows), somente quando ligada...
+        stats = ins._QUERY_STATS if ins._QUERY_STATS.get_enabled() else None
+        start = time.perf_counter() if stats is not None else 0.0
+        transaction = None
+        try:
+            if self.__transaction is None:
+                transaction = self.__connection.transaction()
+                await transaction.start()
+            converted, args = asyncpg_args(sql, pars)
+            async for row in self.__connection.cursor(converted, *args, prefetch=max(1, itersize)):
+                if self.__row_count == 0 and compact:
+                    self.__columns = {k: i for i, k in enumerate(row.keys())}
+                self.__row_count += 1
+                yield row
+        except _ASYNCPG_ERRORS as error:
+            self.set_error(msg='Falha em execução de query(streaming). [{}]'.format(self.readable_exception(error)))
+        finally:
+            if transaction is not None:
+                try:
+                    await transaction.rollback()
+                except _ASYNCPG_ERRORS:
+                    pass
+            self.record_query(stats, sql, pars, start, self.__row_count, self.get_error())
+
+    async def insert(self, table:str, fields:dict, sufix:str=''):
+        """
+        Executa a inclusão de um registro em uma tabela.
+        Parâmetros:
+           str table: Nome da tabela par incluir o registro
+           dict fields: Um dict com os campos e valores para inclusão no formato {nome_col: value,...}
+           str sufix: SQL command, opcional, que será adicionado no final da clásula de inclusão gerada
+        """
+        sql = cls._SQL_TEMPLATES.get('insert', table, tuple(fields), sufix=sufix)[0]
+        #
+        await self.query(sql=sql, pars=fields, commit=False)
+        #
+        return not self.get_error()
+
+    async def insert_many(self, table:str, rows:list, returning:str='', sufix:str=''):
+        """
+        Executa a inclusão de vários registros em uma tabela, com as mesmas regras do
+        DBPostgres.insert_many(): lotes de INSERT ... VALUES até cts._PG_COPY_MIN_ROWS rows
+        e COPY(copy_records_to_table) acima disso, com os valores de "returning"
+        reservados antes na sequence da coluna.
+        """
+        self.no_errors()
+        self.__rows = []
+        self.__row_count = 0
+        #
+        if fns.is_empty(rows):
+            return True
+        columns = list(rows[0].keys())
+        for row in rows:
+            if len(row) != len(columns) or any(c not in row for c in columns):
+                self.set_error('Todas as rows da inclusão em lote devem ter os mesmos campos.')
+                return False
+        #
+        if not self.is_connected():
+            self.set_error(msg='Sem conexão com o banco.')
+            return False
+        # Instrumentação por comando(reserva na sequence, COPY ou lote do VALUES), somente quando ligada...
+        stats = ins._QUERY_STATS if ins._QUERY_STATS.get_enabled() else None
+        sql, pars, start = '', None, 0.0
+        try:
+            copy = (sufix == '' and len(rows) >= cts._PG_COPY_MIN_ROWS)
+            values = []
+            if copy and returning != '':
+                # O COPY não tem RETURNING: reserva os valores na sequence da coluna...
+                sql = 'SELECT nextval(pg_get_serial_sequence($1, $2)) FROM generate_series(1, $3) ORDER BY 1'
+                pars = [table, returning, len(rows)]
+                start = time.perf_counter() if stats is not None else 0.0
+                values = [r[0] for r in await self.__connection.fetch(sql, *pars)]
+                self.record_query(stats, sql, pars, start, len(values))
+                # Sequence não vinculada(OWNED BY) à coluna: o nextval() retorna NULL e a inclusão segue por VALUES/RETURNING...
+                copy = (len(values) > 0 and values[0] is not None)
+            if copy:
+                if returning != '':
+                    rows = [fns.dict_merge(row, {returning: v}) for row, v in zip(rows, values)]
+                    columns = [returning] + [c for c in columns if c != returning]
+                records = [tuple(row[c] for c in columns) for row in rows]
+                sql, pars = 'COPY ' + table + ' (' + ','.join(columns) + ') FROM STDIN', None
+                start = time.perf_counter() if stats is not None else 0.0
+                await self.__connection.copy_records_to_table(table, records=records, columns=columns)
+                self.record_query(stats, sql, pars, start, len(records))
+                self.__rows = values
+            else:
+                # Lotes de INSERT ... VALUES ($1,...), (...) [sufix] [RETURNING]...
+                width = len(columns)
+                for first in range(0, len(rows), cts._PG_INSERT_BATCH_ROWS):
+                    batch = rows[first:first + cts._PG_INSERT_BATCH_ROWS]
+                    sql = ('INSERT INTO ' + table + ' (' + ','.join(columns) + ') VALUES ' +
+                           ','.join('(' + ','.join('$' + str(b * width + c + 1) for c in range(width)) + ')'
+                                    for b in range(len(batch))) +
+                           ('' if sufix == '' else ' ' + sufix) +
+                           ('' if returning == '' else ' RETURNING ' + returning))
+                    args = [row[c] for row in batch for c in columns]
+                    pars = args[:width]   # Formato de uma row(log das queries lentas)
+                    start = time.perf_counter() if stats is not None else 0.0
+                    if returning != '':
+                        self.__rows += [r[0] for r in await self.__connection.fetch(sql, *args)]
+                    else:
+                        await self.__connection.execute(sql, *args)
+                    self.record_query(stats, sql, pars, start, len(batch))
+            self.__row_count = len(rows)
+        except _ASYNCPG_ERRORS as error:
+            self.record_query(stats, sql, pars, start, 0, True)
+            self.set_error(msg='Falha na inclusão em lote. [{}]'.format(self.readable_exception(error)))
+        #
+        return not self.get_error()
+
+    async def update(self, table:str, pk:dict, fields:dict):
+        """
+        Executa a alteração de um registro em uma tabela.
+        Parâmetros:
+           str table: Nome da tabela par incluir o registro
+           dict pk: Um dict com os campos e valores da PK da tabela no formato {nome_col: value,...}
+           dict fields: Um dict com os campos e valores para inclusão no formato {nome_col: value,...}.
+        """
+        self.__key_not_found = False
+        sql, names = cls._SQL_TEMPLATES.get('update', table, tuple(pk), tuple(fields))
+        parameters = dict(zip(names, list(pk.values()) + list(fields.values())))
+        #
+        # Uma única ida ao banco: a chave inexistente é detectada pelo total de rows afetadas...
+        if await self.query(sql=sql, pars=parameters, commit=False) and self.get_row_count() == 0:
+            self.__key_not_found = True
+            self.set_error('Tentativa de alterar registro não existente na tabela.')
+        #
+        return not self.get_error()
+
+    async def delete(self, table:str, pk:dict):
+        """
+        Executa a exclusão de um registro em uma tabela.
+        Parâmetros:
+           str table: Nome da tabela para excluir o registro
+           dict pk: Um dict com os campos e valores da PK da tabela no formato {nome_col: value,...}
+        """
+        self.__key_not_found = False
+        sql, names = cls._SQL_TEMPLATES.get('delete', table, tuple(pk))
+        parameters = dict(zip(names, pk.values()))
+        #
+        # Uma única ida ao banco: a chave inexistente é detectada pelo total de rows afetadas...
+        if await self.query(sql=sql, pars=parameters, commit=False) and self.get_row_count() == 0:
+            self.__key_not_found = True
+            self.set_error('Tentativa de excluir registro não existente na tabela.')
+        #
+        return not self.get_error()
+
+    async def count_all(self, table:str, condition:dict):
+        """
+        Executa uma query de contagem de rows com uma determinada condição.
+        Retorna:
+           Inicializa a propriedade "__rows" com com um Record com o total da contagem
+           no rótulo "count".(Ex: Para acessar, use: db.get_rows()[0]['count'])
+        """
+        sql, names = cls._SQL_TEMPLATES.get('count_all', table, tuple(condition))
+        parameters = dict(zip(names, condition.values()))
+        #
+        await self.query(sql=sql, pars=parameters, commit=False)
+        #
+        return not self.get_error()
+
+    def get_rows(self) -> list:
+        return self.__rows
+
+    def get_columns(self) -> dict:
+        return self.__columns
+
+    def get_row_count(self) -> int:
+        return self.__row_count
+
+#---------------------------------------------------------------------------------
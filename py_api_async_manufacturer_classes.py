@@ -0,0 +1,200 @@
+#--------------------------------------------------------------------
+# Versões assíncronas(asyncio) das checagens e CRUDs de fabricantes.
+# As regras continuam nas classes síncronas: aqui somente as idas
+# ao banco são aguardadas(await).
+#--------------------------------------------------------------------
+
+import py_api_consts as cts
+import py_api_classes as cls
+import py_api_notify as notify
+import py_api_product_classes as prod
+import py_api_manufacturer_classes as manu
+
+class AsyncCheckManufacturerPUTRequest(manu.CheckManufacturerPUTRequest):
+    """ Checagem assíncrona do request para PUT(Inclusão de fabricante). """
+
+    async def execute(self):
+        # Consistências, decode e validação do schema...
+        if self.decode():
+            await self.check()
+        #
+        return not self.get_error()
+
+    async def check(self):
+        """ Implementação da validação dos atributos do request. """
+        if self.check_request() and self.get_lookup_id() is not None and not self.check_cached_lookup():
+            # Fabricante já deveria estar cadastrado - Verifica...
+            await self.get_db().query(sql=manu._SQL_MANUFACTURER_NAME, pars={'id': self.get_lookup_id()}, commit=False)
+            self.check_lookup(self.get_db())
+        #
+        return not self.get_error()
+
+class AsyncCheckManufacturerPOSTRequest(manu.CheckManufacturerPOSTRequest):
+    """ Checagem assíncrona do request para POST(Alteração de fabricante). """
+
+    async def execute(self):
+        # Consistências, decode e validação do schema...
+        if self.decode():
+            await self.check()
+        #
+        return not self.get_error()
+
+    async def check(self):
+        """ Implementação da validação dos atributos do request. """
+        if self.check_request():
+            if self.get_lookup_id() is not None and not self.check_cached_lookup():
+                # Fabricante já deveria estar cadastrado - Verifica...
+                await self.get_db().query(sql=manu._SQL_MANUFACTURER_NAME, pars={'id': self.get_lookup_id()}, commit=False)
+                self.check_lookup(self.get_db())
+            #
+            if self.get_check_product():
+                # Verifica se ainda é o mesmo fabricante já associado ao produto...
+                await self.get_db().query(sql=manu._SQL_PRODUCT_MANUFACTURER, pars={'id': self.get_request()['id'], 'active': cts._YES}, commit=False)
+                self.check_product_lookup(self.get_db())
+        #
+        return not self.get_error()
+
+#----------------------------------------------------------------------------------------------
+
+class AsyncInsertManufacturer(manu.InsertManufacturer):
+    """ Classe para inserção(PUT) assíncrona de fabricantes de produtos no banco. """
+
+    async def execute(self):
+        """ Inclusão de fabricante. """
+        if cls.InsertDetailRecord.execute(self):
+            await self.get_db().insert(table='manufacturer', fields={'name': self.get_manufacturer_name()}, sufix=manu._SQL_MANUFACTURER_UPSERT + ' RETURNING id, name')
+            self.set_result()
+        #
+        return not self.get_error()
+
+class AsyncResolveManufacturers(manu.ResolveManufacturers):
+    """ Classe para resolver(assíncrona), numa única passada, os fabricantes de vários produtos. """
+
+    async def execute(self):
+        if cls.InsertDetailRecord.execute(self):
+            ids = self.get_lookup_ids()
+            if ids:
+                await self.get_db().query(sql=manu._SQL_MANUFACTURER_NAMES, pars={'ids': ids}, commit=False)
+                self.set_lookup_result()
+            names = self.get_insert_names()
+            if not self.get_error() and names:
+                await self.get_db().insert_many(table='manufacturer', rows=[{'name': n} for n in names], returning='id', sufix=manu._SQL_MANUFACTURER_UPSERT)
+                self.set_insert_result(names)
+        #
+        return not self.get_error()
+
+class AsyncUpdateManufacturer(manu.UpdateManufacturer):
+    """ Classe para atualização(POST) assíncrona de fabricantes de produtos no banco. """
+
+    async def execute(self):
+        """ Atualização de fabricante. """
+        if cls.UpdateDetailRecord.execute(self):
+            await self.get_db().update(table='manufacturer',
+                                       pk={'id': self.get_manufacturer_id()},
+                                       fields={'name': self.get_manufacturer_name()})
+            self.set_result()
+        #
+        return not self.get_error()
+
+class AsyncGetManufacturer(manu.GetManufacturer):
+    """ Classe para consultas(GET) assíncronas de fabricantes no banco. """
+
+    async def execute(self):
+        if self.set_cached_result():
+            return True
+        sql, parameters = self.get_query()
+        await self.get_db().query(sql=sql, pars=parameters, commit=True, compact=True)
+        return self.set_result()
+
+#----------------------------------------------------------------------------------------------
+
+async def insert_or_reactivate_async(db, product_id:int, manufacturer_id:int):
+    """ 
+    Versão assíncrona de manu.InsertProductManufacturer.insert_or_reactivate(), que documenta a regra.
+    --> As duas devem ser alteradas juntas.
+    """
+    pk = {'product_id': product_id, 'manufacturer_id': manufacturer_id}
+    await db.update(table='productmanufacturer', pk=pk, fields={'active': cts._YES})
+    if db.get_error() and db.key_not_found():
+        await db.insert(table='productmanufacturer', fields=dict(pk, active=cts._YES))
+
+class AsyncInsertProductManufacturer(manu.InsertProductManufacturer):
+    """ Classe para inserção(PUT) assíncrona de fabricantes POR produtos no banco. """
+
+    async def execute(self):
+        if cls.InsertDetailRecord.execute(self):
+            # Primeiro desativa(se já existir) a associação atual...
+            await self.get_db().update(table='productmanufacturer',
+                                       pk={'product_id': self.get_product_id()},
+                                       fields={'active': cts._NO})
+            if self.get_db().get_error() and not self.get_db().key_not_found():
+                self.set_error(self.get_db().get_error_message())
+            else:
+                # Por fim, reativa ou insere a nova associação...
+                await insert_or_reactivate_async(self.get_db(), self.get_product_id(), self.get_manufacturer_id())
+                if self.get_db().get_error():
+                    self.set_error(self.get_db().get_error_message())
+                else:
+                    # Reserva a chave primária...
+                    self.set_primary_key({'product_id': self.get_product_id(), 'manufacturer_id': self.get_manufacturer_id()})
+        #
+        return not self.get_error()
+
+class AsyncInsertProductManufacturers(manu.InsertProductManufacturers):
+    """ Classe para inserção(PUT em lote) assíncrona das associações de produtos novos e seus fabricantes. """
+
+    async def execute(self):
+        if cls.InsertDetailRecord.execute(self) and self.get_rows():
+            await self.get_db().insert_many(table='productmanufacturer', rows=self.get_rows())
+            self.set_result()
+        #
+        return not self.get_error()
+
+class AsyncUpdateProductManufacturer(manu.UpdateProductManufacturer):
+    """ Classe para atualização/troca(POST) assíncrona do fabricante de um produto no banco. """
+
+    async def execute(self):
+        """ Troca do fabricante do produto. """
+        if cls.UpdateDetailRecord.execute(self):
+            # Primeiro desativa a associação atual...
+            await self.get_db().update(table='productmanufacturer',
+                                       pk={'product_id': self.get_product_id()},
+                                       fields={'active': cts._NO})
+            if self.get_db().get_error():
+                self.set_error(self.get_db().get_error_message(), (404 if self.get_db().key_not_found() else 400))
+            else:
+                # Por fim, reativa ou insere a nova associação...
+                await insert_or_reactivate_async(self.get_db(), self.get_product_id(), self.get_manufacturer_id())
+                if self.get_db().get_error():
+                    self.set_error(self.get_db().get_error_message())
+                else:
+                    # Reserva a chave primária...
+                    self.set_primary_key({'product_id': self.get_product_id(), 'manufacturer_id': self.get_manufacturer_id()})
+                    # Invalida o ETag do produto após o commit...
+                    product_id = self.get_product_id()
+                    self.get_db().add_commit_hook(lambda: prod.get_product_etag_cache().delete(product_id))
+                    notify.publish(self.get_db(), 'productmanufacturer', product_id, 'update')
+        #
+        return not self.get_error()
+
+class AsyncDeleteProductManufacturer(manu.DeleteProductManufacturer):
+    """ Classe para exclusão(DELETE) assíncrona da associação produto e fabricante. """
+
+    async def execute(self):
+        """
+        Exclusão da associação produto e fabricante.
+        OBS: A associação não é excluída, somente desativada.
+        """
+        if cls.DeleteDetailRecord.execute(self):
+            await self.get_db().update(table='productmanufacturer',
+                                       pk={'product_id': self.get_product_id(), 'active': cts._YES},
+                                       fields={'active': cts._NO})
+            if self.get_db().get_error():
+                self.set_error(self.get_db().get_error_message(), (404 if self.get_db().key_not_found() else 400))
+            else:
+                # Reserva a chave primária(Parcial/Master)...
+                self.set_primary_key({'product_id': self.get_product_id()})
+        #
+        return not self.get_error()
+
+#--------------------------------------------------------------------------------------------------
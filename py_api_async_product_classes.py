@@ -0,0 +1,80 @@
+#--------------------------------------------------------------------
+# Versões assíncronas(asyncio) dos CRUDs de produtos.
+# As regras continuam nas classes síncronas: aqui somente as idas
+# ao banco são aguardadas(await). As checagens dos requests de
+# produto não acessam o banco e são as próprias classes síncronas.
+#--------------------------------------------------------------------
+
+import py_api_classes as cls
+import py_api_product_classes as prod
+
+class AsyncInsertProduct(prod.InsertProduct):
+    """ Classe para inserção(PUT) assíncrona de produtos no banco. """
+
+    async def execute(self):
+        if cls.InsertMasterRecord.execute(self):
+            # Tenta incluir(Com retorno do novo ID no sufix.)...
+            await self.get_db().insert(table='product', fields=self.get_field_values(), sufix='RETURNING id;')
+            self.set_result()
+        #
+        return not self.get_error()
+
+class AsyncInsertProducts(prod.InsertProducts):
+    """ Classe para inserção(PUT) assíncrona de vários produtos no banco, em lotes. """
+
+    async def execute(self):
+        if cls.InsertMasterRecord.execute(self):
+            await self.get_db().insert_many(table='product', rows=self.get_rows(), returning='id')
+            self.set_result()
+        #
+        return not self.get_error()
+
+class AsyncUpdateProduct(prod.UpdateProduct):
+    """ Classe para atualização(POST) assíncrona de produtos no banco. """
+
+    async def execute(self):
+        if cls.UpdateMasterRecord.execute(self):
+            # Tenta atualizar...
+            await self.get_db().update(table='product', pk=self.get_pk(), fields=self.get_field_values())
+            self.set_result()
+        #
+        return not self.get_error()
+
+class AsyncDeleteProduct(prod.DeleteProduct):
+    """
+    Classe para exclusão(DELETE) assíncrona de produtos no banco.
+    OBS: O produto não é excluído, somente marcado como desativado.
+    """
+
+    async def execute(self):
+        await self.get_db().update(table='product', pk=self.get_pk(), fields=self.get_field_values())
+        return self.set_result()
+
+class AsyncGetProduct(prod.GetProduct):
+    """ Classe para consultas(GET) assíncronas de produtos no banco. """
+
+    async def execute(self):
+        if self.check_not_modified():
+            return True
+        sql, parameters = self.get_query()
+        await self.get_db().query(sql=sql, pars=parameters, commit=True, compact=True)
+        return self.set_result()
+
+class AsyncExportProducts(prod.ExportProducts):
+    """ Classe para a exportação(GET com "export") assíncrona dos produtos em NDJSON. """
+
+    async def stream(self):
+        """ Async generator dos chunks(bytes) de linhas NDJSON. Consulta o banco somente quando iterado. """
+        sql, parameters = self.get_query()
+        chunk = bytearray()
+        async for row in self.get_db().stream(sql=sql, pars=parameters, compact=True):
+            if self.add_line(chunk, row):
+                yield bytes(chunk)
+                chunk.clear()
+        if self.get_db().get_error():
+            self.set_error(self.get_db().get_error_message())
+            chunk += self.get_error_line()
+        if chunk:
+            yield bytes(chunk)
+
+#--------------------------------------------------------------------------------------
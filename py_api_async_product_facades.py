@@ -0,0 +1,373 @@
+#--------------------------------------------------------------------
+# Facades assíncronas(asyncio) para execução dos CRUDs com produtos.
+# Mesmo fluxo das facades síncronas(py_api_product_facades), com as
+# idas ao banco aguardadas(await): enquanto uma query está em curso
+# o event loop atende as demais requisições.
+#--------------------------------------------------------------------
+
+import py_api_classes as cls
+import py_api_product_facades as facade
+import py_api_product_classes as prod
+import py_api_async_product_classes as aprod
+import py_api_async_manufacturer_classes as amanu
+
+class AsyncCRUDFacade(facade.CRUDFacade):
+
+    async def finish_transaction(self):
+        """ Commit(sucesso) ou rollback(falha) da transação em curso(versão assíncrona de CRUDFacade.finish_transaction). """
+        if self.get_db().in_transaction():
+            # Tenta commit...
+            if self.get_status_code() == 200:
+                if not await self.get_db().commit():
+                    self.set_status_code(self.get_db().get_error_code())
+                    self.set_body(self.get_db().get_error_message(), True)
+            #
+            # Rollback...
+            if self.get_status_code() != 200:
+                await self.get_db().rollback()
+
+    async def execute(self):
+        """ Executa o CRUD. """
+        pass
+
+
+class AsyncPUTProductFacade(AsyncCRUDFacade, facade.PUTProductFacade):
+    """ Executa os requests de PUT de produto(assíncrono). """
+
+    async def execute(self):
+        """
+        Executa o PUT.
+        Inicializa as propriedades __status_code e __body.
+        Retorna:
+           bool True/False quanto ao sucesso na execução.
+        """
+        # Request decodificado/validado uma única vez para as checagens de produto e fabricante...
+        request_context = cls.RequestContext(body=self.get_body())
+        if 'products' in request_context.get_request():
+            # Inclusão em lote...
+            return await self.execute_bulk(request_context)
+        #
+        # Inicia o controle de transações...
+        if await self.get_db().start_transaction():
+            # Checagem da estrutura do request...
+            check_put_request = prod.CheckProductPUTRequest(body=request_context, db=self.get_db())
+            if check_put_request.execute():
+                # Inclusão...
+                insert_product = aprod.AsyncInsertProduct(  schema=check_put_request.get_schema(),
+                                                            request=check_put_request.get_request(),
+                                                            db=self.get_db()
+                                                         )
+                if await insert_product.execute():
+                    # Tratamento do fabricante do produto...
+                    check_manufacturer_put_request = amanu.AsyncCheckManufacturerPUTRequest(body=request_context, db=self.get_db())
+                    if await check_manufacturer_put_request.execute():
+                        if check_manufacturer_put_request.get_insert_manufacturer():
+                            # Inclusão do fabricante...
+                            insert_manufacturer = amanu.AsyncInsertManufacturer(  manufacturer_name=check_manufacturer_put_request.get_manufacturer_name(),
+                                                                                  db=self.get_db()
+                                                                               )
+                            if await insert_manufacturer.execute():
+                                # Reserva a PK do fabricante incluído...
+                                check_manufacturer_put_request.set_manufacturer_id(insert_manufacturer.get_primary_key()['id'])
+                                check_manufacturer_put_request.set_manufacturer_name(insert_manufacturer.get_registered_name())
+                                # Inclusão do fabricante para o produto...
+                                insert_product_manufacturer = amanu.AsyncInsertProductManufacturer(  product_id=insert_product.get_primary_key()['id'],
+                                                                                                     manufacturer_id=check_manufacturer_put_request.get_manufacturer_id(),
+                                                                                                     db=self.get_db()
+                                                                                                  )
+                                if not await insert_product_manufacturer.execute():
+                                    self.set_status_code(insert_product_manufacturer.get_error_code())
+                                    self.set_body(insert_product_manufacturer.get_error_message(), True)
+                            else:
+                                self.set_status_code(400)
+                                self.set_body(insert_manufacturer.get_error_message(), True)
+                        elif check_manufacturer_put_request.get_update_manufacturer():
+                            # Atualiza o fabricante do produto...
+                            update_manufacturer = amanu.AsyncUpdateManufacturer(  manufacturer_id=check_manufacturer_put_request.get_manufacturer_id(),
+                                                                                  manufacturer_name=check_manufacturer_put_request.get_manufacturer_name(),
+                                                                                  db=self.get_db()
+                                                                               )
+                            if not await update_manufacturer.execute():
+                                self.set_status_code(update_manufacturer.get_error_code())
+                                self.set_body(update_manufacturer.get_error_message(), True)
+                    else:
+                        self.set_status_code(400)
+                        self.set_body(check_manufacturer_put_request.get_error_message(), True)
+
+                    # Response...
+                    if self.get_status_code() == 200:
+                        body = check_put_request.get_request()
+                        body['id'] = insert_product.get_primary_key()['id']
+                        body['manufacturer']['id'] = check_manufacturer_put_request.get_manufacturer_id()
+                        body['manufacturer']['name'] = check_manufacturer_put_request.get_manufacturer_name()
+                        self.set_body(body) # Atualiza
+
+                else:
+                    self.set_status_code(insert_product.get_error_code())
+                    self.set_body(insert_product.get_error_message(), True)
+
+            else:
+                self.set_status_code(check_put_request.get_error_code())
+                self.set_body(check_put_request.get_error_message(), True)
+
+            # Commit & Rollback...
+            await self.finish_transaction()
+
+        else:
+            self.set_status_code(self.get_db().get_error_code())
+            self.set_body(self.get_db().get_error_message(), True)
+        #
+        return self.get_status_code() == 200
+
+    async def execute_bulk(self, request_context:cls.RequestContext):
+        """
+        Executa o PUT em lote, com as mesmas regras do PUTProductFacade.execute_bulk().
+        Retorna:
+           bool True/False quanto ao sucesso na execução.
+        """
+        items_failed = False
+        # Inicia o controle de transações...
+        if await self.get_db().start_transaction():
+            # Checagem da estrutura do request e de cada produto...
+            check_bulk_put_request = prod.CheckProductBulkPUTRequest(body=request_context, db=self.get_db())
+            if check_bulk_put_request.execute():
+                if not self.get_bulk_failed(check_bulk_put_request):
+                    # Fabricantes de todos os produtos...
+                    resolve_manufacturers = amanu.AsyncResolveManufacturers(  manufacturers=[i['request']['manufacturer'] for i in check_bulk_put_request.get_valid_items()],
+                                                                              db=self.get_db()
+                                                                           )
+                    if await resolve_manufacturers.execute():
+                        self.set_bulk_manufacturers(check_bulk_put_request, resolve_manufacturers)
+                        items = check_bulk_put_request.get_valid_items()
+                        if items and not self.get_bulk_failed(check_bulk_put_request):
+                            # Inclusão dos produtos...
+                            insert_products = aprod.AsyncInsertProducts(  schema=check_bulk_put_request.get_item_schema(),
+                                                                          request={'products': [i['request'] for i in items]},
+                                                                          db=self.get_db()
+                                                                       )
+                            if await insert_products.execute():
+                                # Inclusão dos fabricantes para os produtos...
+                                insert_product_manufacturers = amanu.AsyncInsertProductManufacturers(  associations=self.get_bulk_associations(items, insert_products),
+                                                                                                       db=self.get_db()
+                                                                                                    )
+                                if not await insert_product_manufacturers.execute():
+                                    self.set_status_code(insert_product_manufacturers.get_error_code())
+                                    self.set_body(insert_product_manufacturers.get_error_message(), True)
+                            else:
+                                self.set_status_code(insert_products.get_error_code())
+                                self.set_body(insert_products.get_error_message(), True)
+                    else:
+                        self.set_status_code(resolve_manufacturers.get_error_code())
+                        self.set_body(resolve_manufacturers.get_error_message(), True)
+                #
+                if self.get_status_code() == 200 and self.get_bulk_failed(check_bulk_put_request):
+                    # Inclusão atômica com produtos inválidos - Nenhum é incluído...
+                    self.set_status_code(400)
+                    items_failed = True
+            else:
+                self.set_status_code(check_bulk_put_request.get_error_code())
+                self.set_body(check_bulk_put_request.get_error_message(), True)
+
+            # Commit & Rollback...
+            await self.finish_transaction()
+            #
+            if self.get_status_code() == 200 or items_failed:
+                # Resultado de cada produto(sucesso ou falha atômica pelos produtos inválidos)...
+                self.set_bulk_result(check_bulk_put_request)
+
+        else:
+            self.set_status_code(self.get_db().get_error_code())
+            self.set_body(self.get_db().get_error_message(), True)
+        #
+        return self.get_status_code() == 200
+
+
+class AsyncPOSTProductFacade(AsyncCRUDFacade):
+    """ Executa os requests de POST de produto(assíncrono). """
+
+    async def execute(self):
+        """
+        Executa o POST.
+        Inicializa as propriedade __status_code e __body.
+        Retorna:
+           bool True/False quanto ao sucesso na execução.
+        """
+        # Inicia o controle de transações...
+        if await self.get_db().start_transaction():
+            # Checagem da estrutura do request...
+            # Request decodificado/validado uma única vez para as checagens de produto e fabricante...
+            request_context = cls.RequestContext(body=self.get_body())
+            check_post_request = prod.CheckProductPOSTRequest(body=request_context, db=self.get_db())
+            if check_post_request.execute():
+                # Alteração...
+                update_product = aprod.AsyncUpdateProduct(  schema=check_post_request.get_schema(),
+                                                            request=check_post_request.get_request(),
+                                                            db=self.get_db()
+                                                         )
+                if await update_product.execute():
+                    # Tratamento do fabricante do produto...
+                    check_manufacturer_post_request = amanu.AsyncCheckManufacturerPOSTRequest(body=request_context, db=self.get_db())
+                    if await check_manufacturer_post_request.execute():
+                        if check_manufacturer_post_request.get_insert_manufacturer():
+                            # Inclusão do fabricante...
+                            insert_manufacturer = amanu.AsyncInsertManufacturer(  manufacturer_name=check_manufacturer_post_request.get_manufacturer_name(),
+                                                                                  db=self.get_db()
+                                                                               )
+                            if await insert_manufacturer.execute():
+                                # Reserva a PK do fabricante incluído...
+                                check_manufacturer_post_request.set_manufacturer_id(insert_manufacturer.get_primary_key()['id'])
+                                check_manufacturer_post_request.set_manufacturer_name(insert_manufacturer.get_registered_name())
+                                # Inclusão do fabricante para o produto...
+                                insert_product_manufacturer = amanu.AsyncInsertProductManufacturer(  product_id=update_product.get_primary_key()['id'],
+                                                                                                     manufacturer_id=check_manufacturer_post_request.get_manufacturer_id(),
+                                                                                                     db=self.get_db()
+                                                                                                  )
+                                if not await insert_product_manufacturer.execute():
+                                    self.set_status_code(insert_product_manufacturer.get_error_code())
+                                    self.set_body(insert_product_manufacturer.get_error_message(), True)
+                            else:
+                                 self.set_status_code(insert_manufacturer.get_error_code())
+                                 self.set_body(insert_manufacturer.get_error_message(), True)
+                        elif check_manufacturer_post_request.get_update_manufacturer():
+                            # Atualiza o fabricante do produto...
+                            update_manufacturer = amanu.AsyncUpdateManufacturer(  manufacturer_id=check_manufacturer_post_request.get_manufacturer_id(),
+                                                                                  manufacturer_name=check_manufacturer_post_request.get_manufacturer_name(),
+                                                                                  db=self.get_db()
+                                                                               )
+                            if not await update_manufacturer.execute():
+                                self.set_status_code(update_manufacturer.get_error_code())
+                                self.set_body(update_manufacturer.get_error_message(), True)
+                        #
+                        if self.get_status_code() == 200:
+                            if check_manufacturer_post_request.get_update_product():
+                                # Troca de fabricante do produto...
+                                update_product_manufacturer = amanu.AsyncUpdateProductManufacturer(  product_id=update_product.get_primary_key()['id'],
+                                                                                                     manufacturer_id=check_manufacturer_post_request.get_manufacturer_id(),
+                                                                                                     db=self.get_db()
+                                                                                                  )
+                                if not await update_product_manufacturer.execute():
+                                    self.set_status_code(update_product_manufacturer.get_error_code())
+                                    self.set_body(update_product_manufacturer.get_error_message(), True)
+
+                    else:
+                        self.set_status_code(400)
+                        self.set_body(check_manufacturer_post_request.get_error_message(), True)
+
+                    # Response...
+                    if self.get_status_code() == 200:
+                        body = check_post_request.get_request()
+                        body['id'] = update_product.get_primary_key()['id']
+                        body['manufacturer']['id'] = check_manufacturer_post_request.get_manufacturer_id()
+                        body['manufacturer']['name'] = check_manufacturer_post_request.get_manufacturer_name()
+                        self.set_body(body) # Atualiza
+
+                else:
+                    self.set_status_code(update_product.get_error_code())
+                    self.set_body(update_product.get_error_message(), True)
+
+            else:
+                self.set_status_code(check_post_request.get_error_code())
+                self.set_body(check_post_request.get_error_message(), True)
+
+            # Commit & Rollback...
+            await self.finish_transaction()
+
+        else:
+            self.set_status_code(self.get_db().get_error_code())
+            self.set_body(self.get_db().get_error_message(), True)
+        #
+        return self.get_status_code() == 200
+
+
+class AsyncGETProductFacade(AsyncCRUDFacade, facade.GETProductFacade):
+    """ Executa os requests de GET de produtos(assíncrono). """
+
+    async def execute(self):
+        """
+        Executa o GET.
+        Inicializa as propriedade __status_code e __body.
+        Retorna:
+           bool True/False quanto ao sucesso na execução(200 ou 304).
+        """
+        # Checagem da estrutura do request...
+        check_get_request = prod.CheckProductGETRequest(body=self.get_body(), db=self.get_db())
+        if check_get_request.execute() and 'export' in check_get_request.get_request():
+            # Exportação...
+            export_products = aprod.AsyncExportProducts(  schema=check_get_request.get_schema(),
+                                                          request=check_get_request.get_request(),
+                                                          db=self.get_db()
+                                                       )
+            if export_products.execute():
+                self.set_export(export_products)
+            else:
+                self.set_status_code(export_products.get_error_code())
+                self.set_body(export_products.get_error_message(), True)
+        elif not check_get_request.get_error():
+            # Consulta...
+            get_product = aprod.AsyncGetProduct(  schema=check_get_request.get_schema(),
+                                                  request=check_get_request.get_request(),
+                                                  db=self.get_db(),
+                                                  if_none_match=self.get_if_none_match()
+                                               )
+            if await get_product.execute():
+                self.set_result(get_product)
+            else:
+                self.set_status_code(get_product.get_error_code())
+                self.set_body(get_product.get_error_message(), True)
+
+        else:
+            self.set_status_code(check_get_request.get_error_code())
+            self.set_body(check_get_request.get_error_message(), True)
+        #
+        return self.get_status_code() in (200, 304)
+
+
+class AsyncDELETEProductFacade(AsyncCRUDFacade):
+    """ Executa os requests de DELETE de produto(assíncrono). """
+
+    async def execute(self):
+        """
+        Executa o DELETE.
+        Inicializa as propriedade __status_code e __body.
+        Retorna:
+           bool True/False quanto ao sucesso na execução.
+        """
+        # Inicia o controle de transações...
+        if await self.get_db().start_transaction():
+            # Checagem da estrutura do request...
+            check_del_request = prod.CheckProductDELETERequest(body=self.get_body(), db=self.get_db())
+            if check_del_request.execute():
+                # Exclusão...
+                delete_product = aprod.AsyncDeleteProduct(  schema=check_del_request.get_schema(),
+                                                            request=check_del_request.get_request(),
+                                                            db=self.get_db()
+                                                         )
+                if await delete_product.execute():
+                    # Tratamento da exclusão(desativação) da associação produto e fabricante...
+                    delete_product_manufacturer = amanu.AsyncDeleteProductManufacturer(  product_id=delete_product.get_primary_key()['id'],
+                                                                                         db=self.get_db()
+                                                                                      )
+                    if not await delete_product_manufacturer.execute():
+                        self.set_status_code(delete_product_manufacturer.get_error_code())
+                        self.set_body(delete_product_manufacturer.get_error_message(), True)
+                    else:
+                        body = check_del_request.get_request()
+                        body['id'] = delete_product.get_primary_key()['id']
+                        self.set_body(body) # Atualiza
+                else:
+                    self.set_status_code(delete_product.get_error_code())
+                    self.set_body(delete_product.get_error_message(), True)
+
+            else:
+                self.set_status_code(check_del_request.get_error_code())
+                self.set_body(check_del_request.get_error_message(), True)
+
+            # Commit & Rollback...
+            await self.finish_transaction()
+
+        else:
+            self.set_status_code(self.get_db().get_error_code())
+            self.set_body(self.get_db().get_error_message(), True)
+        #
+        return self.get_status_code() == 200
+# ---------------------------------------------------------------------------------------
@@ -0,0 +1,214 @@
+#--------------------------------------------------------------------
+# Caches em memória do processo(LRU + TTL) para os cadastros que
+# quase não mudam(Ex: fabricantes). Atualizados pelos CRUDs após o
+# commit(write-through) e com contadores de hits/misses/evictions,
+# publicados periodicamente no log "pyapi.cache" e nos hooks.
+#--------------------------------------------------------------------
+
+import time
+import logging
+import threading
+
+import py_api_consts as cts
+
+from collections import OrderedDict
+
+# Logger dos contadores dos caches...
+logger = logging.getLogger('pyapi.cache')
+
+class LRUTTLCache:
+    """
+    Cache chave -> valor thread-safe, limitado a "max_size" entradas(descarta a usada
+    há mais tempo) e com validade de "ttl" segundos por entrada(0 = sem validade).
+    """
+
+    # Retorno de get() para chave ausente/vencida(o valor cacheado pode ser None)...
+    MISSING = object()
+
+    def __init__(self, name:str, max_size:int, ttl:float, enabled:bool=True):
+        self.__name = name
+        self.__max_size = max(1, int(max_size))
+        self.__ttl = float(ttl)
+        self.__enabled = enabled
+        self.__lock = threading.Lock()
+        self.__entries = OrderedDict()  # chave -> (valor, vencimento)
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__expirations = 0
+        self.__invalidations = 0
+        self.__discards = 0
+        # Gerações das chaves(em faixas pelo hash, com memória fixa) e do cache todo: incrementadas
+        # por delete()/clear(), permitem descartar no set() um valor lido antes da invalidação...
+        self.__generations = [0] * cts._CACHE_GENERATION_SLOTS
+        self.__epoch = 0
+
+    def get_name(self) -> str:
+        return self.__name
+
+    def get_enabled(self) -> bool:
+        return self.__enabled
+
+    def set_enabled(self, value:bool):
+        self.__enabled = bool(value)
+        if not self.__enabled:
+            self.clear()
+
+    def get(self, key):
+        """ Retorna o valor da chave ou LRUTTLCache.MISSING(ausente, vencida ou cache desligado). """
+        if not self.__enabled:
+            return self.MISSING
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                self.__misses += 1
+                return self.MISSING
+            if entry[1] and entry[1] <= time.monotonic():
+                # Vencida...
+                del self.__entries[key]
+                self.__expirations += 1
+                self.__misses += 1
+                return self.MISSING
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return entry[0]
+
+    def get_generation(self, key) -> tuple:
+        """
+        Geração atual da chave. Leia antes de consultar a origem do valor e informe-a no set():
+        uma invalidação(delete/clear) no meio do caminho descarta o valor já desatualizado.
+        """
+        return (self.__epoch, self.__generations[hash(key) % len(self.__generations)])
+
+    def set(self, key, value, generation:tuple=None) -> bool:
+        """ Inclui/substitui o valor da chave. Com "generation", somente se a chave não foi invalidada desde então. """
+        if not self.__enabled:
+            return False
+        expires = (time.monotonic() + self.__ttl) if self.__ttl > 0 else 0
+        with self.__lock:
+            if generation is not None and generation != self.get_generation(key):
+                self.__discards += 1
+                return False
+            self.__entries[key] = (value, expires)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_size:
+                self.__entries.popitem(last=False)
+                self.__evictions += 1
+        return True
+
+    def delete(self, key):
+        with self.__lock:
+            self.__generations[hash(key) % len(self.__generations)] += 1
+            if self.__entries.pop(key, None) is not None:
+                self.__invalidations += 1
+
+    def clear(self):
+        with self.__lock:
+            self.__epoch += 1
+            self.__invalidations += len(self.__entries)
+            self.__entries.clear()
+
+    def get_stats(self) -> dict:
+        """ Contadores do cache(desde a carga do processo ou o último reset_stats()). """
+        with self.__lock:
+            lookups = self.__hits + self.__misses
+            return {
+                'name': self.__name,
+                'enabled': self.__enabled,
+                'size': len(self.__entries),
+                'maxSize': self.__max_size,
+                'ttl': self.__ttl,
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'hitRate': self.__hits / lookups if lookups else 0.0,
+                'evictions': self.__evictions,
+                'expirations': self.__expirations,
+                'invalidations': self.__invalidations,
+                'discards': self.__discards
+            }
+
+    def reset_stats(self):
+        with self.__lock:
+            self.__hits = self.__misses = self.__evictions = self.__expirations = self.__invalidations = self.__discards = 0
+
+
+# Caches do processo por nome...
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+def get_cache(name:str, max_size:int, ttl:float, enabled:bool=True) -> LRUTTLCache:
+    """ Retorna o cache do processo com o nome informado, criando-o no primeiro uso. """
+    with _CACHES_LOCK:
+        cache = _CACHES.get(name)
+        if cache is None:
+            cache = LRUTTLCache(name=name, max_size=max_size, ttl=ttl, enabled=enabled)
+            _CACHES[name] = cache
+        return cache
+
+def get_caches() -> dict:
+    """ Caches do processo(nome -> LRUTTLCache). """
+    with _CACHES_LOCK:
+        return dict(_CACHES)
+
+def get_stats() -> list:
+    """ Contadores de todos os caches do processo. """
+    return [cache.get_stats() for cache in get_caches().values()]
+
+# Publicação periódica dos contadores(sem thread: conferida a cada requisição)...
+_REPORT = {'interval': cts._CACHE_STATS_INTERVAL, 'next': 0.0, 'hooks': []}
+_REPORT_LOCK = threading.Lock()
+
+def configure_report(interval:float=None) -> dict:
+    """ Define o intervalo(segundos) da publicação dos contadores(0 = sem publicação). """
+    if interval is not None:
+        with _REPORT_LOCK:
+            _REPORT['interval'] = float(interval)
+            _REPORT['next'] = 0.0
+    return dict(_REPORT)
+
+def add_stats_hook(hook):
+    """
+    Registra uma função chamada a cada publicação com a lista dos contadores dos caches
+    (get_stats()), para repassá-los a outros sistemas. Exceptions do hook são logadas e ignoradas.
+    """
+    with _REPORT_LOCK:
+        _REPORT['hooks'] = _REPORT['hooks'] + [hook]
+
+def remove_stats_hook(hook):
+    with _REPORT_LOCK:
+        _REPORT['hooks'] = [h for h in _REPORT['hooks'] if h is not hook]
+
+def report_stats() -> list:
+    """ Publica os contadores de todos os caches no log "pyapi.cache" e nos hooks. Retorna os contadores. """
+    stats = get_stats()
+    for s in stats:
+        logger.info('Cache "%s": %s/%s entradas, hits %s, misses %s(%.1f%% hits), evictions %s, expirations %s, invalidations %s, discards %s',
+                    s['name'], s['size'], s['maxSize'], s['hits'], s['misses'], s['hitRate'] * 100.0,
+                    s['evictions'], s['expirations'], s['invalidations'], s['discards'])
+    for hook in _REPORT['hooks']:
+        try:
+            hook(stats)
+        except Exception:
+            logger.exception('Falha no hook dos contadores dos caches.')
+    return stats
+
+def maybe_report_stats() -> bool:
+    """
+    Publica os contadores quando o intervalo venceu desde a última publicação(a primeira chamada
+    só inicia a contagem). Chamada a cada requisição: fora do intervalo, o custo é de uma comparação.
+    Retorna bool True se os contadores foram publicados nessa chamada.
+    """
+    if _REPORT['interval'] <= 0:
+        return False
+    now = time.monotonic()
+    if now < _REPORT['next']:
+        return False
+    with _REPORT_LOCK:
+        if now < _REPORT['next']:
+            return False
+        first = (_REPORT['next'] == 0.0)
+        _REPORT['next'] = now + _REPORT['interval']
+    if first:
+        return False
+    report_stats()
+    return True
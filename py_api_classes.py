@@ -2,9 +2,16 @@
 # Biblioteca de classes base para a API.
 #--------------------------------------------------------------------
 
+import io
+import os
+import re
 import abc
 import json
+import base64
+import time
 import psycopg2
+import threading
+import collections
 import jsonschema
 import psycopg2.extras
 
@@ -14,6 +21,13 @@ from typing import AbstractSet, Union
 
 import py_api_consts as cts
 import py_api_functions as fns
+import py_api_instrumentation as ins
+
+try:
+    import fastjsonschema
+except ImportError:
+    # Dependência opcional(validadores gerados em código para os schemas)...
+    fastjsonschema = None
 
 class ErrorHandlerClass:
     """ Classe base para outras que precisam gerenciar/registrar erros/falhas. """
@@ -50,6 +64,74 @@ class ErrorHandlerClass:
 class DatabaseInterface(ErrorHandlerClass):    
     """ Interface para wrapper de banco de dados. """
     
+    def __init__(self):
+        super().__init__()
+        #
+        self.__query_source = ''
+        self.__commit_hooks = []
+        self.__notify = cts._PG_NOTIFY
+        self.__notifications = []
+    
+    def add_commit_hook(self, hook):
+        """ 
+        Registra uma função(sem parâmetros) executada após o commit da transação em curso
+        e descartada no rollback. Fora de transação(comando já efetivado) é executada na hora.
+        """
+        if self.in_transaction():
+            self.__commit_hooks.append(hook)
+        else:
+            hook()
+    
+    def run_commit_hooks(self):
+        """ Executa(e descarta) as funções registradas para após o commit. """
+        hooks, self.__commit_hooks = self.__commit_hooks, []
+        for hook in hooks:
+            hook()
+    
+    def discard_commit_hooks(self):
+        self.__commit_hooks = []
+        self.__notifications = []
+    
+    def set_notify(self, value:bool):
+        """ Liga/desliga a publicação das notificações(NOTIFY) das alterações nos commits. """
+        self.__notify = bool(value)
+    
+    def get_notify(self) -> bool:
+        return self.__notify
+    
+    def add_notification(self, channel:str, payload:str):
+        """ 
+        Registra uma notificação(NOTIFY) enviada junto com o commit da transação em curso, numa 
+        única ida ao banco para todas. Descartada no rollback, fora de transação ou com o NOTIFY desligado.
+        """
+        if self.__notify and self.in_transaction() and (channel, payload) not in self.__notifications:
+            self.__notifications.append((channel, payload))
+    
+    def pop_notifications(self) -> list:
+        """ Retorna(e descarta) as notificações registradas para o commit: [(channel, payload),...]. """
+        notifications, self.__notifications = self.__notifications, []
+        return notifications
+    
+    def set_query_source(self, value:str):
+        """ Identifica a origem(facade) das próximas queries, para a instrumentação. """
+        self.__query_source = value
+    
+    def get_query_source(self) -> str:
+        return self.__query_source
+    
+    def record_query(self, stats, sql:str, pars, start:float, rows:int, error:bool=False):
+        """ 
+        Registra na instrumentação um comando executado fora do query()(streaming, inclusão em lote, COPY).
+        "stats" é o ins._QUERY_STATS quando ligado ou None(instrumentação desligada: sem custo).
+        """
+        if stats is not None:
+            stats.record(sql=sql, pars=pars, duration=time.perf_counter() - start, rows=rows,
+                         source=self.__query_source, error=error)
+    
+    def reads_from_replica(self) -> bool:
+        """ As consultas fora de transação leem de uma réplica(possivelmente atrasada)? """
+        return False
+    
     @abstractmethod
     def readable_exception(self, exception_err):
         """
@@ -71,7 +153,7 @@ class DatabaseInterface(ErrorHandlerClass):
         pass
     
     @abstractmethod
-    def close_connection(self, pars: dict) -> bool:
+    def close_connection(self, pars: dict = None) -> bool:
         pass
     
     @abstractmethod
@@ -95,7 +177,15 @@ class DatabaseInterface(ErrorHandlerClass):
         pass        
     
     @abstractmethod
-    def query(self, sql:str, pars:Union[dict,list], commit:False):
+    def query(self, sql:str, pars:Union[dict,list], commit:False, compact:bool=False):
+        pass
+    
+    @abstractmethod
+    def stream(self, sql:str, pars:Union[dict,list], itersize:int=cts._PG_STREAM_ITERSIZE, compact:bool=False):
+        """
+        Executa uma consulta em modo streaming: um generator que entrega as rows
+        aos poucos(lotes de "itersize"), sem carregar todo o resultado em memória.
+        """
         pass
     
     @abstractmethod
@@ -117,6 +207,21 @@ class DatabaseInterface(ErrorHandlerClass):
         """     
         pass
     
+    @abstractmethod
+    def insert_many(self, table:str, rows:list, returning:str='', sufix:str=''):
+        """
+        Executa a inclusão de vários registros em uma tabela, em lotes. 
+        Parâmetros:
+           str table: Nome da tabela para incluir os registros
+           list rows: Uma lista de dicts, todos com os mesmos campos, no formato [{nome_campo: value,...},...]
+           str returning: Nome da coluna, opcional, cujos valores gerados serão retornados
+           str sufix: SQL command, opcional, que será adicionado no final de cada lote(Ex: ON CONFLICT...)
+        Retorna:
+           Inicializa a propriedade "__rows" com os valores da coluna em "returning",
+           na mesma ordem das rows informadas.
+        """     
+        pass
+    
     @abstractmethod
     def update(self, table:str, pk:dict, fields:dict):
         """
@@ -154,16 +259,606 @@ class DatabaseInterface(ErrorHandlerClass):
     @abstractmethod
     def get_rows(self) -> list:
         pass
- 
-   
-class DBPostgres(DatabaseInterface):
     
-    def __init__(self) -> None:
+    @abstractmethod
+    def get_columns(self) -> dict:
+        """ 
+        Retorna o mapa {nome_coluna: índice} do resultado da última query em modo
+        compacto(rows como tuplas), para a projeção direta das rows: row[cols['id']]
+        """
+        pass
+    
+    @abstractmethod
+    def get_row_count(self) -> int:
+        """ Retorna o total de rows afetadas/retornadas pela última query executada. """
+        pass
+
+#---------------------------------------------------------------------------------
+
+
+def pg_dsn(conn_pars:dict) -> str:
+    """ Monta a string de conexão(DSN) PostgreSQL pelos parâmetros de conexão. """
+    return "dbname='{}' user='{}' password='{}' host='{}' port='{}'".format(conn_pars['name'],
+                                                                         conn_pars['user'],
+                                                                         conn_pars['pwd'],
+                                                                         conn_pars['host'],
+                                                                         conn_pars['port'])
+
+class PGStatementCache:
+    """
+    LRU dos prepared statements(server-side) de uma conexão, indexado pelo texto
+    do SQL, com contadores de acertos(hits), faltas(misses) e descartes(evictions).
+    """
+
+    def __init__(self, max_size:int):
+        self.__max_size = max(1, max_size)
+        self.__statements = collections.OrderedDict()  # sql -> (nome, parâmetros, EXECUTE)
+        self.__unpreparable = set()
+        self.__sequence = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    def get(self, sql:str):
+        """ Retorna o statement preparado para o SQL(ou None), marcando-o como o mais recente. """
+        entry = self.__statements.get(sql)
+        if entry is None:
+            self.__misses += 1
+        else:
+            self.__hits += 1
+            self.__statements.move_to_end(sql)
+        return entry
+
+    def add(self, sql:str, parameters:list) -> tuple:
+        """
+        Registra um novo statement para o SQL.
+        Retorna uma tupla (entry, nome do statement descartado pelo LRU ou None).
+        """
+        self.__sequence += 1
+        name = 'pyapi_ps' + str(self.__sequence)
+        execute = 'EXECUTE ' + name + ((' (' + ','.join(['%s'] * len(parameters)) + ')') if parameters else '')
+        entry = (name, parameters, execute)
+        self.__statements[sql] = entry
+        evicted = None
+        if len(self.__statements) > self.__max_size:
+            evicted = self.__statements.popitem(last=False)[1][0]
+            self.__evictions += 1
+        return entry, evicted
+
+    def set_unpreparable(self, sql:str):
+        """ Marca um SQL cujo PREPARE falhou, para que seja sempre executado sem preparo. """
+        self.__statements.pop(sql, None)
+        self.__unpreparable.add(sql)
+
+    def is_unpreparable(self, sql:str) -> bool:
+        return sql in self.__unpreparable
+
+    def get_stats(self) -> dict:
+        return {
+            'size': len(self.__statements),
+            'max_size': self.__max_size,
+            'hits': self.__hits,
+            'misses': self.__misses,
+            'evictions': self.__evictions
+        }
+
+
+class PGConnection(psycopg2.extensions.connection):
+    """ Conexão psycopg2 que carrega o cache de prepared statements da sessão. """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statement_cache = None
+
+
+# Parâmetros nomeados(pyformat) do psycopg2: %(nome)s...
+_PG_NAMED_PARAMETER = re.compile(r'%\(([^)]+)\)s|%%|%s')
+
+def pg_prepare_sql(sql:str):
+    """
+    Converte um SQL com parâmetros nomeados(%(nome)s) para a sintaxe do PREPARE($1, $2...).
+    Retorna uma tupla (sql convertido, lista dos nomes na ordem dos $n) ou None quando
+    o SQL usa parâmetros posicionais(%s).
+    """
+    parameters = []
+    positional = []
+
+    def replace(match):
+        if match.group(0) == '%%':
+            return '%'
+        if match.group(0) == '%s':
+            positional.append(True)
+            return '%s'
+        name = match.group(1)
+        if name not in parameters:
+            parameters.append(name)
+        return '$' + str(parameters.index(name) + 1)
+
+    converted = _PG_NAMED_PARAMETER.sub(replace, sql).strip()
+    if positional:
+        return None
+    if converted.endswith(';'):
+        converted = converted[:-1]
+    return converted, parameters
+
+class SQLTemplateCache:
+    """
+    Cache(LRU, tamanho limitado, thread-safe) dos SQLs gerados para insert/update/delete/count_all,
+    indexado por (operação, tabela, colunas da chave, colunas alteradas, sufixo). Como as colunas
+    de cada tabela são fixas, na prática o caminho de escrita não monta strings a cada chamada.
+    """
+
+    def __init__(self, max_size:int):
+        self.__max_size = max(1, max_size)
+        self.__templates = collections.OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, operation:str, table:str, key_cols:tuple, set_cols:tuple=(), sufix:str='') -> tuple:
+        """ Retorna uma tupla (sql, nomes dos parâmetros na ordem key_cols + set_cols). """
+        key = (operation, table, key_cols, set_cols, sufix)
+        with self.__lock:
+            template = self.__templates.get(key)
+            if template is not None:
+                self.__templates.move_to_end(key)
+                return template
+        #
+        template = self.build(operation, table, key_cols, set_cols, sufix)
+        with self.__lock:
+            self.__templates[key] = template
+            if len(self.__templates) > self.__max_size:
+                self.__templates.popitem(last=False)
+        return template
+
+    @staticmethod
+    def build(operation:str, table:str, key_cols:tuple, set_cols:tuple=(), sufix:str='') -> tuple:
+        """ Gera o SQL da operação. No insert os parâmetros são os próprios nomes das colunas. """
+        if operation == 'insert':
+            sql = 'INSERT INTO ' +table+ ' ('+fns.implode(',',list(key_cols))+') VALUES (%(' + fns.implode(')s,%(',list(key_cols)) + ')s)'
+            if sufix != '':
+                sql += ' ' + sufix
+            return sql, key_cols
+        #
+        names = tuple('p' + str(p + 1) for p in range(len(key_cols) + len(set_cols)))
+        where = ' and '.join([c + ' = %(' + n + ')s' for c, n in zip(key_cols, names)])
+        if operation == 'update':
+            sets = ', '.join([c + ' = %(' + n + ')s' for c, n in zip(set_cols, names[len(key_cols):])])
+            sql = 'UPDATE '+ table +' SET '+ sets +' WHERE '+ where
+        elif operation == 'delete':
+            sql = 'DELETE FROM '+ table +' WHERE '+ where
+        else:
+            sql = 'SELECT COUNT(*) AS count FROM '+ table +' WHERE '+ where
+        return sql, names
+
+
+# Cache de SQLs gerados, compartilhado pelo processo...
+_SQL_TEMPLATES = SQLTemplateCache(max_size=cts._SQL_TEMPLATE_CACHE_MAX)
+
+def pg_csv_value(value) -> str:
+    """ Formata um valor para uma linha CSV do COPY(NULL é o campo vazio sem aspas). """
+    if value is None:
+        return ''
+    elif type(value) is bool:
+        return 't' if value else 'f'
+    elif type(value) is str:
+        return '"' + value.replace('"', '""') + '"'
+    else:
+        return '"' + str(value).replace('"', '""') + '"'
+
+
+class PGCopyReader(io.TextIOBase):
+    """ 
+    Arquivo(somente leitura) que gera, sob demanda, as linhas CSV de uma lista de
+    rows para o COPY ... FROM STDIN, sem montar todo o conteúdo em memória.
+    """
+
+    def __init__(self, rows:list, columns:list):
+        super().__init__()
+        self.__lines = (','.join([pg_csv_value(row[c]) for c in columns]) + '\n' for row in rows)
+        self.__buffer = ''
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size:int=-1) -> str:
+        while size < 0 or len(self.__buffer) < size:
+            line = next(self.__lines, None)
+            if line is None:
+                break
+            self.__buffer += line
+        if size < 0:
+            size = len(self.__buffer)
+        chunk, self.__buffer = self.__buffer[:size], self.__buffer[size:]
+        return chunk
+
+    def readline(self, size:int=-1) -> str:
+        return self.read(size)
+
+
+def pg_open_connection(dsn:str, readonly:bool=False):
+    """ Abre e configura uma nova conexão PostgreSQL. Levanta psycopg2.Error na falha. """
+    connection = psycopg2.connect(dsn, connection_factory=PGConnection)
+    connection.set_session(readonly=readonly,
+                           autocommit=False,
+                           isolation_level=psycopg2.extensions.ISOLATION_LEVEL_READ_COMMITTED)
+    return connection
+
+
+class PGPoolTimeout(Exception):
+    """ Tempo esgotado aguardando uma conexão livre no pool. """
+    pass
+
+
+class PGConnectionPool:
+    """
+    Pool de conexões PostgreSQL compartilhado pelas requisições do processo(thread-safe).
+    As conexões são emprestadas(checkout) e devolvidas(checkin) a cada requisição,
+    testadas no empréstimo quando ociosas há muito tempo e renovadas ao atingir
+    o tempo de vida máximo.
+    """
+
+    def __init__(self, conn_pars:dict, readonly:bool=False):
+        pool_pars = conn_pars['pool'] if type(conn_pars.get('pool')) is dict else {}
+        #
+        self.__dsn = pg_dsn(conn_pars)
+        self.__readonly = readonly
+        self.__min_conn = max(0, int(pool_pars.get('min', cts._PG_POOL_MIN_CONN)))
+        self.__max_conn = max(1, int(pool_pars.get('max', cts._PG_POOL_MAX_CONN)))
+        self.__timeout = float(pool_pars.get('timeout', cts._PG_POOL_TIMEOUT))
+        self.__max_lifetime = float(pool_pars.get('max_lifetime', cts._PG_POOL_MAX_LIFETIME))
+        self.__max_idle = float(pool_pars.get('max_idle', cts._PG_POOL_MAX_IDLE))
+        self.__health_check_idle = float(pool_pars.get('health_check_idle', cts._PG_POOL_HEALTH_CHECK_IDLE))
+        #
+        self.__pid = os.getpid()
+        self.__cond = threading.Condition()
+        self.__idle = collections.deque()  # (connection, última devolução)
+        self.__born = {}                   # id(connection) -> momento da abertura
+        self.__total = 0
+        self.__in_use = 0
+        self.__metrics = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'timeouts': 0,
+            'created': 0,
+            'discarded': 0,
+            'health_check_failures': 0
+        }
+
+    def get_pid(self) -> int:
+        """ PID do processo que criou o pool(o pool não é herdado entre forks). """
+        return self.__pid
+
+    def get_readonly(self) -> bool:
+        return self.__readonly
+
+    def get_metrics(self) -> dict:
+        """ Retorna uma cópia dos contadores do pool e a situação atual das conexões. """
+        with self.__cond:
+            metrics = self.__metrics.copy()
+            metrics['size'] = self.__total
+            metrics['idle'] = len(self.__idle)
+            metrics['in_use'] = self.__in_use
+        return metrics
+
+    def checkout(self):
+        """
+        Empresta uma conexão do pool, aguardando até o timeout quando todas
+        estiverem em uso. Levanta PGPoolTimeout ou psycopg2.Error na falha.
+        """
+        start = time.monotonic()
+        waited = False
+        while True:
+            connection = None
+            create = False
+            with self.__cond:
+                while connection is None and not create:
+                    if self.__idle:
+                        connection, last_used = self.__idle.pop()  # LIFO: reaproveita a mais "quente"
+                    elif self.__total < self.__max_conn:
+                        self.__total += 1
+                        create = True
+                    else:
+                        remaining = self.__timeout - (time.monotonic() - start)
+                        if remaining <= 0:
+                            self.__metrics['timeouts'] += 1
+                            raise PGPoolTimeout('Nenhuma conexão livre em {}s (máximo de {} conexões).'.format(self.__timeout, self.__max_conn))
+                        if not waited:
+                            waited = True
+                            self.__metrics['waits'] += 1
+                        self.__cond.wait(remaining)
+                self.__in_use += 1
+            #
+            if create:
+                try:
+                    connection = pg_open_connection(self.__dsn, readonly=self.__readonly)
+                except Exception:
+                    with self.__cond:
+                        self.__total -= 1
+                        self.__in_use -= 1
+                        self.__cond.notify()
+                    raise
+                with self.__cond:
+                    self.__born[id(connection)] = time.monotonic()
+                    self.__metrics['created'] += 1
+                break
+            elif self.__healthy(connection, last_used):
+                break
+            else:
+                self.__discard(connection)
+        #
+        with self.__cond:
+            self.__metrics['checkouts'] += 1
+            if waited:
+                self.__metrics['wait_time'] += time.monotonic() - start
+        #
+        return connection
+
+    def checkin(self, connection):
+        """ Devolve ao pool uma conexão emprestada, desfazendo transação pendente. """
+        if os.getpid() != self.__pid:
+            # Conexão de outro processo(fork) - Não pertence a esse pool...
+            return
+        reusable = not connection.closed and not self.__expired(connection)
+        if reusable and connection.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                reusable = False
+        #
+        if not reusable:
+            self.__discard(connection)
+        else:
+            now = time.monotonic()
+            retire = []
+            with self.__cond:
+                self.__idle.append((connection, now))
+                self.__in_use -= 1
+                # Fecha as ociosas há muito tempo, preservando o mínimo de conexões...
+                while (self.__idle and self.__total - len(retire) > self.__min_conn
+                       and now - self.__idle[0][1] > self.__max_idle):
+                    retire.append(self.__idle.popleft()[0])
+                self.__cond.notify()
+            for old in retire:
+                self.__close(old, in_use=False)
+
+    def __expired(self, connection) -> bool:
+        born = self.__born.get(id(connection))
+        return born is None or time.monotonic() - born > self.__max_lifetime
+
+    def __healthy(self, connection, last_used:float) -> bool:
+        """ Checagem da conexão no checkout: aberta, dentro do tempo de vida e respondendo. """
+        if connection.closed or self.__expired(connection):
+            return False
+        if time.monotonic() - last_used >= self.__health_check_idle:
+            try:
+                cursor = connection.cursor()
+                cursor.execute('SELECT 1')
+                cursor.close()
+                connection.rollback()
+            except psycopg2.Error:
+                with self.__cond:
+                    self.__metrics['health_check_failures'] += 1
+                return False
+        return True
+
+    def __discard(self, connection):
+        self.__close(connection, in_use=True)
+
+    def __close(self, connection, in_use:bool):
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+        with self.__cond:
+            self.__born.pop(id(connection), None)
+            self.__total -= 1
+            if in_use:
+                self.__in_use -= 1
+            self.__metrics['discarded'] += 1
+            self.__cond.notify()
+
+
+# Pools do processo, por DSN e modo(leitura/escrita)...
+_PG_POOLS = {}
+_PG_POOLS_LOCK = threading.Lock()
+
+def get_pg_pool(conn_pars:dict, readonly:bool=False) -> PGConnectionPool:
+    """
+    Retorna o pool de conexões do processo para os parâmetros de conexão,
+    criando-o no primeiro uso(inclusive após um fork do uWSGI).
+    """
+    key = (pg_dsn(conn_pars), readonly)
+    with _PG_POOLS_LOCK:
+        pool = _PG_POOLS.get(key)
+        if pool is None or pool.get_pid() != os.getpid():
+            pool = PGConnectionPool(conn_pars=conn_pars, readonly=readonly)
+            _PG_POOLS[key] = pool
+    return pool
+
+
+class PGReplicaRouter:
+    """
+    Roteador das leituras para as réplicas(somente leitura) do PostgreSQL(thread-safe).
+    Cada réplica tem seu próprio pool(readonly=True). O checkout distribui as leituras em
+    round-robin entre as réplicas saudáveis e usa o primário quando nenhuma está disponível.
+    Uma réplica sai da rotação por "retry" segundos quando falha na conexão ou quando seu
+    atraso de replicação passa de "max_lag" segundos(conferido a cada "health_check" segundos).
+    Com "read_your_writes" > 0, o cliente que escreveu há menos desses segundos lê do primário.
+    """
+
+    # Atraso(segundos) da réplica: zero quando já aplicou tudo o que recebeu do primário...
+    _SQL_LAG = ('SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '+
+                'ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END')
+
+    def __init__(self, conn_pars:dict):
+        routing = conn_pars['replica_routing'] if type(conn_pars.get('replica_routing')) is dict else {}
+        #
+        self.__pid = os.getpid()
+        self.__primary = get_pg_pool(conn_pars)
+        self.__retry = float(routing.get('retry', cts._PG_REPLICA_RETRY))
+        self.__health_check = float(routing.get('health_check', cts._PG_REPLICA_HEALTH_CHECK))
+        self.__max_lag = float(routing.get('max_lag', cts._PG_REPLICA_MAX_LAG))
+        self.__read_your_writes = float(routing.get('read_your_writes', cts._PG_READ_YOUR_WRITES))
+        #
+        self.__lock = threading.Lock()
+        self.__next = 0
+        self.__writes = {}   # cliente -> momento da última escrita
+        self.__replicas = []
+        for replica_pars in conn_pars.get('replicas', []):
+            # Os atributos não informados na réplica(name, user, pwd, pool...) vêm do primário...
+            pars = fns.dict_merge({k: v for k, v in conn_pars.items() if k not in ('replicas', 'replica_routing')}, replica_pars)
+            self.__replicas.append({
+                'host': pars['host'],
+                'pool': get_pg_pool(pars, readonly=True),
+                'down_until': 0.0,
+                'checked': 0.0,
+                'lag': 0.0,
+                'reads': 0,
+                'failures': 0
+            })
+        self.__metrics = {'primary_reads': 0, 'read_your_writes': 0}
+
+    def get_pid(self) -> int:
+        return self.__pid
+
+    def get_primary(self) -> PGConnectionPool:
+        return self.__primary
+
+    def get_metrics(self) -> dict:
+        """ Retorna os contadores do roteador e a situação de cada réplica. """
+        now = time.monotonic()
+        with self.__lock:
+            metrics = self.__metrics.copy()
+            metrics['replicas'] = [{
+                'host': r['host'],
+                'healthy': r['down_until'] <= now,
+                'lag': r['lag'],
+                'reads': r['reads'],
+                'failures': r['failures']
+            } for r in self.__replicas]
+        return metrics
+
+    def mark_write(self, client_id:str):
+        """ Registra uma escrita(com sucesso) do cliente, para a janela read-your-writes. """
+        if self.__read_your_writes <= 0 or fns.is_empty(client_id):
+            return
+        now = time.monotonic()
+        with self.__lock:
+            self.__writes[client_id] = now
+            if len(self.__writes) > cts._PG_READ_YOUR_WRITES_MAX_CLIENTS:
+                # Descarta as janelas já vencidas...
+                self.__writes = {c: t for c, t in self.__writes.items() if now - t < self.__read_your_writes}
+
+    def __recent_write(self, client_id:str) -> bool:
+        if self.__read_your_writes <= 0 or fns.is_empty(client_id):
+            return False
+        with self.__lock:
+            written = self.__writes.get(client_id)
+        return written is not None and time.monotonic() - written < self.__read_your_writes
+
+    def checkout(self, client_id:str=None) -> tuple:
+        """
+        Empresta uma conexão para leitura. Retorna uma tupla (pool, conexão): a conexão deve
+        ser devolvida com pool.checkin(). Levanta PGPoolTimeout ou psycopg2.Error na falha do primário.
+        """
+        if self.__recent_write(client_id):
+            with self.__lock:
+                self.__metrics['read_your_writes'] += 1
+        else:
+            for _ in range(len(self.__replicas)):
+                with self.__lock:
+                    replica = self.__replicas[self.__next % len(self.__replicas)]
+                    self.__next += 1
+                    if replica['down_until'] > time.monotonic():
+                        continue
+                try:
+                    connection = replica['pool'].checkout()
+                except (PGPoolTimeout, psycopg2.Error):
+                    self.__set_down(replica)
+                    continue
+                if self.__healthy(replica, connection):
+                    with self.__lock:
+                        replica['reads'] += 1
+                    return replica['pool'], connection
+                replica['pool'].checkin(connection)
+                self.__set_down(replica)
+        #
+        # Sem réplica disponível(ou janela read-your-writes) - Lê do primário...
+        with self.__lock:
+            self.__metrics['primary_reads'] += 1
+        return self.__primary, self.__primary.checkout()
+
+    def __healthy(self, replica:dict, connection) -> bool:
+        """ Confere o atraso de replicação, no máximo a cada "health_check" segundos. """
+        now = time.monotonic()
+        if now - replica['checked'] < self.__health_check:
+            return True
+        try:
+            cursor = connection.cursor()
+            cursor.execute(self._SQL_LAG)
+            lag = float(cursor.fetchone()[0])
+            cursor.close()
+            connection.rollback()
+        except psycopg2.Error:
+            return False
+        with self.__lock:
+            replica['checked'] = now
+            replica['lag'] = lag
+        return lag <= self.__max_lag
+
+    def __set_down(self, replica:dict):
+        """ Tira a réplica da rotação por "retry" segundos. """
+        with self.__lock:
+            replica['down_until'] = time.monotonic() + self.__retry
+            replica['checked'] = 0.0
+            replica['failures'] += 1
+
+
+# Roteadores de réplicas do processo, por DSN do primário...
+_PG_REPLICA_ROUTERS = {}
+
+def get_pg_replica_router(conn_pars:dict) -> PGReplicaRouter:
+    """
+    Retorna o roteador de réplicas do processo para os parâmetros de conexão(None quando
+    não há réplicas configuradas na chave "replicas"), criando-o no primeiro uso.
+    """
+    if fns.is_empty(conn_pars.get('replicas')):
+        return None
+    key = pg_dsn(conn_pars)
+    with _PG_POOLS_LOCK:
+        router = _PG_REPLICA_ROUTERS.get(key)
+    if router is None or router.get_pid() != os.getpid():
+        router = PGReplicaRouter(conn_pars=conn_pars)
+        with _PG_POOLS_LOCK:
+            _PG_REPLICA_ROUTERS[key] = router
+    return router
+
+#---------------------------------------------------------------------------------
+
+
+# Envio de várias notificações(NOTIFY) numa única ida ao banco...
+_SQL_NOTIFY = ('SELECT pg_notify(n.channel, n.payload) '+
+               'FROM unnest(%(channels)s::text[], %(payloads)s::text[]) AS n(channel, payload)')
+
+class DBPostgres(DatabaseInterface):
+
+    def __init__(self, pool:PGConnectionPool=None, replicas=None, client_id:str=None) -> None:
         super().__init__()     
         #
         self.__rows = []
+        self.__row_count = 0
+        self.__columns = {}
+        self.__pool = pool
+        self.__conn_pars = {}
         self.__connection = None
+        self.__replicas = replicas       # PGReplicaRouter: leituras roteadas para as réplicas
+        self.__client_id = client_id     # Cliente da requisição(janela read-your-writes)
+        self.__read_pool = None
+        self.__read_connection = None
         self.__in_transaction = False
+        self.__prepare = cts._PG_PREPARED_STATEMENTS
+        self.__prepare_max = cts._PG_PREPARED_STATEMENTS_MAX
+        self.__streams = 0
         
         self.__key_not_found = False                                           
         
@@ -198,6 +893,11 @@ class DBPostgres(DatabaseInterface):
     def connect(self, conn_pars:dict) -> bool:
         """ 
         Tenta a conexão com o banco PostgreSQL.
+        No modo com pool(pool informado no construtor) a conexão é emprestada
+        do pool e deve ser devolvida com close_connection().
+        No modo com réplicas(replicas informado no construtor) a conexão inicial é a de
+        leitura(réplica saudável ou, na falta, o primário); a conexão com o primário
+        só é emprestada no primeiro comando de escrita ou no start_transaction().
         Parâmetros:
           dict conn_pars: Um dicionário com os atributos para a conexão:
                             str name - Nome do banco                            
@@ -205,42 +905,98 @@ class DBPostgres(DatabaseInterface):
                             int port - Porta do serviço do banco no host
                             str user - Usuário de login
                             str pwd - Senha do usuário
+                            dict pool - Opcional, limites do pool(min, max, timeout, max_lifetime,...)
+                            bool prepare - Opcional, liga o cache de prepared statements
+                            int prepare_max - Opcional, máximo de statements preparados por conexão
         Retorna:
           bool True/False quanto ao sucesso da conexão
         """
-        try:
-            dsn = "dbname='{}' user='{}' password='{}' host='{}' port='{}'".format(conn_pars['name'],
-                                                                                   conn_pars['user'],
-                                                                                   conn_pars['pwd'],
-                                                                                   conn_pars['host'],
-                                                                                   conn_pars['port'])
-            #
-            self.__connection = psycopg2.connect(dsn)
-            self.__connection.set_session(readonly=False, 
-                                          autocommit=False, 
-                                          isolation_level=psycopg2.extensions.ISOLATION_LEVEL_READ_COMMITTED)
-        except psycopg2.Error as error:           
-            self.__connection = None
-            self.set_error(msg='Falha na conexão com o banco. [{}]'.format(self.readable_exception(error)))
+        self.__conn_pars = conn_pars
+        self.set_notify(conn_pars.get('notify', cts._PG_NOTIFY))
+        self.__prepare = bool(conn_pars.get('prepare', cts._PG_PREPARED_STATEMENTS))
+        self.__prepare_max = int(conn_pars.get('prepare_max', cts._PG_PREPARED_STATEMENTS_MAX))
+        if self.__replicas is None:
+            self.__primary()
+        else:
+            try:
+                self.__read_pool, self.__read_connection = self.__replicas.checkout(client_id=self.__client_id)
+            except PGPoolTimeout as error:
+                self.set_error(msg='Falha na conexão com o banco. [{}]'.format(str(error)), code=503)
+            except psycopg2.Error as error:           
+                self.set_error(msg='Falha na conexão com o banco. [{}]'.format(self.readable_exception(error)))
         #
         return not self.get_error()  
     
-    def get_connection(self):
+    def __primary(self):
+        """ Retorna a conexão com o primário, emprestando-a do pool(ou abrindo) no primeiro uso. """
+        if self.__connection is None:
+            try:
+                if self.__pool is not None:
+                    self.__connection = self.__pool.checkout()
+                else:
+                    self.__connection = pg_open_connection(pg_dsn(self.__conn_pars))
+            except PGPoolTimeout as error:
+                self.__connection = None
+                self.set_error(msg='Falha na conexão com o banco. [{}]'.format(str(error)), code=503)
+            except psycopg2.Error as error:           
+                self.__connection = None
+                self.set_error(msg='Falha na conexão com o banco. [{}]'.format(self.readable_exception(error)))
+        #
         return self.__connection
     
+    def __route(self, clause:str):
+        """ 
+        Conexão para o comando: as leituras(select) fora de transação vão para a conexão
+        de leitura(modo com réplicas); as escritas e tudo dentro de transação, para o primário.
+        """
+        if self.__read_connection is not None and not self.__in_transaction and clause == 'select':
+            return self.__read_connection
+        if self.__connection is None and self.__read_connection is None and self.__replicas is None:
+            return None  # Sem conexão(connect() não executado ou falhou)
+        return self.__primary()
+    
+    def get_connection(self):
+        return self.__connection if self.__connection is not None else self.__read_connection
+    
+    def get_pool(self) -> PGConnectionPool:
+        return self.__pool
+    
+    def get_replicas(self):
+        return self.__replicas
+    
+    def reads_from_replica(self) -> bool:
+        """ A conexão de leitura é de uma réplica(e não o primário da falta de réplica ou da janela read-your-writes)? """
+        return (self.__read_connection is not None and not self.__in_transaction and
+                self.__read_pool is not self.__replicas.get_primary())
+    
     def is_connected(self) -> bool:
-        return not fns.is_empty(self.__connection)
+        return not fns.is_empty(self.__connection) or not fns.is_empty(self.__read_connection)
     
-    def close_connection(self, pars: dict) -> bool:
-        if self.is_connected():
-            try: 
-                self.__connection.close() 
+    def close_connection(self, pars: dict = None) -> bool:
+        """ Fecha as conexões ou, no modo com pool, devolve as conexões emprestadas aos pools. """
+        try: 
+            if self.__connection is not None:
+                if self.__pool is not None:
+                    self.__pool.checkin(self.__connection)
+                else:
+                    self.__connection.close() 
+        finally:
+            self.__connection = None
+            self.__in_transaction = False
+            self.discard_commit_hooks()
+            try:
+                if self.__read_connection is not None:
+                    self.__read_pool.checkin(self.__read_connection)
             finally:
-                self.__connection = None 
+                self.__read_pool = None
+                self.__read_connection = None
+        #
+        return True
                 
     def start_transaction(self) -> bool:
+        """ Inicia o controle de transação, sempre no primário. """
         self.no_errors()
-        self.__in_transaction = self.is_connected()
+        self.__in_transaction = self.is_connected() and self.__primary() is not None
         return self.__in_transaction
     
     def in_transaction(self) -> bool:
@@ -250,14 +1006,29 @@ class DBPostgres(DatabaseInterface):
         self.no_errors()
         if self.__in_transaction:
             try:
+                self.__send_notifications()
                 self.__connection.commit();          
             except psycopg2.Error as error:
                 self.set_error(msg='Erro finalizando transação. [{}]'.format(self.readable_exception(error)))       
         #
         self.__in_transaction = False
+        if self.get_error():
+            self.discard_commit_hooks()
+        else:
+            self.run_commit_hooks()
         #
         return not self.get_error()
     
+    def __send_notifications(self):
+        """ Envia(dentro da transação: entregues somente no commit) as notificações registradas. """
+        notifications = self.pop_notifications()
+        if notifications:
+            cursor = self.__connection.cursor()
+            try:
+                cursor.execute(_SQL_NOTIFY, {'channels': [n[0] for n in notifications], 'payloads': [n[1] for n in notifications]})
+            finally:
+                cursor.close()
+    
     def rollback(self) -> bool:
         self.no_errors()
         if self.__in_transaction:
@@ -267,6 +1038,7 @@ class DBPostgres(DatabaseInterface):
                 self.set_error(msg='Erro cancelando transação. [{}]'.format(self.readable_exception(error)))             
         #
         self.__in_transaction = False    
+        self.discard_commit_hooks()
         #
         return not self.get_error()
     
@@ -278,9 +1050,9 @@ class DBPostgres(DatabaseInterface):
         self.__rows = []     
         try: 
             if clause == 'select':
-                if type(cursor) is psycopg2.extras.DictCursor and cursor.rowcount > 0:
+                if isinstance(cursor, psycopg2.extensions.cursor) and cursor.rowcount > 0:
                     self.__rows = cursor.fetchall()
-            elif clause == 'insert' and type(cursor) is psycopg2.extras.DictCursor:
+            elif clause == 'insert' and isinstance(cursor, psycopg2.extensions.cursor):
                 # O INSERT pode retornar valores, por exemplo, quando
                 # insere um novo registro e retorna a PK... 
                 # Tenta ler(safe-mode) o retorno da query...
@@ -294,7 +1066,55 @@ class DBPostgres(DatabaseInterface):
         return not self.get_error()        
         
     
-    def query(self, sql:str, pars:Union[dict,list], commit:False):
+    def get_statement_cache(self, connection=None) -> PGStatementCache:
+        """ Cache de prepared statements da conexão(padrão: a atual; None quando desligado/sem conexão). """
+        connection = self.get_connection() if connection is None else connection
+        if not self.__prepare or not isinstance(connection, PGConnection):
+            return None
+        if connection.statement_cache is None:
+            connection.statement_cache = PGStatementCache(max_size=self.__prepare_max)
+        return connection.statement_cache
+    
+    def get_statement_cache_stats(self) -> dict:
+        cache = self.get_statement_cache()
+        return {} if cache is None else cache.get_stats()
+    
+    def __execute(self, cursor, sql:str, pars:Union[dict,list], clause:str):
+        """
+        Executa o SQL no cursor. Com o cache de prepared statements ligado, os SQLs
+        com parâmetros nomeados são preparados(PREPARE) uma única vez por conexão e
+        depois somente executados(EXECUTE), sem novo parse/plan no servidor.
+        """
+        cache = self.get_statement_cache(cursor.connection)
+        if (cache is None or type(pars) is not dict or clause not in ('select', 'insert', 'update', 'delete')
+                or cache.is_unpreparable(sql)):
+            cursor.execute(sql, pars)
+            return
+        #
+        entry = cache.get(sql)
+        if entry is None:
+            converted = pg_prepare_sql(sql)
+            if converted is None:
+                cache.set_unpreparable(sql)
+                cursor.execute(sql, pars)
+                return
+            # O savepoint preserva a transação se o servidor não conseguir preparar o SQL...
+            entry, evicted = cache.add(sql, converted[1])
+            try:
+                cursor.execute('SAVEPOINT pyapi_prepare; ' +
+                               ('DEALLOCATE ' + evicted + '; ' if evicted else '') +
+                               'PREPARE ' + entry[0] + ' AS ' + converted[0] + '; ' +
+                               'RELEASE SAVEPOINT pyapi_prepare')
+            except psycopg2.Error:
+                cursor.execute('ROLLBACK TO SAVEPOINT pyapi_prepare')
+                cache.set_unpreparable(sql)
+                cursor.execute(sql, pars)
+                return
+        #
+        name, parameters, execute = entry
+        cursor.execute(execute, [pars[p] for p in parameters])
+    
+    def query(self, sql:str, pars:Union[dict,list], commit:False, compact:bool=False):
         """
         Executar queries no Postgres.
         Parâmetros:
@@ -302,16 +1122,32 @@ class DBPostgres(DatabaseInterface):
           mixed pars: Um list/dict com parâmetros e/ou valores dos filtros/colunas(SQL INJECTION SAFE)
           connection conn: Handler de conexão com o banco
           bool commit: Passe True quando o commit deva ser executado após a execução da query.
+          bool compact: Passe True para rows como tuplas simples(sem o mapa de chaves de cada
+                        DictRow); o mapa único {coluna: índice} fica em get_columns().
         Retorna bool True/False: Quanto ao sucesso na execução.
         """
         self.no_errors()
         self.__rows = []        
+        self.__row_count = 0
+        self.__columns = {}
         #
-        if self.is_connected():
-            cursor = self.__connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        # Instrumentação(tempo, rows, fingerprint e origem), somente quando ligada...
+        stats = ins._QUERY_STATS if ins._QUERY_STATS.get_enabled() else None
+        if stats is not None:
+            start = time.perf_counter()
+        #
+        sql_clause = sql[:6].strip().lower()
+        connection = self.__route(sql_clause)
+        if connection is not None:
+            if compact:
+                cursor = connection.cursor()
+            else:
+                cursor = connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
             try:
-                sql_clause = sql[:6].strip().lower()
-                cursor.execute(sql, pars)
+                self.__execute(cursor=cursor, sql=sql, pars=pars, clause=sql_clause)
+                self.__row_count = cursor.rowcount
+                if compact and cursor.description is not None:
+                    self.__columns = {d[0]: i for i, d in enumerate(cursor.description)}
                 self.fetch(clause=sql_clause, cursor=cursor)
                 #   
                 if commit or (not self.__in_transaction and sql_clause == 'select'):
@@ -323,12 +1159,66 @@ class DBPostgres(DatabaseInterface):
                 if cursor:
                     cursor.close()
                     del cursor
-        else:       
+        elif not self.get_error():       
             self.set_error(msg='Sem conexão com o banco.')            
         #                 
+        if stats is not None:
+            stats.record(sql=sql, pars=pars, duration=time.perf_counter() - start, rows=self.__row_count,
+                         source=self.get_query_source(), error=self.get_error())
+        #                 
         return not self.get_error()
     
         
+    def stream(self, sql:str, pars:Union[dict,list], itersize:int=cts._PG_STREAM_ITERSIZE, compact:bool=False):
+        """
+        Executa uma consulta no Postgres em modo streaming.
+        Usa um cursor nomeado(server-side) que busca "itersize" rows por ida ao servidor,
+        de forma que a memória fica constante, independente do tamanho do resultado.
+        Parâmetros:
+          str sql: SQL(SELECT) para execução.
+          mixed pars: Um list/dict com parâmetros e/ou valores dos filtros/colunas(SQL INJECTION SAFE)
+          int itersize: Total de rows buscadas por ida ao servidor.
+          bool compact: Passe True para rows como tuplas simples(mapa de colunas em get_columns(),
+                        disponível após a primeira row).
+        Retorna:
+          Um generator das rows. Em caso de falha o generator termina e o erro
+          fica registrado(get_error/get_error_message).
+        """
+        self.no_errors()
+        self.__rows = []
+        self.__row_count = 0
+        self.__columns = {}
+        connection = self.__route('select')
+        if connection is None:
+            if not self.get_error():
+                self.set_error(msg='Sem conexão com o banco.')
+            return
+        #
+        # Instrumentação(do execute até o final da leitura das rows), somente quando ligada...
+        stats = ins._QUERY_STATS if ins._QUERY_STATS.get_enabled() else None
+        start = time.perf_counter() if stats is not None else 0.0
+        #
+        # O cursor nomeado vive dentro da transação atual(aberta implicitamente se preciso)...
+        self.__streams += 1
+        cursor = connection.cursor(name='pyapi_stream' + str(self.__streams),
+                                          cursor_factory=(None if compact else psycopg2.extras.DictCursor))
+        cursor.itersize = max(1, itersize)
+        try:
+            cursor.execute(sql, pars)
+            for row in cursor:
+                if self.__row_count == 0 and compact:
+                    self.__columns = {d[0]: i for i, d in enumerate(cursor.description)}
+                self.__row_count += 1
+                yield row
+        except psycopg2.Error as error:
+            self.set_error(msg='Falha em execução de query(streaming). [{}]'.format(self.readable_exception(error)))
+        finally:
+            try:
+                cursor.close()
+            except psycopg2.Error:
+                pass
+            self.record_query(stats, sql, pars, start, self.__row_count, self.get_error())
+    
     def insert(self, table:str, fields:dict, sufix:str=''):
         """
         Executa a inclusão de um registro em uma tabela. 
@@ -338,15 +1228,143 @@ class DBPostgres(DatabaseInterface):
            str sufix: SQL command, opcional, que será adicionado no final da clásula de inclusão gerada
         """       
         #
-        sql = 'INSERT INTO ' +table+ ' ('+fns.implode(',',list(fields.keys()))+') VALUES (%(' + fns.implode(')s,%(',list(fields.keys())) + ')s)'
-        #
-        if sufix != '':
-           sql += ' ' + sufix                  
+        sql = _SQL_TEMPLATES.get('insert', table, tuple(fields), sufix=sufix)[0]
         #     
         self.query(sql=sql, pars=fields, commit=False)                           
         #     
         return not self.get_error() 
     
+    def insert_many(self, table:str, rows:list, returning:str='', sufix:str=''):
+        """
+        Executa a inclusão de vários registros em uma tabela. 
+        Até cts._PG_COPY_MIN_ROWS rows(ou com sufix) a inclusão é feita por INSERT com VALUES
+        de vários registros, em lotes de cts._PG_INSERT_BATCH_ROWS. Acima disso é feita por COPY,
+        com os valores de "returning" reservados antes na sequence da coluna.
+        Parâmetros:
+           str table: Nome da tabela para incluir os registros
+           list rows: Uma lista de dicts, todos com os mesmos campos, no formato [{nome_col: value,...},...]
+           str returning: Nome da coluna, opcional, cujos valores gerados serão retornados
+           str sufix: SQL command, opcional, que será adicionado no final de cada lote(Ex: ON CONFLICT...)
+        Retorna:
+           Inicializa a propriedade "__rows" com os valores da coluna em "returning",
+           na mesma ordem das rows informadas.
+        """     
+        self.no_errors()
+        self.__rows = []
+        self.__row_count = 0
+        #
+        if fns.is_empty(rows):
+            return True
+        columns = list(rows[0].keys())
+        for row in rows:
+            if len(row) != len(columns) or any(c not in row for c in columns):
+                self.set_error('Todas as rows da inclusão em lote devem ter os mesmos campos.')
+                return False
+        #
+        if not self.is_connected() or self.__primary() is None:
+            if not self.get_error():
+                self.set_error(msg='Sem conexão com o banco.')
+        elif sufix == '' and len(rows) >= cts._PG_COPY_MIN_ROWS:
+            self.__insert_many_copy(table=table, rows=rows, columns=columns, returning=returning)
+        else:
+            self.__insert_many_values(table=table, rows=rows, columns=columns, returning=returning, sufix=sufix)
+        #
+        return not self.get_error()
+    
+    def __insert_many_values(self, table:str, rows:list, columns:list, returning:str, sufix:str):
+        """ Inclusão em lotes de INSERT ... VALUES (...), (...) [RETURNING]. """
+        sql = 'INSERT INTO ' + table + ' (' + ','.join(columns) + ') VALUES %s'
+        if sufix != '':
+            sql += ' ' + sufix
+        if returning != '':
+            sql += ' RETURNING ' + returning
+        #
+        stats = ins._QUERY_STATS if ins._QUERY_STATS.get_enabled() else None
+        values = [tuple(row[c] for c in columns) for row in rows]
+        cursor = self.__connection.cursor()
+        try:
+            # Um lote por execute_values(instrumentação por lote); o RETURNING devolve os valores na ordem do VALUES...
+            for first in range(0, len(values), cts._PG_INSERT_BATCH_ROWS):
+                batch = values[first:first + cts._PG_INSERT_BATCH_ROWS]
+                start = time.perf_counter() if stats is not None else 0.0
+                try:
+                    returned = psycopg2.extras.execute_values(cursor, sql, batch, page_size=len(batch), fetch=(returning != ''))
+                except psycopg2.Error:
+                    self.record_query(stats, sql, batch[0], start, 0, True)
+                    raise
+                self.record_query(stats, sql, batch[0], start, len(batch))
+                if returning != '':
+                    self.__rows += [r[0] for r in returned]
+            self.__row_count = len(rows)
+        except psycopg2.Error as error:
+            self.set_error(msg='Falha na inclusão em lote. [{}]'.format(self.readable_exception(error)))
+        finally:
+            cursor.close()
+    
+    def __insert_many_copy(self, table:str, rows:list, columns:list, returning:str):
+        """ Inclusão por COPY ... FROM STDIN(CSV), para grandes volumes. """
+        stats = ins._QUERY_STATS if ins._QUERY_STATS.get_enabled() else None
+        cursor = self.__connection.cursor()
+        fallback = False
+        sql, pars, start = '', None, 0.0
+        try:
+            if returning != '':
+                # O COPY não tem RETURNING: reserva os valores na sequence da coluna e os inclui nas rows...
+                sql = ('SELECT nextval(pg_get_serial_sequence(%(table)s, %(column)s)) '+
+                       'FROM generate_series(1, %(total)s) ORDER BY 1')
+                pars = {'table': table, 'column': returning, 'total': len(rows)}
+                start = time.perf_counter() if stats is not None else 0.0
+                cursor.execute(sql, pars)
+                values = [r[0] for r in cursor.fetchall()]
+                self.record_query(stats, sql, pars, start, len(values))
+                # Sequence não vinculada(OWNED BY) à coluna: o nextval() retorna NULL e a inclusão segue por VALUES/RETURNING...
+                fallback = (not values or values[0] is None)
+            if not fallback:
+                copy_rows, copy_columns = rows, columns
+                if returning != '':
+                    copy_rows = [fns.dict_merge(row, {returning: v}) for row, v in zip(rows, values)]
+                    copy_columns = [returning] + [c for c in columns if c != returning]
+                #
+                sql, pars = 'COPY ' + table + ' (' + ','.join(copy_columns) + ') FROM STDIN WITH (FORMAT csv)', None
+                start = time.perf_counter() if stats is not None else 0.0
+                cursor.copy_expert(sql, PGCopyReader(rows=copy_rows, columns=copy_columns))
+                self.record_query(stats, sql, pars, start, len(rows))
+                self.__rows = values if returning != '' else []
+                self.__row_count = len(rows)
+        except psycopg2.Error as error:
+            self.record_query(stats, sql, pars, start, 0, True)
+            self.set_error(msg='Falha na inclusão em lote(COPY). [{}]'.format(self.readable_exception(error)))
+        finally:
+            cursor.close()
+        #
+        if fallback:
+            self.__insert_many_values(table=table, rows=rows, columns=columns, returning=returning, sufix='')
+    
+    def copy_expert(self, sql:str, file) -> bool:
+        """
+        Executa um COPY ... FROM STDIN/TO STDOUT com o arquivo(file-like) informado.
+        Retorna bool True/False: Quanto ao sucesso na execução.
+        """
+        self.no_errors()
+        self.__row_count = 0
+        if not self.is_connected() or self.__primary() is None:
+            if not self.get_error():
+                self.set_error(msg='Sem conexão com o banco.')
+        else:
+            stats = ins._QUERY_STATS if ins._QUERY_STATS.get_enabled() else None
+            start = time.perf_counter() if stats is not None else 0.0
+            cursor = self.__connection.cursor()
+            try:
+                cursor.copy_expert(sql, file)
+                self.__row_count = cursor.rowcount
+            except psycopg2.Error as error:
+                self.set_error(msg='Falha no COPY. [{}]'.format(self.readable_exception(error)))
+            finally:
+                cursor.close()
+            self.record_query(stats, sql, None, start, max(0, self.__row_count), self.get_error())
+        #
+        return not self.get_error()
+    
     def update(self, table:str, pk:dict, fields:dict):
         """
         Executa a alteração de um registro em uma tabela. 
@@ -356,31 +1374,13 @@ class DBPostgres(DatabaseInterface):
            dict fields: Um dict com os campos e valores para inclusão no formato {nome_col: value,...}.
         """   
         self.__key_not_found = False  
-        self.count_all(table=table, condition=pk)
-        if self.get_rows()[0]['count'] == 0:
+        sql, names = _SQL_TEMPLATES.get('update', table, tuple(pk), tuple(fields))
+        parameters = dict(zip(names, list(pk.values()) + list(fields.values())))
+        #
+        # Uma única ida ao banco: a chave inexistente é detectada pelo total de rows afetadas...
+        if self.query(sql=sql, pars=parameters, commit=False) and self.get_row_count() == 0:
             self.__key_not_found = True
             self.set_error('Tentativa de alterar registro não existente na tabela.')
-        else:             
-            parameters = {}           
-            sets = ''
-            pkwhere = ''
-            pkcols = list(pk.keys())           
-            setcols = list(fields.keys())
-            p = 0
-            #
-            for c in pkcols:
-                p += 1
-                parameters['p'+str(p)] = pk[c]
-                pkwhere += (' and ' if pkwhere != '' else '') + c + ' = %(' + 'p'+str(p) + ')s'
-            #    
-            for c in setcols:
-                p += 1
-                parameters['p'+str(p)] = fields[c]    
-                sets += ('' if sets == '' else ', ') + c + ' = %(' + 'p'+str(p) + ')s'   
-            #                        
-            sql = 'UPDATE '+ table +' SET '+ sets +' WHERE '+ pkwhere
-            #
-            self.query(sql=sql, pars=parameters, commit=False)                           
         #     
         return not self.get_error()    
     
@@ -392,24 +1392,13 @@ class DBPostgres(DatabaseInterface):
            dict pk: Um dict com os campos e valores da PK da tabela no formato {nome_col: value,...}
         """    
         self.__key_not_found = False  
-        self.count_all(table=table, condition=pk)
-        if self.get_rows()[0]['count'] == 0:
+        sql, names = _SQL_TEMPLATES.get('delete', table, tuple(pk))
+        parameters = dict(zip(names, pk.values()))
+        #
+        # Uma única ida ao banco: a chave inexistente é detectada pelo total de rows afetadas...
+        if self.query(sql=sql, pars=parameters, commit=False) and self.get_row_count() == 0:
             self.__key_not_found = True
             self.set_error('Tentativa de excluir registro não existente na tabela.')
-        else: 
-            pkwhere = ''
-            pkcols = list(pk.keys()) 
-            parameters = {}  
-            p = 0
-            #
-            for c in pkcols:
-                p += 1
-                parameters['p'+str(p)] = pk[c]   
-                pkwhere += (' and ' if pkwhere != '' else '') + c + ' = %(' + 'p'+str(p) + ')s'     
-            #                        
-            sql = 'DELETE FROM '+ table +' WHERE '+ pkwhere
-            #
-            self.query(sql=sql, pars=parameters, commit=False)                           
         #     
         return not self.get_error()    
     
@@ -423,17 +1412,8 @@ class DBPostgres(DatabaseInterface):
            Inicializa a propriedade "__rows" com com um dict com o total da contagem 
            no rótulo "count".(Ex: Para acessar, use: db.get_rows()[0]['count'])
         """     
-        where = ''
-        cond_cols = list(condition.keys())   
-        p = 0   
-        parameters = {}     
-        #
-        for c in cond_cols:
-            p += 1
-            parameters['p'+str(p)] = condition[c]
-            where += (' and ' if where != '' else '') + c + ' = %(' + 'p'+str(p) + ')s'     
-        #   
-        sql = 'SELECT COUNT(*) AS count FROM '+ table +' WHERE '+ where
+        sql, names = _SQL_TEMPLATES.get('count_all', table, tuple(condition))
+        parameters = dict(zip(names, condition.values()))
         #
         self.query(sql=sql, pars=parameters, commit=False)                           
         #     
@@ -442,17 +1422,126 @@ class DBPostgres(DatabaseInterface):
     
     def get_rows(self) -> list:
         return self.__rows
+    
+    def get_columns(self) -> dict:
+        return self.__columns
+    
+    def get_row_count(self) -> int:
+        return self.__row_count
         
 #---------------------------------------------------------------------------------              
+
+class SchemaValidatorRegistry:
+    """
+    Registro(thread-safe) dos validadores dos schemas json dos requests. Cada schema é
+    conferido(check_schema) e compilado uma única vez e o validador é reaproveitado em
+    todas as requisições. Com fast=True e o pacote fastjsonschema instalado, o request
+    é validado por uma função gerada em código; somente na falha o validador do
+    jsonschema é executado, para a mesma mensagem de erro(best_match) de sempre.
+    """
+
+    def __init__(self, fast:bool=False):
+        self.__fast = fast and fastjsonschema is not None
+        self.__lock = threading.Lock()
+        self.__validators = {}   # id(schema) -> (schema, validador jsonschema, validador gerado)
+
+    def get_fast(self) -> bool:
+        return self.__fast
+
+    def register(self, schema:dict) -> tuple:
+        """ Compila(no primeiro uso) e retorna a tupla (schema, validador, validador gerado ou None). """
+        entry = self.__validators.get(id(schema))
+        if entry is None or entry[0] is not schema:
+            validator_class = jsonschema.validators.validator_for(schema)
+            validator_class.check_schema(schema)
+            entry = (schema, validator_class(schema), fastjsonschema.compile(schema) if self.__fast else None)
+            with self.__lock:
+                self.__validators[id(schema)] = entry
+        return entry
+
+    def validate(self, instance, schema:dict):
+        """ Mesmo contrato do jsonschema.validate(): levanta ValidationError quando o request é inválido. """
+        entry = self.register(schema)
+        if entry[2] is not None:
+            try:
+                entry[2](instance)
+                return
+            except fastjsonschema.JsonSchemaException:
+                pass
+        error = jsonschema.exceptions.best_match(entry[1].iter_errors(instance))
+        if error is not None:
+            raise error
+
+
+# Validadores do processo, compilados na carga para todos os schemas de py_api_consts...
+_SCHEMA_VALIDATORS = SchemaValidatorRegistry(fast=cts._SCHEMA_FAST_VALIDATOR)
+for _schema_name in dir(cts):
+    if _schema_name.endswith('_JSON_SCHEMA'):
+        _SCHEMA_VALIDATORS.register(getattr(cts, _schema_name))
+
+def validate_schema(instance, schema:dict):
+    """ Valida o request pelo schema com o validador pré-compilado(levanta jsonschema ValidationError). """
+    _SCHEMA_VALIDATORS.validate(instance, schema)
+
+#---------------------------------------------------------------------------------              
        
 
+class RequestContext:
+    """
+    Request de uma requisição compartilhado pelas checagens(produto, fabricante...):
+    o json decode do body e a validação por cada schema são feitos uma única vez
+    e os resultados(inclusive os erros) são reaproveitados pelas demais checagens.
+    """
+
+    def __init__(self, body:Union[str,dict]):
+        self.__body = body
+        self.__request = None
+        self.__decode_error = ''
+        self.__validations = {}  # id(schema) -> (schema, ValidationError ou None)
+
+    def get_body(self) -> Union[str,dict]:
+        return self.__body
+
+    def get_request(self) -> dict:
+        """ Retorna o json decode(dict) do body(str json encode ou dict), decodificado no primeiro uso. """
+        if self.__request is None:
+            if type(self.__body) is dict:
+                self.__request = self.__body
+            else:
+                # JSON decode do body do request...
+                try:
+                    self.__request = fns.json_decode(self.__body)
+                except Exception as err:
+                    self.__request = {}
+                    self.__decode_error = 'Falha em json decode. [{}]'.format(str(err))
+        return self.__request
+
+    def get_decode_error(self) -> str:
+        self.get_request()
+        return self.__decode_error
+
+    def validate(self, schema:dict):
+        """ Validação do request pelo schema(uma vez por schema). Levanta jsonschema ValidationError. """
+        entry = self.__validations.get(id(schema))
+        if entry is None or entry[0] is not schema:
+            try:
+                validate_schema(instance=self.get_request(), schema=schema)
+                entry = (schema, None)
+            except jsonschema.exceptions.ValidationError as err:
+                entry = (schema, err)
+            self.__validations[id(schema)] = entry
+        if entry[1] is not None:
+            raise entry[1]
+
+
 class CheckRequest(ErrorHandlerClass):
    
-     def __init__(self, http_method: str, body:Union[str,dict], db: DatabaseInterface):
+     def __init__(self, http_method: str, body:Union[str,dict,RequestContext], db: DatabaseInterface):
         super().__init__() 
 
         # Privates...
-        self.__body = body
+        # (Um RequestContext em "body" compartilha o decode/validação com as demais checagens.)
+        self.__context = body if isinstance(body, RequestContext) else RequestContext(body)
         self.__request = {}
         self.__db = db
         self.__http_method = http_method        
@@ -461,13 +1550,15 @@ class CheckRequest(ErrorHandlerClass):
          return self.__http_method
 
      def set_body(self, value: Union[str,dict]):
-         if type(self.__body) is dict:
-             self.__body = value
-         else:   
-             self.__body = value.strip()
+         if type(value) is not dict:
+             value = value.strip()
+         self.__context = RequestContext(value)
      
      def get_body(self) -> Union[str,dict]:
-         return self.__body
+         return self.__context.get_body()
+     
+     def get_context(self) -> RequestContext:
+         return self.__context
      
      def get_db(self):
          return self.__db
@@ -485,34 +1576,127 @@ class CheckRequest(ErrorHandlerClass):
      def check(self) -> bool:
          """ Validação dos atributos do request. """
          pass
+     
+     def validate_schema(self):
+         """ Validação do request pelo schema da checagem. Levanta jsonschema ValidationError. """
+         self.__context.validate(self.get_schema())
 
-     def execute(self):
+     def check_cursor(self) -> bool:
+         """ Confere o cursor da paginação(opcional) do request: token válido e da mesma ordem da listagem. """
+         if 'cursor' in self.__request:
+             try:
+                 cursor = ListingCursor.decode(self.__request['cursor'])
+                 if 'order' in self.__request and self.__request['order'] != cursor.get_order():
+                     self.set_error('Cursor inválido para a ordem "{}".'.format(self.__request['order']))
+             except ValueError as err:
+                 self.set_error(str(err))
+         #
+         return not self.get_error()
+
+     def decode(self) -> bool:
+         """ Consistências e json decode do body(sem a validação do check). """
          # Consistências...
          if self.__http_method not in cts._HTTP_METHODS:
              self.set_error('Método inválido')
          elif self.__db is None:
              self.set_error('A conexão com o banco não foi estabelecida.')
-         elif fns.is_empty(self.__body):
+         elif fns.is_empty(self.get_body()):
              self.set_error('O body/query da requisição está vazio(a).')    
-         elif type(self.__body) is dict:
-             self.__request = self.__body   
+         elif self.__context.get_decode_error():
+             self.set_error(self.__context.get_decode_error())
          else:    
-             # JSON decode do body do request...
-             try:                 
-                 self.__request = json.loads(self.__body)                             
-             except Exception as err:
-                 self.set_error('Falha em json decode. [{}]'.format(str(err)))
+             self.__request = self.__context.get_request()
          #                    
-         # Validação do schema...
-         if not self.get_error():
-            if len(self.__request.keys()) == 0:
-                self.set_error('Requisição vazia.')
-            else:     
-                self.check()                   
+         if not self.get_error() and len(self.__request.keys()) == 0:
+             self.set_error('Requisição vazia.')
+         #
+         return not self.get_error()   
+
+     def execute(self):
+         # Consistências, decode e validação do schema...
+         if self.decode():
+             self.check()                   
          #
          return not self.get_error()   
  
 #---------------------------------------------------------------------------------    
+
+class ListingCursor:
+    """
+    Cursor opaco da paginação por chave(keyset) das listagens: a ordem da listagem e
+    a chave de ordenação e o "id" da última row entregue, em json codificado em base64.
+    A próxima página começa logo após essa row(sem OFFSET), com o "id" desempatando a ordem.
+    """
+
+    def __init__(self, order:str, key, id:int):
+        self.__order = order
+        self.__key = key
+        self.__id = id
+
+    def get_order(self) -> str:
+        return self.__order
+
+    def get_key(self):
+        return self.__key
+
+    def get_id(self) -> int:
+        return self.__id
+
+    def encode(self) -> str:
+        content = json.dumps([self.__order, self.__key, self.__id], separators=(',', ':'))
+        return base64.urlsafe_b64encode(content.encode('utf-8')).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode(token:str):
+        """ Cursor(ListingCursor) do token. Levanta ValueError no token inválido. """
+        try:
+            order, key, id = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode('utf-8'))
+        except Exception as err:
+            raise ValueError('Cursor inválido. [{}]'.format(str(err)))
+        # A chave segue como parâmetro da comparação de tuplas: somente o tipo da coluna da ordem...
+        if (order not in ('id', 'name') or type(id) is not int or (order == 'id' and key != id) or
+            (order == 'name' and type(key) is not str)):
+            raise ValueError('Cursor inválido.')
+        return ListingCursor(order=order, key=key, id=id)
+
+def listing_query(select:str, where:str, order:str, page:int=1, cursor:ListingCursor=None) -> tuple:
+    """
+    SQL e parâmetros de uma listagem paginada, ordenada por "order"(coluna) e desempatada pelo "id".
+    Com o cursor, a página começa após a row do cursor(keyset: latência constante em qualquer
+    profundidade); sem ele, pela página("page", com OFFSET). Busca uma row a mais que o limite, 
+    para saber se existe a próxima página(ver listing_rows()).
+    """
+    order = 'id' if fns.is_empty(order) else order
+    conditions = [where] if where else []
+    pars = {}
+    if cursor is not None:
+        pars['after_id'] = cursor.get_id()
+        if order == 'id':
+            conditions.append('id > %(after_id)s')
+        else:
+            pars['after_key'] = cursor.get_key()
+            conditions.append('(' + order + ', id) > (%(after_key)s, %(after_id)s)')
+    #
+    sql = (select +
+           (' WHERE ' + ' AND '.join(conditions) if conditions else '') +
+           ' ORDER BY ' + (order if order == 'id' else order + ', id') +
+           ' LIMIT ' + fns.to_str(cts._QRY_PAGE_ROWS_LIMIT + 1))
+    if cursor is None and page > 1:
+        sql += ' OFFSET ' + fns.to_str((page - 1) * cts._QRY_PAGE_ROWS_LIMIT)
+    return sql, pars
+
+def listing_rows(rows:list, order:str) -> tuple:
+    """ 
+    Separa a row a mais buscada por listing_query(): retorna as rows da página e o token(str) 
+    do cursor da próxima página(None na última).
+    """
+    if len(rows) <= cts._QRY_PAGE_ROWS_LIMIT:
+        return rows, None
+    rows = rows[:cts._QRY_PAGE_ROWS_LIMIT]
+    order = 'id' if fns.is_empty(order) else order
+    return rows, ListingCursor(order=order, key=rows[-1][order], id=rows[-1]['id']).encode()
+
+#---------------------------------------------------------------------------------    
      
 class CRUDInterface(ErrorHandlerClass):
     """ Interface para CRUD de registros no banco. """
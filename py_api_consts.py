@@ -17,6 +17,98 @@ _HTTP_METHODS = [_GET, _PUT, _POST, _DEL]
 
 # Constantes para queries...
 _QRY_PAGE_ROWS_LIMIT = 50
+_QRY_MAX_IDS_PER_REQUEST = 100    # Máximo de "ids" na consulta de vários produtos num único GET
+
+# Constantes para a exportação(GET com "export") do catálogo de produtos em streaming...
+_EXPORT_NDJSON = 'ndjson'                         # Formato: um produto json por linha
+_EXPORT_NDJSON_MIMETYPE = 'application/x-ndjson'
+_EXPORT_CHUNK_BYTES = 65536                       # Bytes acumulados por envio ao cliente(a primeira linha sai logo)
+
+# Máximo de produtos na inclusão(PUT) em lote de um único request...
+_PUT_BULK_MAX_PRODUCTS = 1000
+
+# Constantes para o pool de conexões com o banco(padrões, sobrescritos pela
+# chave "pool" dos parâmetros de conexão em "db/pg_conn.py")...
+_PG_POOL_MIN_CONN = 1             # Conexões mantidas abertas mesmo ociosas
+_PG_POOL_MAX_CONN = 10            # Limite de conexões abertas por processo
+_PG_POOL_TIMEOUT = 5.0            # Segundos de espera por uma conexão livre
+_PG_POOL_MAX_LIFETIME = 1800.0    # Segundos de vida máxima de uma conexão
+_PG_POOL_MAX_IDLE = 300.0         # Segundos ociosa antes de fechar(acima do mínimo)
+_PG_POOL_HEALTH_CHECK_IDLE = 30.0 # Segundos ociosa antes do teste(SELECT 1) no checkout
+
+# Constantes para o roteamento das leituras para as réplicas(padrões, sobrescritos pela
+# chave "replica_routing" dos parâmetros de conexão em "db/pg_conn.py")...
+_PG_REPLICA_RETRY = 30.0          # Segundos fora da rotação após uma falha da réplica
+_PG_REPLICA_HEALTH_CHECK = 10.0   # Segundos entre as conferências do atraso de replicação
+_PG_REPLICA_MAX_LAG = 5.0         # Atraso máximo(segundos) para a réplica atender leituras
+_PG_READ_YOUR_WRITES = 0.0        # Segundos em que o cliente lê do primário após escrever(0 = desligado)
+_PG_READ_YOUR_WRITES_MAX_CLIENTS = 10000 # Clientes mantidos antes do descarte das janelas vencidas
+
+# Constantes para a invalidação dos caches entre os processos(workers) por LISTEN/NOTIFY(opt-in,
+# ligada pela chave "notify" dos parâmetros de conexão em "db/pg_conn.py")...
+_PG_NOTIFY = False
+_PG_NOTIFY_CHANNEL = 'pyapi_cache'   # Canal das notificações de alteração dos cadastros
+_PG_NOTIFY_POLL = 5.0               # Segundos de espera por notificações a cada volta do listener
+_PG_NOTIFY_RECONNECT = 5.0          # Segundos antes de reconectar o listener após uma falha
+
+# Constantes para o cache de prepared statements(server-side) por conexão(opt-in,
+# ligado pela chave "prepare" dos parâmetros de conexão em "db/pg_conn.py")...
+_PG_PREPARED_STATEMENTS = False
+_PG_PREPARED_STATEMENTS_MAX = 100 # Máximo de planos preparados(LRU) por conexão
+
+# Constantes para as inclusões em lote(insert_many)...
+_PG_INSERT_BATCH_ROWS = 1000      # Rows por INSERT ... VALUES (...), (...)
+_PG_COPY_MIN_ROWS = 10000         # A partir desse total de rows a inclusão usa COPY
+
+# Rows buscadas por ida ao servidor nas consultas em streaming(cursor server-side)...
+_PG_STREAM_ITERSIZE = 2000
+
+# Máximo de SQLs gerados(insert/update/delete/count_all) mantidos no cache de templates...
+_SQL_TEMPLATE_CACHE_MAX = 512
+
+# Banco usado pelo handler: PostgreSQL ou o banco em memória do processo(py_api_memory_db, para os
+# benchmarks sem a latência do banco), pela chave "backend" dos parâmetros de conexão em "db/pg_conn.py"
+# ou pela variável de ambiente abaixo(que tem precedência)...
+_DB_BACKEND_POSTGRES = 'postgres'
+_DB_BACKEND_MEMORY = 'memory'
+_DB_BACKEND = _DB_BACKEND_POSTGRES
+_DB_BACKEND_ENV = 'PYAPI_DB_BACKEND'
+
+# Constantes para a instrumentação das queries(py_api_instrumentation)...
+_QRY_SLOW_SECONDS = 0.5           # Duração a partir da qual a query é logada como lenta(0 = sem log)
+_QRY_STATS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0) # Faixas(s) do histograma
+
+# Constantes para o profiling(cProfile) sob demanda das requisições(py_api_profiling)...
+_PROFILE_SAMPLE_RATE = 0.0               # Fração das requisições perfiladas por amostragem(0 = nenhuma)
+_PROFILE_DIR = '/tmp/pyapi_profiles'     # Pasta dos dumps(.prof), em rotação
+_PROFILE_MAX_FILES = 100                 # Máximo de dumps mantidos na pasta(descarta os mais antigos)
+_PROFILE_TOP = 5                         # Funções(maior tempo próprio) no resumo do header
+_PROFILE_SAMPLE_HEADERS = False          # Resumo nos headers também nas requisições amostradas(não só com o token)
+_PROFILE_TOKEN_HEADER = 'X-Profile-Token'      # Header com o token que liga o profiling da requisição
+_PROFILE_ID_HEADER = 'X-Profile-Id'            # Header da resposta com o nome do dump
+_PROFILE_SUMMARY_HEADER = 'X-Profile-Summary'  # Header da resposta com o resumo das funções
+
+# Headers da resposta da API repassados também no header HTTP...
+_API_HTTP_HEADERS = ('ETag', _PROFILE_ID_HEADER, _PROFILE_SUMMARY_HEADER)
+
+# Intervalo(segundos) da publicação dos contadores dos caches no log "pyapi.cache"(0 = sem publicação)...
+_CACHE_STATS_INTERVAL = 300.0
+
+# Faixas de gerações por cache(invalidações das chaves, para o set() condicional)...
+_CACHE_GENERATION_SLOTS = 4096
+
+# Constantes para o cache em memória(LRU + TTL) dos fabricantes(id -> nome), por processo...
+_MANUFACTURER_CACHE = True           # Liga/desliga o cache
+_MANUFACTURER_CACHE_MAX = 10000      # Máximo de fabricantes mantidos(descarta o usado há mais tempo)
+_MANUFACTURER_CACHE_TTL = 300.0      # Segundos de validade de cada fabricante no cache(0 = sem validade)
+
+# Constantes para o cache dos ETags dos detalhes de produto(id -> ETag), por processo...
+_PRODUCT_ETAG_CACHE = True           # Liga/desliga o cache(sem ele o If-None-Match ainda evita o body)
+_PRODUCT_ETAG_CACHE_MAX = 50000      # Máximo de produtos mantidos(descarta o usado há mais tempo)
+_PRODUCT_ETAG_CACHE_TTL = 60.0       # Segundos de validade de cada ETag(limita o atraso entre os processos)
+
+# Validação dos requests por funções geradas em código(requer o pacote opcional fastjsonschema)...
+_SCHEMA_FAST_VALIDATOR = False
 
 # Schema validador de json esperado nos requests de inclusão(PUT) de produto...
 _INSERT_PRODUCT_JSON_SCHEMA = { 
@@ -38,6 +130,18 @@ _INSERT_PRODUCT_JSON_SCHEMA = {
        "required": ["name","description","barcode","manufacturer","unitPrice"]       
 } 
 
+# Schema validador de json esperado nos requests de inclusão(PUT) de produtos em lote. Cada
+# produto de "products" é validado por _INSERT_PRODUCT_JSON_SCHEMA. Com "atomic"(padrão) todos 
+# os produtos são incluídos ou nenhum; sem ele os produtos inválidos são ignorados...
+_BULK_INSERT_PRODUCT_JSON_SCHEMA = { 
+       "type": "object",
+       "properties": {
+            "products": {"type":"array", "items": {"type":"object"}, "minItems": 1, "maxItems": _PUT_BULK_MAX_PRODUCTS},
+            "atomic": {"type":"boolean"}
+       },    
+       "required": ["products"]       
+} 
+
 # Schema validador de json esperado nos requests de alteração(POST) de produto...
 _UPDATE_PRODUCT_JSON_SCHEMA = { 
        "type": "object",
@@ -72,8 +176,16 @@ _GET_PRODUCT_JSON_SCHEMA = {
        "type": "object",
        "properties": {
             "id": {"type":"string", "pattern": "^[0-9]+$"},
+            "ids": {
+                 "anyOf": [
+                     {"type":"string", "pattern": "^[0-9]+(,[0-9]+)*$"},   # Query string: "1,2,3"
+                     {"type":"array", "items": {"type":"integer", "minimum": 1}, "minItems": 1, "maxItems": _QRY_MAX_IDS_PER_REQUEST}
+                 ]
+            },
             "page": {"type":"string", "pattern": "^[0-9]+$"},
-            "order": {"type":"string", "enum": ["id","name"]}
+            "cursor": {"type":"string", "pattern": "^[A-Za-z0-9_-]+$"},
+            "order": {"type":"string", "enum": ["id","name"]},
+            "export": {"type":"string", "enum": [_EXPORT_NDJSON]}
        },
        "required": []         
 }   
@@ -86,6 +198,7 @@ _GET_MANUFACTURER_JSON_SCHEMA = {
        "properties": {
             "id": {"type":"string", "pattern": "^[0-9]+$"},
             "page": {"type":"string", "pattern": "^[0-9]+$"},
+            "cursor": {"type":"string", "pattern": "^[A-Za-z0-9_-]+$"},
             "order": {"type":"string", "enum": ["id","name"]}
        },
        "required": []         
@@ -3,8 +3,16 @@
 # *------------------------------------------------------------------*
 
 import json
+import decimal
+import hashlib
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    # Dependência opcional(json encode/decode mais rápido)...
+    orjson = None
+
 def is_empty(v) -> bool:
     """Retorna True quando "v" estiver vazia(o) ou não inicializado, conforme seu tipo."""
     tip = type(v)
@@ -82,6 +90,42 @@ def get_cmd_arg(args:list, argname:str, default=None):
     #           
     return ret
 
+def json_default(value):
+    """ Conversão dos tipos não suportados pelo json encode(Ex: numeric do banco como Decimal). """
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    raise TypeError('Tipo "{}" não serializável em json.'.format(type(value).__name__))
+
+def json_encode(value) -> bytes:
+    """ Json encode(bytes UTF-8), com o orjson quando instalado. """
+    if orjson is not None:
+        return orjson.dumps(value, default=json_default)
+    return json.dumps(value, default=json_default, ensure_ascii=False).encode('utf-8')
+
+def json_decode(value):
+    """ Json decode de str/bytes, com o orjson quando instalado. """
+    if orjson is not None:
+        return orjson.loads(value)
+    return json.loads(value)
+
+def etag(value) -> str:
+    """ 
+    ETag forte(entre aspas) do conteúdo: hash do json encode canônico(chaves ordenadas), 
+    o mesmo em todos os processos com ou sem o orjson. 
+    """
+    content = json.dumps(value, default=json_default, sort_keys=True, separators=(',', ':'))
+    return '"' + hashlib.sha1(content.encode('utf-8')).hexdigest() + '"'
+
+def etag_matches(if_none_match:str, etag:str) -> bool:
+    """ Retorna True quando o header If-None-Match("*" ou lista de ETags) contém o ETag. """
+    if is_empty(if_none_match) or is_empty(etag):
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # Comparação fraca(RFC 7232): o prefixo "W/" é ignorado...
+    tags = [t.strip() for t in if_none_match.split(',')]
+    return etag in [t[2:] if t.startswith('W/') else t for t in tags]
+
 def hoje(fmt='%d/%m/%Y'):
     '''Retorna a data atual no formato em "fmt".'''
     return datetime.now().strftime(fmt)
@@ -0,0 +1,357 @@
+# coding:utf-8
+
+#--------------------------------------------------------------------
+# Importação em massa do catálogo de produtos(CSV ou NDJSON) de
+# fornecedores: COPY do arquivo para uma tabela temporária(staging),
+# validação das regras de _INSERT_PRODUCT_JSON_SCHEMA em um único
+# UPDATE e inclusão dos fabricantes, produtos e associações em poucos
+# comandos set-based, tudo numa única transação.
+#--------------------------------------------------------------------
+# Executa no banco configurado em "db/pg_conn.py":
+#    $ python3 py_api_import.py --file=catalogo.csv --env=devel
+#    --file:      Arquivo CSV(com cabeçalho) ou NDJSON(um produto json por linha)
+#    --format:    "csv" ou "ndjson"(default pela extensão do arquivo)
+#    --delimiter: Separador das colunas do CSV(default ",")
+#    --env:       "devel" ou "production"(default devel)
+#    --rejects:   Arquivo CSV, opcional, para os registros rejeitados e os motivos
+#    --dry-run:   Somente valida(a transação é desfeita no final)
+# As colunas do CSV são os atributos do schema("name", "description", "barcode",
+# "manufacturer.id", "manufacturer.name" e "unitPrice"; ou "manufacturer_id"...).
+#--------------------------------------------------------------------
+
+import sys
+import csv
+import json
+import time
+
+from pathlib import Path
+
+import py_api_consts as cts
+import py_api_classes as cls
+import py_api_functions as fns
+
+# Tabela temporária da importação(descartada no final da transação)...
+_STAGING = 'product_import'
+
+# Regex dos valores numéricos aceitos nas colunas "number" do schema...
+_SQL_NUMERIC = "'^[+-]?([0-9]+[.]?[0-9]*|[.][0-9]+)([eE][+-]?[0-9]+)?$'"
+
+# Fabricantes já cadastrados(pelo nome normalizado) são resolvidos depois, pelo mesmo índice único...
+_SQL_MANUFACTURER_SKIP = 'ON CONFLICT ((lower(btrim(name)))) DO NOTHING'
+
+# Tipos json(NDJSON) aceitos pelos tipos do schema...
+_JSON_TYPES = {'string': (str,), 'number': (int, float)}
+
+# Registros rejeitados listados no relatório(todos no arquivo de "--rejects")...
+_REJECTS_SHOWN = 20
+
+
+def schema_columns(schema:dict, prefix:str='') -> list:
+    """
+    Colunas da staging pelos atributos do schema: [(atributo, coluna, schema do atributo)].
+    Os atributos dos objetos são achatados("manufacturer.id" -> "manufacturer_id") e o "id"
+    do produto é ignorado, como no PUT(PK auto-incremento).
+    """
+    columns = []
+    for attr, prop in schema['properties'].items():
+        if prefix == '' and attr == 'id':
+            continue
+        label = prefix + '.' + attr if prefix else attr
+        if prop['type'] == 'object':
+            columns += schema_columns(prop, prefix=label)
+        else:
+            columns.append((label, label.replace('.', '_').lower(), prop))
+    return columns
+
+def schema_checks(schema:dict, prefix:str='') -> list:
+    """
+    Regras do schema como condições SQL sobre a staging: [(condição de registro inválido, mensagem)],
+    na ordem em que são avaliadas(a conversão numérica somente após a conferência do formato).
+    """
+    checks = []
+    required = schema.get('required', [])
+    for attr, prop in schema['properties'].items():
+        if prefix == '' and attr == 'id':
+            continue
+        label = prefix + '.' + attr if prefix else attr
+        column = label.replace('.', '_').lower()
+        if prop['type'] == 'object':
+            if attr in required:
+                # Objeto informado: ao menos um dos atributos(Ex: "id" ou "name" do fabricante)...
+                nulls = ' AND '.join(c[1] + ' IS NULL' for c in schema_columns(prop, prefix=label))
+                checks.append((nulls, '"{}" não informado(Informe o "id" ou o "name" ou ambos).'.format(label)))
+            checks += schema_checks(prop, prefix=label)
+            continue
+        if attr in required:
+            checks.append((column + ' IS NULL', '"{}" não informado.'.format(label)))
+        if prop['type'] == 'string':
+            if 'minLength' in prop:
+                checks.append(('char_length({}) < {}'.format(column, prop['minLength']),
+                               '"{}" com menos de {} caracteres.'.format(label, prop['minLength'])))
+            if 'maxLength' in prop:
+                checks.append(('char_length({}) > {}'.format(column, prop['maxLength']),
+                               '"{}" com mais de {} caracteres.'.format(label, prop['maxLength'])))
+        elif prop['type'] == 'number':
+            checks.append(('{} !~ {}'.format(column, _SQL_NUMERIC), '"{}" não numérico.'.format(label)))
+            if 'minimum' in prop:
+                checks.append(('{}::numeric < {}'.format(column, prop['minimum']),
+                               '"{}" menor que {}.'.format(label, prop['minimum'])))
+            if 'maximum' in prop:
+                checks.append(('{}::numeric > {}'.format(column, prop['maximum']),
+                               '"{}" maior que {}.'.format(label, prop['maximum'])))
+    return checks
+
+
+class ImportProducts(cls.ErrorHandlerClass):
+    """
+    Importação em massa de produtos pelo schema de inclusão(PUT). Os registros inválidos
+    são rejeitados(com o motivo na staging) e os demais incluídos. Com o "id" do fabricante
+    informado o "name" é ignorado: a importação não altera os fabricantes cadastrados.
+    """
+
+    def __init__(self, db:cls.DBPostgres, schema:dict=cts._INSERT_PRODUCT_JSON_SCHEMA):
+        super().__init__()
+        #
+        self.__db = db
+        self.__schema = schema
+        self.__columns = schema_columns(schema)
+        self.__timings = {}   # Fase -> segundos
+        self.__counts = {'read': 0, 'rejected': 0, 'manufacturers': 0, 'products': 0}
+
+    def get_db(self) -> cls.DBPostgres:
+        return self.__db
+
+    def get_columns(self) -> list:
+        return self.__columns
+
+    def get_timings(self) -> dict:
+        return self.__timings
+
+    def get_counts(self) -> dict:
+        return self.__counts
+
+    def run(self, phase:str, sql:str, pars:dict=None) -> bool:
+        """ Executa um comando da importação, acumulando a duração na fase. """
+        start = time.perf_counter()
+        if not self.__db.query(sql=sql, pars=pars or {}, commit=False):
+            self.set_error('Falha na importação({}). [{}]'.format(phase, self.__db.get_error_message()))
+        self.__timings[phase] = self.__timings.get(phase, 0.0) + time.perf_counter() - start
+        return not self.get_error()
+
+    def create_staging(self) -> bool:
+        """ Staging com os valores em texto: as conversões são conferidas na validação. """
+        return self.run('load', 'CREATE TEMP TABLE ' + _STAGING + ' ('+
+                                   'line serial, error text, manufacturer_ref bigint, product_id bigint, '+
+                                   ', '.join(c[1] + ' text' for c in self.__columns) +
+                                ') ON COMMIT DROP')
+
+    def get_csv_columns(self, header:list) -> list:
+        """ Colunas da staging na ordem do cabeçalho do CSV(pelo atributo ou pelo nome da coluna). """
+        names = {}
+        for label, column, prop in self.__columns:
+            names[label.lower()] = column
+            names[column] = column
+        columns = []
+        for name in header:
+            column = names.get(name.strip().lower())
+            if column is None:
+                self.set_error('Coluna "{}" do CSV não existe no schema de inclusão de produtos.'.format(name))
+            columns.append(column)
+        return columns
+
+    def copy(self, columns:list, file, options:str) -> bool:
+        start = time.perf_counter()
+        if not self.__db.copy_expert('COPY ' + _STAGING + ' (' + ','.join(columns) + ') FROM STDIN WITH (' + options + ')', file):
+            self.set_error('Falha na importação(load). [{}]'.format(self.__db.get_error_message()))
+        self.__timings['load'] = self.__timings.get('load', 0.0) + time.perf_counter() - start
+        return not self.get_error()
+
+    def load_csv(self, file, delimiter:str=',') -> bool:
+        """ COPY do CSV, sem conversões em Python: o arquivo segue direto para o servidor. """
+        header = next(csv.reader([file.readline()], delimiter=delimiter), [])
+        columns = self.get_csv_columns(header)
+        if not self.get_error():
+            self.copy(columns, file, "FORMAT csv, DELIMITER '" + delimiter.replace("'", "''") + "'")
+        return not self.get_error()
+
+    def ndjson_rows(self, file):
+        """ Generator das rows da staging pelas linhas NDJSON(as inválidas seguem com o erro). """
+        for line in file:
+            if line.strip() == '':
+                continue
+            row = {c[1]: None for c in self.__columns}
+            row['error'] = None
+            try:
+                product = json.loads(line)
+                if type(product) is not dict:
+                    raise ValueError('o produto não é um objeto json')
+            except ValueError as error:
+                row['error'] = 'Json inválido. [{}]'.format(error)
+                yield row
+                continue
+            for label, column, prop in self.__columns:
+                value = product
+                for attr in label.split('.'):
+                    value = value.get(attr) if type(value) is dict else None
+                if value is None:
+                    continue
+                if type(value) is bool or not isinstance(value, _JSON_TYPES.get(prop['type'], (object,))):
+                    row['error'] = row['error'] or '"{}" com tipo inválido(esperado {}).'.format(label, prop['type'])
+                row[column] = value
+            yield row
+
+    def load_ndjson(self, file) -> bool:
+        """ COPY das linhas NDJSON, achatadas pelo schema e convertidas em CSV sob demanda. """
+        columns = ['error'] + [c[1] for c in self.__columns]
+        return self.copy(columns, cls.PGCopyReader(rows=self.ndjson_rows(file), columns=columns), 'FORMAT csv')
+
+    def validate(self) -> bool:
+        """ Regras do schema e existência dos fabricantes informados pelo "id", set-based. """
+        if self.run('validate', 'ANALYZE ' + _STAGING):
+            # Um único UPDATE: o motivo é a primeira regra violada...
+            checks = schema_checks(self.__schema)
+            cases = ' '.join('WHEN {} THEN %(e{})s'.format(c[0], i) for i, c in enumerate(checks))
+            self.run('validate', 'UPDATE ' + _STAGING + ' SET error = CASE ' + cases + ' END WHERE error IS NULL',
+                     {'e' + str(i): c[1] for i, c in enumerate(checks)})
+        if not self.get_error():
+            self.run('validate', 'UPDATE ' + _STAGING + ' s SET manufacturer_ref = m.id '+
+                                 'FROM manufacturer m '+
+                                 'WHERE s.error IS NULL AND s.manufacturer_id IS NOT NULL '+
+                                   'AND m.id = s.manufacturer_id::numeric')
+        if not self.get_error():
+            self.run('validate', 'UPDATE ' + _STAGING + ' SET error = %(error)s '+
+                                 'WHERE error IS NULL AND manufacturer_id IS NOT NULL AND manufacturer_ref IS NULL',
+                     {'error': 'Fabricante não cadastrado(manufacturer.id).'})
+        if not self.get_error() and self.run('validate', 'SELECT count(*) AS read, count(error) AS rejected FROM ' + _STAGING):
+            self.__counts['read'] = self.__db.get_rows()[0]['read']
+            self.__counts['rejected'] = self.__db.get_rows()[0]['rejected']
+        return not self.get_error()
+
+    def merge(self) -> bool:
+        """ Inclusão dos fabricantes novos(upsert pelo nome), dos produtos e das associações. """
+        # Fabricantes pelo nome(o primeiro de cada nome normalizado), resolvidos pelo índice único...
+        if self.run('merge', 'INSERT INTO manufacturer (name) '+
+                             'SELECT DISTINCT ON (lower(btrim(manufacturer_name))) manufacturer_name FROM ' + _STAGING + ' '+
+                             'WHERE error IS NULL AND manufacturer_ref IS NULL '+
+                             'ORDER BY lower(btrim(manufacturer_name)), line ' + _SQL_MANUFACTURER_SKIP):
+            self.__counts['manufacturers'] = self.__db.get_row_count()
+        if not self.get_error():
+            self.run('merge', 'UPDATE ' + _STAGING + ' s SET manufacturer_ref = m.id '+
+                              'FROM manufacturer m '+
+                              'WHERE s.error IS NULL AND s.manufacturer_ref IS NULL '+
+                                'AND lower(btrim(m.name)) = lower(btrim(s.manufacturer_name))')
+        if not self.get_error():
+            self.merge_products()
+        if not self.get_error():
+            self.run('merge', 'INSERT INTO productmanufacturer (product_id, manufacturer_id, active) '+
+                              'SELECT product_id, manufacturer_ref, %(active)s FROM ' + _STAGING + ' '+
+                              'WHERE error IS NULL ORDER BY line', {'active': cts._YES})
+        return not self.get_error()
+
+    def merge_products(self) -> bool:
+        """
+        Inclusão dos produtos, com o "id" de cada um na staging para as associações. Os "ids" são
+        reservados na sequence da coluna(como no insert_many por COPY); com a sequence não vinculada
+        (OWNED BY) à coluna, o pg_get_serial_sequence() retorna NULL e os produtos são incluídos pelo
+        DEFAULT da coluna, com os "ids" do RETURNING associados aos registros na ordem do "line".
+        """
+        fields = [c[1] for c in self.__columns if not c[1].startswith('manufacturer_')]
+        casts = [c + ('::numeric' if p['type'] == 'number' else '') for label, c, p in self.__columns if c in fields]
+        if not self.run('merge', "SELECT pg_get_serial_sequence('product', 'id') AS sequence"):
+            return False
+        if self.__db.get_rows()[0]['sequence'] is not None:
+            if self.run('merge', "UPDATE " + _STAGING + " SET product_id = nextval(pg_get_serial_sequence('product', 'id')) "+
+                                 "WHERE error IS NULL"):
+                if self.run('merge', 'INSERT INTO product (id, active, ' + ', '.join(fields) + ') '+
+                                     'SELECT product_id, %(active)s, ' + ', '.join(casts) + ' FROM ' + _STAGING + ' '+
+                                     'WHERE error IS NULL ORDER BY line', {'active': cts._YES}):
+                    self.__counts['products'] = self.__db.get_row_count()
+        else:
+            # Os "ids" do DEFAULT crescem na ordem da inclusão(ORDER BY line): o n-ésimo "id" é o do n-ésimo registro...
+            if self.run('merge', 'WITH inserted AS ('+
+                                     'INSERT INTO product (active, ' + ', '.join(fields) + ') '+
+                                     'SELECT %(active)s, ' + ', '.join(casts) + ' FROM ' + _STAGING + ' '+
+                                     'WHERE error IS NULL ORDER BY line RETURNING id), '+
+                                 'ids AS (SELECT id, row_number() OVER (ORDER BY id) AS n FROM inserted), '+
+                                 'lines AS (SELECT line, row_number() OVER (ORDER BY line) AS n FROM ' + _STAGING + ' '+
+                                     'WHERE error IS NULL) '+
+                                 'UPDATE ' + _STAGING + ' s SET product_id = ids.id '+
+                                 'FROM lines INNER JOIN ids ON ids.n = lines.n '+
+                                 'WHERE s.line = lines.line', {'active': cts._YES}):
+                self.__counts['products'] = self.__db.get_row_count()
+        return not self.get_error()
+
+    def get_rejects(self, limit:int=_REJECTS_SHOWN) -> list:
+        """ Primeiros registros rejeitados: [(registro, motivo)]. """
+        self.run('report', 'SELECT line, error FROM ' + _STAGING + ' WHERE error IS NOT NULL ORDER BY line LIMIT %(limit)s',
+                 {'limit': limit})
+        return [(r['line'], r['error']) for r in self.__db.get_rows()] if not self.get_error() else []
+
+    def save_rejects(self, file) -> bool:
+        """ Registros rejeitados(com os valores recebidos) em CSV. """
+        columns = ', '.join(c[1] for c in self.__columns)
+        if not self.__db.copy_expert('COPY (SELECT line, error, ' + columns + ' FROM ' + _STAGING + ' '+
+                                     'WHERE error IS NOT NULL ORDER BY line) TO STDOUT WITH (FORMAT csv, HEADER true)', file):
+            self.set_error('Falha na gravação dos rejeitados. [{}]'.format(self.__db.get_error_message()))
+        return not self.get_error()
+
+
+def report(import_products:ImportProducts, elapsed:float):
+    counts, timings = import_products.get_counts(), import_products.get_timings()
+    print('{:<12} {:>10} registros'.format('Lidos', counts['read']))
+    print('{:<12} {:>10} registros'.format('Rejeitados', counts['rejected']))
+    print('{:<12} {:>10} fabricantes novos'.format('Incluídos', counts['manufacturers']))
+    print('{:<12} {:>10} produtos'.format('Incluídos', counts['products']))
+    for phase in ('load', 'validate', 'merge'):
+        seconds = timings.get(phase, 0.0)
+        print('{:<12} {:>10.3f}s  {:>12.0f} rows/s'.format(phase, seconds, counts['read'] / seconds if seconds else 0))
+    print('{:<12} {:>10.3f}s  {:>12.0f} rows/s'.format('Total', elapsed, counts['read'] / elapsed if elapsed else 0))
+
+if __name__ == '__main__':
+    file_name = fns.get_cmd_arg(sys.argv, '--file', default='')
+    file_format = fns.get_cmd_arg(sys.argv, '--format', default=Path(file_name).suffix.lstrip('.').lower())
+    delimiter = fns.get_cmd_arg(sys.argv, '--delimiter', default=',')
+    env = fns.get_cmd_arg(sys.argv, '--env', default='devel')
+    rejects = fns.get_cmd_arg(sys.argv, '--rejects', default='')
+    dry_run = '--dry-run' in sys.argv
+    if file_name == '' or file_format not in ('csv', 'ndjson', 'jsonl'):
+        print('Informe o arquivo(--file) CSV ou NDJSON(--format=csv|ndjson).')
+        sys.exit(1)
+    #
+    from db.pg_conn import _PG_CONNECTION
+    db = cls.DBPostgres()
+    if not db.connect(conn_pars=_PG_CONNECTION[env]):
+        print(db.get_error_message())
+        sys.exit(1)
+    #
+    start = time.perf_counter()
+    import_products = ImportProducts(db=db)
+    try:
+        db.start_transaction()
+        with open(file_name, encoding='utf-8', newline='') as file:
+            if import_products.create_staging():
+                if file_format == 'csv':
+                    import_products.load_csv(file, delimiter=delimiter)
+                else:
+                    import_products.load_ndjson(file)
+        if not import_products.get_error() and import_products.validate() and not dry_run:
+            import_products.merge()
+        if not import_products.get_error():
+            for line, error in import_products.get_rejects():
+                print('Registro {}: {}'.format(line, error))
+            if rejects != '':
+                with open(rejects, 'w', encoding='utf-8', newline='') as file:
+                    import_products.save_rejects(file)
+        #
+        if import_products.get_error():
+            print(import_products.get_error_message())
+            db.rollback()
+        elif dry_run:
+            db.rollback()
+        elif not db.commit():
+            print(db.get_error_message())
+        report(import_products, time.perf_counter() - start)
+    finally:
+        db.close_connection()
+    #
+    sys.exit(1 if import_products.get_error() or db.get_error() else 0)
@@ -0,0 +1,170 @@
+#--------------------------------------------------------------------
+# Instrumentação das queries executadas no banco: tempos(histograma),
+# total de rows, fingerprint do SQL e origem(facade), log das queries
+# lentas e hooks para repassar os dados a outros sistemas.
+# --> Desligada por padrão(custo de uma checagem por query). Ligue com
+#     a variável de ambiente PYAPI_QUERY_STATS=1 ou com configure().
+#--------------------------------------------------------------------
+
+import os
+import re
+import logging
+import threading
+import functools
+
+import py_api_consts as cts
+
+# Logger das queries lentas...
+logger = logging.getLogger('pyapi.queries')
+
+# Regras de normalização do SQL para o fingerprint(na ordem)...
+_FINGERPRINT_RULES = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),                      # Literais string
+    (re.compile(r'%\([^)]+\)s|%s|\$\d+'), '?'),                # Parâmetros
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),                   # Literais numéricos(LIMIT/OFFSET...)
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)'), '(?+)'),       # Listas: IN (...) e VALUES (...)
+    (re.compile(r'(?:\(\?\+\)\s*,\s*)+\(\?\+\)'), '(?+)'),     # Várias rows no VALUES
+    (re.compile(r'\s+'), ' ')
+]
+
+@functools.lru_cache(maxsize=cts._SQL_TEMPLATE_CACHE_MAX)
+def sql_fingerprint(sql:str) -> str:
+    """
+    Texto normalizado do SQL: sem valores literais/parâmetros e com os espaços
+    compactados, para agrupar as execuções da mesma query(Ex: todas as páginas
+    de uma listagem).
+    """
+    fingerprint = sql.strip().rstrip(';')
+    for rule, replacement in _FINGERPRINT_RULES:
+        fingerprint = rule.sub(replacement, fingerprint)
+    return fingerprint.strip().lower()
+
+def pars_shape(pars) -> object:
+    """ Formato dos parâmetros(nomes e tipos, sem os valores) para o log das queries lentas. """
+    if type(pars) is dict:
+        return {k: type(v).__name__ for k, v in pars.items()}
+    if type(pars) in (list, tuple):
+        return [type(v).__name__ for v in pars]
+    return type(pars).__name__
+
+class QueryStats:
+    """
+    Estatísticas das queries do processo(thread-safe), por fingerprint e origem:
+    total de execuções, de erros e de rows, tempos total/mínimo/máximo e um histograma
+    de durações com os limites(segundos) de cts._QRY_STATS_BUCKETS.
+    """
+
+    def __init__(self, enabled:bool=False, slow_seconds:float=cts._QRY_SLOW_SECONDS):
+        self.__enabled = enabled
+        self.__slow_seconds = slow_seconds
+        self.__buckets = tuple(cts._QRY_STATS_BUCKETS)
+        self.__hooks = []
+        self.__lock = threading.Lock()
+        self.__stats = {}
+
+    def get_enabled(self) -> bool:
+        return self.__enabled
+
+    def set_enabled(self, value:bool):
+        self.__enabled = bool(value)
+
+    def get_slow_seconds(self) -> float:
+        return self.__slow_seconds
+
+    def set_slow_seconds(self, value:float):
+        """ Duração(segundos) a partir da qual a query é logada como lenta(0 = sem log). """
+        self.__slow_seconds = float(value)
+
+    def add_hook(self, hook):
+        """
+        Registra uma função chamada a cada query com um dict: sql, fingerprint, source,
+        duration, rows, error e slow. Exceptions do hook são logadas e ignoradas.
+        """
+        with self.__lock:
+            self.__hooks = self.__hooks + [hook]
+
+    def remove_hook(self, hook):
+        with self.__lock:
+            self.__hooks = [h for h in self.__hooks if h is not hook]
+
+    def record(self, sql:str, pars, duration:float, rows:int, source:str='', error:bool=False):
+        """ Registra a execução de uma query. """
+        fingerprint = sql_fingerprint(sql)
+        key = (fingerprint, source)
+        with self.__lock:
+            stats = self.__stats.get(key)
+            if stats is None:
+                stats = {
+                    'fingerprint': fingerprint,
+                    'source': source,
+                    'count': 0,
+                    'errors': 0,
+                    'rows': 0,
+                    'total': 0.0,
+                    'min': duration,
+                    'max': duration,
+                    'histogram': [0] * (len(self.__buckets) + 1)  # O último é o "+Inf"
+                }
+                self.__stats[key] = stats
+            stats['count'] += 1
+            stats['errors'] += 1 if error else 0
+            stats['rows'] += rows
+            stats['total'] += duration
+            stats['min'] = min(stats['min'], duration)
+            stats['max'] = max(stats['max'], duration)
+            b = 0
+            while b < len(self.__buckets) and duration > self.__buckets[b]:
+                b += 1
+            stats['histogram'][b] += 1
+            hooks = self.__hooks
+        #
+        slow = self.__slow_seconds > 0 and duration >= self.__slow_seconds
+        if slow:
+            logger.warning('Query lenta: %.3fs, %s rows, origem "%s": %s | parâmetros: %s',
+                           duration, rows, source, fingerprint, pars_shape(pars))
+        if hooks:
+            event = {
+                'sql': sql,
+                'fingerprint': fingerprint,
+                'source': source,
+                'duration': duration,
+                'rows': rows,
+                'error': error,
+                'slow': slow
+            }
+            for hook in hooks:
+                try:
+                    hook(event)
+                except Exception:
+                    logger.exception('Falha no hook de instrumentação de queries.')
+
+    def get_stats(self) -> list:
+        """
+        Retorna uma cópia das estatísticas(lista de dicts, do maior tempo total para o menor).
+        O "histogram" traz as contagens por faixa: "le"(limite superior, None = +Inf) e "count".
+        """
+        with self.__lock:
+            stats = [dict(s, histogram=list(s['histogram'])) for s in self.__stats.values()]
+        for s in stats:
+            s['avg'] = s['total'] / s['count'] if s['count'] else 0.0
+            s['histogram'] = [{'le': le, 'count': c} for le, c in zip(list(self.__buckets) + [None], s['histogram'])]
+        return sorted(stats, key=lambda s: s['total'], reverse=True)
+
+    def reset(self):
+        with self.__lock:
+            self.__stats = {}
+
+
+# Estatísticas do processo...
+_QUERY_STATS = QueryStats(enabled=(os.environ.get('PYAPI_QUERY_STATS') == '1'))
+
+def get_query_stats() -> QueryStats:
+    return _QUERY_STATS
+
+def configure(enabled:bool=None, slow_seconds:float=None) -> QueryStats:
+    """ Liga/desliga a instrumentação e/ou define o limite das queries lentas. """
+    if enabled is not None:
+        _QUERY_STATS.set_enabled(enabled)
+    if slow_seconds is not None:
+        _QUERY_STATS.set_slow_seconds(slow_seconds)
+    return _QUERY_STATS
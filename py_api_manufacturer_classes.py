@@ -7,11 +7,47 @@ import json
 import jsonschema
 
 from typing import Union
-from jsonschema import validate
 
 import py_api_consts as cts
 import py_api_classes as cls          
 import py_api_functions as fns               
+import py_api_cache as cache
+import py_api_notify as notify
+import py_api_product_classes as prod
+
+# SQLs das checagens de fabricante...
+_SQL_MANUFACTURER_NAME = 'SELECT name FROM manufacturer WHERE id = %(id)s'
+_SQL_PRODUCT_MANUFACTURER = 'SELECT manufacturer_id FROM productmanufacturer WHERE product_id = %(id)s AND active = %(active)s'
+_SQL_MANUFACTURER_NAMES = 'SELECT id, name FROM manufacturer WHERE id = ANY(%(ids)s)'
+
+# Upsert do fabricante pelo nome normalizado(índice único "manufacturer_name_key" - Ver 
+# "db/migrations/001_manufacturer_unique_name.sql"): inclui ou, se o nome já existe, retorna 
+# o fabricante cadastrado(o UPDATE sem alteração é o que faz o RETURNING devolver a row existente)...
+_SQL_MANUFACTURER_UPSERT = 'ON CONFLICT ((lower(btrim(name)))) DO UPDATE SET name = manufacturer.name'
+
+def normalize_name(name:str) -> str:
+    """ Nome do fabricante normalizado como no índice único: lower(btrim(name)). """
+    return name.strip(' ').lower()
+
+# Cache dos fabricantes(id -> nome) do processo: preenchido pelas consultas e atualizado
+# pelas inclusões/alterações após o commit...
+_MANUFACTURER_NAMES = cache.get_cache(  name='manufacturer', 
+                                        max_size=cts._MANUFACTURER_CACHE_MAX, 
+                                        ttl=cts._MANUFACTURER_CACHE_TTL, 
+                                        enabled=cts._MANUFACTURER_CACHE
+                                     )
+
+def get_manufacturer_cache() -> cache.LRUTTLCache:
+    return _MANUFACTURER_NAMES
+
+def on_manufacturer_changed(manufacturer_id, op:str):
+    """ Alteração de fabricante em outro processo(NOTIFY) - Invalida o nome e os ETags dos produtos. """
+    _MANUFACTURER_NAMES.delete(manufacturer_id)
+    if op != 'insert':
+        prod.get_product_etag_cache().clear()
+
+notify.register_handler('manufacturer', on_manufacturer_changed)
+notify.register_handler('productmanufacturer', lambda product_id, op: prod.get_product_etag_cache().delete(product_id))
 
 class CheckManufacturerPUTRequest(cls.CheckRequest):
     """
@@ -21,8 +57,8 @@ class CheckManufacturerPUTRequest(cls.CheckRequest):
     específica no método "execute".
     """
     
-    def __init__(self, body:Union[str,dict], db: cls.DatabaseInterface):
-        super().__init__(httpMethod=cts._PUT, body=body, db=db) 
+    def __init__(self, body:Union[str,dict,cls.RequestContext], db: cls.DatabaseInterface):
+        super().__init__(http_method=cts._PUT, body=body, db=db) 
                 
         self.__manufacturer_id = 0
         self.__manufacturer_name = ""
@@ -30,6 +66,8 @@ class CheckManufacturerPUTRequest(cls.CheckRequest):
         self.__insert_manufacturer = False  
         self.__update_manufacturer = False                  
         
+        self.__lookup_id = None
+        
         self.__schema = cts._INSERT_PRODUCT_JSON_SCHEMA 
         
     def get_schema(self) -> dict:        
@@ -48,17 +86,42 @@ class CheckManufacturerPUTRequest(cls.CheckRequest):
     def get_manufacturer_id(self):
         return self.__manufacturer_id 
         
+    def set_manufacturer_name(self, value:str):
+        self.__manufacturer_name = value
     def get_manufacturer_name(self):
         return self.__manufacturer_name 
+    
+    def get_lookup_id(self):
+        """ "id" do fabricante cuja existência deve ser conferida no cadastro(ou None). """
+        return self.__lookup_id
             
     def check(self):
         """ Implementação da validação dos atributos do request. """
+        if self.check_request() and self.__lookup_id is not None and not self.check_cached_lookup():
+            # Fabricante já deveria estar cadastrado - Verifica...
+            # (O SQL também seria automático com a utilização de um dicionário de dados ou framework.)
+            self.get_db().query(  sql=_SQL_MANUFACTURER_NAME,
+                                  pars={ 
+                                          'id': self.__lookup_id
+                                       },
+                                  commit=False                                              
+                               )                          
+            self.check_lookup(self.get_db())
+        #                        
+        return not self.get_error()         
+    
+    def check_request(self) -> bool:
+        """ 
+        Validação do request pelo schema e dos atributos do fabricante, sem acesso ao banco.
+        Quando o "id" do fabricante é informado, ele é reservado em get_lookup_id() para
+        a conferência no cadastro(check_lookup).
+        """
         super().check()
         #
         if not self.get_error():
             # Validação do request pelo schema...
             try:
-                validate(instance=self.get_request(), schema=self.get_schema())
+                self.validate_schema()
             except jsonschema.exceptions.ValidationError as err:
                 self.set_error('Request com schema inválido. [{}]'.format(err.message))     
             #
@@ -72,26 +135,8 @@ class CheckManufacturerPUTRequest(cls.CheckRequest):
                      # Verifica a existência cadastral do fabricante do produto pela
                      # presença do atributo "id" do fabricante...
                      if 'id' in self.get_request()['manufacturer'].keys():
-                          # Fabricante já deveria estar cadastrado - Verifica...
-                          # (O SQL também seria automático com a utilização de um dicionário de dados ou framework.)
-                          self.get_db().query(  sql='SELECT name FROM manufacturer WHERE id = %(id)s',
-                                                pars={ 
-                                                        'id': self.get_request()['manufacturer']['id']
-                                                     },
-                                                commit=False                                              
-                                             )                          
-                          #
-                          if self.get_db().get_error():   
-                              # Erro 
-                              self.set_error(self.get_db().get_error_message())
-                          elif len(self.get_db().get_rows()) == 0:
-                              # Fabricante com "id" não cadastrado - Erro... 
-                              self.set_error('Fabricante não cadastrado(id={})'.format(self.get_request()['manufacturer']['id'])) 
-                          else:
-                              # Reserva o "id" e o "name" do fabricante informado no request...
-                              self.__manufacturer_id = self.get_request()['manufacturer']['id']                             
-                              self.__manufacturer_name = self.get_db().get_rows()[0]['name']                        
-                          #     
+                          # Fabricante já deveria estar cadastrado - Verificado em check_lookup()...
+                          self.__lookup_id = self.get_request()['manufacturer']['id']
                      elif 'id' not in manufacturerKeys and 'name' in manufacturerKeys: 
                           # "id" não informado mas "name" informado - Marca para cadastrar o fabricante... 
                           self.__insert_manufacturer = True  
@@ -101,13 +146,45 @@ class CheckManufacturerPUTRequest(cls.CheckRequest):
                           # Reserva o "id" do fabricante informado no request...
                           self.__manufacturer_id = self.get_request()['manufacturer']['id']            
                      #
-                     # Reserva o nome do fabricante informado no request...
-                     if not self.get_error() and 'name' in manufacturerKeys: 
-                         self.__manufacturer_name = self.get_request()['manufacturer']['name']                                                                                                                              
+                     if self.__lookup_id is None:
+                         self.__reserve_name()
             #             
         #                        
         return not self.get_error()         
     
+    def check_lookup(self, db:cls.DatabaseInterface) -> bool:
+        """ Trata o retorno da consulta(já executada em db) do fabricante em get_lookup_id(). """
+        if db.get_error():   
+            # Erro 
+            self.set_error(db.get_error_message())
+        elif len(db.get_rows()) == 0:
+            # Fabricante com "id" não cadastrado - Erro... 
+            self.set_error('Fabricante não cadastrado(id={})'.format(self.__lookup_id)) 
+        else:
+            # Reserva o "id" e o "name" do fabricante informado no request...
+            self.__manufacturer_id = self.__lookup_id                             
+            self.__manufacturer_name = db.get_rows()[0]['name']                        
+            _MANUFACTURER_NAMES.set(self.__lookup_id, self.__manufacturer_name)
+        #     
+        self.__reserve_name()
+        return not self.get_error()
+    
+    def check_cached_lookup(self) -> bool:
+        """ Confere o fabricante em get_lookup_id() pelo cache. Retorna False quando não está no cache. """
+        name = _MANUFACTURER_NAMES.get(self.__lookup_id)
+        if name is cache.LRUTTLCache.MISSING:
+            return False
+        # Reserva o "id" e o "name" do fabricante informado no request...
+        self.__manufacturer_id = self.__lookup_id                             
+        self.__manufacturer_name = name
+        self.__reserve_name()
+        return True
+    
+    def __reserve_name(self):
+        # Reserva o nome do fabricante informado no request...
+        if not self.get_error() and 'name' in self.get_request()['manufacturer'].keys(): 
+            self.__manufacturer_name = self.get_request()['manufacturer']['name']                                                                                                                              
+    
 class CheckManufacturerPOSTRequest(cls.CheckRequest):
     """
     Checagem do request para POST(Alteração de fabricante).
@@ -116,8 +193,8 @@ class CheckManufacturerPOSTRequest(cls.CheckRequest):
     específica no método "execute".
     """
     
-    def __init__(self, body:Union[str,dict], db:cls.DatabaseInterface):
-        super().__init__(httpMethod=cts._POST, body=body, db=db) 
+    def __init__(self, body:Union[str,dict,cls.RequestContext], db:cls.DatabaseInterface):
+        super().__init__(http_method=cts._POST, body=body, db=db) 
         
         self.__manufacturer_id = 0
         self.__manufacturer_name = ""
@@ -126,6 +203,8 @@ class CheckManufacturerPOSTRequest(cls.CheckRequest):
         self.__insert_manufacturer = False  
         self.__update_manufacturer = False
         
+        self.__lookup_id = None
+        
         self.__schema = cts._UPDATE_PRODUCT_JSON_SCHEMA             
      
         
@@ -149,17 +228,57 @@ class CheckManufacturerPOSTRequest(cls.CheckRequest):
     def get_manufacturer_id(self):
         return self.__manufacturer_id 
         
+    def set_manufacturer_name(self, value:str):
+        self.__manufacturer_name = value
     def get_manufacturer_name(self):
         return self.__manufacturer_name 
+    
+    def get_lookup_id(self):
+        """ "id" do fabricante cuja existência deve ser conferida no cadastro(ou None). """
+        return self.__lookup_id
+    
+    def get_check_product(self) -> bool:
+        """ Retornará True quando o fabricante atual do produto deva ser conferido(check_product_lookup). """
+        return not self.get_error() and not self.__insert_manufacturer
             
     def check(self):
         """ Implementação da validação dos atributos do request. """
+        if self.check_request():
+            if self.__lookup_id is not None and not self.check_cached_lookup():
+                # Fabricante já deveria estar cadastrado - Verifica...
+                self.get_db().query(  sql=_SQL_MANUFACTURER_NAME,
+                                      pars={ 
+                                              'id': self.__lookup_id
+                                           },
+                                      commit=False                                              
+                                   )                       
+                self.check_lookup(self.get_db())
+            #
+            if self.get_check_product():
+                # Verifica se ainda é o mesmo fabricante já associado ao produto. Se não for, troca...
+                self.get_db().query(   sql=_SQL_PRODUCT_MANUFACTURER,
+                                       pars={ 
+                                               'id': self.get_request()['id'],
+                                               'active': cts._YES
+                                            },
+                                       commit=False                                              
+                                   )                       
+                self.check_product_lookup(self.get_db())
+        #                        
+        return not self.get_error()             
+    
+    def check_request(self) -> bool:
+        """ 
+        Validação do request pelo schema e dos atributos do fabricante, sem acesso ao banco.
+        Quando o "id" do fabricante é informado, ele é reservado em get_lookup_id() para
+        a conferência no cadastro(check_lookup).
+        """
         super().check()
         #
         if not self.get_error():
             # Validação do request pelo schema...
             try:
-                validate(instance=self.get_request(), schema=self.get_schema())
+                self.validate_schema()
             except jsonschema.exceptions.ValidationError as err:
                 self.set_error('Request com schema inválido. [{}]'.format(err.message))       
             #
@@ -170,25 +289,8 @@ class CheckManufacturerPOSTRequest(cls.CheckRequest):
                 # Verifica a existência cadastral do fabricante do produto pela
                 # presença do atributo "id" do fabricante...
                 if 'id' in self.get_request()['manufacturer'].keys(): 
-                     # Fabricante já deveria estar cadastrado - Verifica...
-                     self.get_db().query(  sql='SELECT name FROM manufacturer WHERE id = %(id)s',
-                                           pars={ 
-                                                   'id': self.get_request()['manufacturer']['id']
-                                                },
-                                           commit=False                                              
-                                        )                       
-                     #
-                     if self.get_db().get_error():   
-                         # Erro 
-                         self.set_error(self.get_db().get_error_message())
-                     elif len(self.get_db().get_rows()) == 0:
-                         # Fabricante não cadastrado - Erro... 
-                         self.set_error('Fabricante não cadastrado(id={})'.format(self.get_request()['manufacturer']['id'])) 
-                     else:
-                         # Reserva o "id" e o "name" do fabricante informado no request...
-                         self.__manufacturer_id = self.get_request()['manufacturer']['id']                             
-                         self.__manufacturer_name = self.get_db().get_rows()[0]['name']                                                         
-                     #                             
+                     # Fabricante já deveria estar cadastrado - Verificado em check_lookup()...
+                     self.__lookup_id = self.get_request()['manufacturer']['id']
                 elif 'id' not in manufacturerKeys and 'name' in manufacturerKeys: 
                      # "id" não informado mas "name" informado - Marca para cadastrar o fabricante... 
                      self.__insert_manufacturer = True  
@@ -198,39 +300,65 @@ class CheckManufacturerPOSTRequest(cls.CheckRequest):
                      # Reserva o "id" do fabricante informado no request...
                      self.__manufacturer_id = self.get_request()['manufacturer']['id']            
                 #
-                if not self.get_error():
-                    # Reserva o nome do fabricante informado no request...
-                    if 'name' in manufacturerKeys: 
-                         self.__manufacturer_name = self.get_request()['manufacturer']['name']                                                                                                                                                       
-                    #
-                    if not self.__insert_manufacturer:
-                       # Verifica se ainda é o mesmo fabricante já associado ao produto. Se não for, troca...
-                       self.get_db().query(   sql='SELECT manufacturer_id FROM productmanufacturer WHERE product_id = %(id)s',
-                                              pars={ 
-                                                      'id': self.get_request()['id']
-                                                   },
-                                              commit=False                                              
-                                          )                       
-                       #
-                       if self.get_db().get_error():   
-                          # Erro 
-                          self.set_error(self.get_db().get_error_message())
-                       elif len(self.get_db().get_rows()) == 0:
-                          self.set_error('Produto sem fabricante associado(product_id={})'.format(self.get_request()['id'])) 
-                       elif self.get_db().get_rows()[0]['manufacturer_id'] != self.get_request()['manufacturer']['id']:
-                          # Marca para trocar o fabricante do produto...
-                          self.__update_product = True                                                            
-                #             
+                if self.__lookup_id is None:
+                    self.__reserve_name()
+            #             
         #                        
         return not self.get_error()             
     
+    def check_lookup(self, db:cls.DatabaseInterface) -> bool:
+        """ Trata o retorno da consulta(já executada em db) do fabricante em get_lookup_id(). """
+        if db.get_error():   
+            # Erro 
+            self.set_error(db.get_error_message())
+        elif len(db.get_rows()) == 0:
+            # Fabricante não cadastrado - Erro... 
+            self.set_error('Fabricante não cadastrado(id={})'.format(self.__lookup_id)) 
+        else:
+            # Reserva o "id" e o "name" do fabricante informado no request...
+            self.__manufacturer_id = self.__lookup_id                             
+            self.__manufacturer_name = db.get_rows()[0]['name']                                                         
+            _MANUFACTURER_NAMES.set(self.__lookup_id, self.__manufacturer_name)
+        #                             
+        self.__reserve_name()
+        return not self.get_error()
+    
+    def check_cached_lookup(self) -> bool:
+        """ Confere o fabricante em get_lookup_id() pelo cache. Retorna False quando não está no cache. """
+        name = _MANUFACTURER_NAMES.get(self.__lookup_id)
+        if name is cache.LRUTTLCache.MISSING:
+            return False
+        # Reserva o "id" e o "name" do fabricante informado no request...
+        self.__manufacturer_id = self.__lookup_id                             
+        self.__manufacturer_name = name
+        self.__reserve_name()
+        return True
+    
+    def check_product_lookup(self, db:cls.DatabaseInterface) -> bool:
+        """ Trata o retorno da consulta(já executada em db) do fabricante atual do produto. """
+        if db.get_error():   
+           # Erro 
+           self.set_error(db.get_error_message())
+        elif len(db.get_rows()) == 0:
+           self.set_error('Produto sem fabricante associado(product_id={})'.format(self.get_request()['id'])) 
+        elif db.get_rows()[0]['manufacturer_id'] != self.get_request()['manufacturer']['id']:
+           # Marca para trocar o fabricante do produto...
+           self.__update_product = True                                                            
+        #
+        return not self.get_error()
+    
+    def __reserve_name(self):
+        # Reserva o nome do fabricante informado no request...
+        if not self.get_error() and 'name' in self.get_request()['manufacturer'].keys(): 
+             self.__manufacturer_name = self.get_request()['manufacturer']['name']                                                                                                                                                       
+    
 class CheckManufacturerGETRequest(cls.CheckRequest):
     """ 
     Checagem do request para GET(Consultas/Queries) de fabricantes. 
     """    
     
-    def __init__(self, body:Union[str,dict], db:cls.DatabaseInterface):
-        super().__init__(httpMethod=cts._GET, body=body, db=db) 
+    def __init__(self, body:Union[str,dict,cls.RequestContext], db:cls.DatabaseInterface):
+        super().__init__(http_method=cts._GET, body=body, db=db) 
         
         # Importa o schema json de validação do request...
         self.__schema = cts._GET_MANUFACTURER_JSON_SCHEMA         
@@ -241,39 +369,148 @@ class CheckManufacturerGETRequest(cls.CheckRequest):
     def check(self):
         """ Implementação da validação dos atributos do request. """
         try:
-            validate(instance=self.get_request(), schema=self.get_schema())
+            self.validate_schema()
         except jsonschema.exceptions.ValidationError as err:
             self.set_error('Request inválido. [{}]'.format(err.message))
         #
+        if not self.get_error():
+            self.check_cursor()
+        #
         return not self.get_error()        
     
 #----------------------------------------------------------------------------------------------     
 
 class InsertManufacturer(cls.InsertDetailRecord):
-    """ Classe para inserção(PUT) de fabricantes de produtos no banco. """
+    """ 
+    Classe para inserção(PUT) de fabricantes de produtos no banco.
+    A inclusão é um upsert pelo nome: com o nome já cadastrado, resolve o fabricante existente.
+    """
     
     def __init__(self, manufacturer_name:str, db:cls.DatabaseInterface):
         super().__init__(db=db)
         #
         self.__manufacturer_name = manufacturer_name
+        self.__registered_name = manufacturer_name
+    
+    def get_manufacturer_name(self) -> str:
+        return self.__manufacturer_name
+    
+    def get_registered_name(self) -> str:
+        """ Nome cadastrado do fabricante(o existente quando o nome já estava cadastrado). """
+        return self.__registered_name
+    
+    def set_result(self) -> bool:
+        """ Trata o retorno da inclusão já executada no banco. """
+        if self.get_db().get_error():
+            self.set_error(self.get_db().get_error_message())    
+        else:
+            # Reserva a chave primária criada na inclusão(ou a do fabricante existente)...
+            self.set_primary_key({'id':self.get_db().get_rows()[0]})                              
+            self.__registered_name = self.get_db().get_rows()[1]
+            # Atualiza o cache dos fabricantes após o commit...
+            manufacturer_id, manufacturer_name = self.get_db().get_rows()[0], self.__registered_name
+            self.get_db().add_commit_hook(lambda: _MANUFACTURER_NAMES.set(manufacturer_id, manufacturer_name))
+            notify.publish(self.get_db(), 'manufacturer', manufacturer_id, 'insert')
+        #    
+        return not self.get_error()    
          
     def execute(self):                  
         """ Inclusão de fabricante. """
-         # Tenta incluir...
+         # Tenta incluir(ou resolver pelo nome)...
         if super().execute():           
             self.get_db().insert(  table='manufacturer', 
                                    fields={'name': self.__manufacturer_name}, 
-                                   sufix='RETURNING id'
+                                   sufix=_SQL_MANUFACTURER_UPSERT + ' RETURNING id, name'
                                 )        
-            if self.get_db().get_error():
-                self.set_error(self.get_db().get_error_message())    
-            else:
-                # Reserva a chave primária criada na inclusão...
-                self.set_primary_key({'id':self.get_db().get_rows()[0]})                              
+            self.set_result()
         #    
         return not self.get_error()    
             
          
+class ResolveManufacturers(cls.InsertDetailRecord):
+    """ 
+    Classe para resolver, numa única passada, os fabricantes de vários produtos(PUT em lote):
+    os informados pelo "id" são conferidos numa única consulta(e no cache) e os informados
+    somente pelo "name" são incluídos em lote por upsert, um por nome normalizado distinto.
+    """
+    
+    def __init__(self, manufacturers:list, db:cls.DatabaseInterface):
+         super().__init__(db=db)
+         #
+         self.__manufacturers = manufacturers  # "manufacturer" de cada produto({"id"} e/ou {"name"})
+         self.__names = {}                     # id -> nome dos fabricantes conferidos/incluídos
+         self.__new_ids = {}                   # nome normalizado -> id dos fabricantes incluídos/resolvidos
+    
+    def get_lookup_ids(self) -> list:
+        """ "ids" dos fabricantes que não estão no cache e devem ser conferidos no cadastro. """
+        ids = []
+        for manufacturer in self.__manufacturers:
+            if 'id' in manufacturer and manufacturer['id'] not in self.__names:
+                name = _MANUFACTURER_NAMES.get(manufacturer['id'])
+                if name is cache.LRUTTLCache.MISSING:
+                    ids.append(manufacturer['id'])
+                else:
+                    self.__names[manufacturer['id']] = name
+        #
+        return list(dict.fromkeys(ids))
+    
+    def set_lookup_result(self) -> bool:
+        """ Trata o retorno da consulta(já executada no banco) dos fabricantes em get_lookup_ids(). """
+        if self.get_db().get_error():
+            self.set_error(self.get_db().get_error_message())
+        else:
+            for row in self.get_db().get_rows():
+                self.__names[row['id']] = row['name']
+                _MANUFACTURER_NAMES.set(row['id'], row['name'])
+        #
+        return not self.get_error()
+    
+    def get_insert_names(self) -> list:
+        """ 
+        Nomes dos fabricantes informados sem o "id", para a inclusão: um por nome normalizado(o 
+        mesmo upsert não pode atingir duas vezes a mesma row), com a grafia da primeira ocorrência. 
+        """
+        names = {}
+        for manufacturer in self.__manufacturers:
+            if 'id' not in manufacturer:
+                names.setdefault(normalize_name(manufacturer['name']), manufacturer['name'])
+        return list(names.values())
+    
+    def set_insert_result(self, names:list) -> bool:
+        """ Trata o retorno da inclusão(já executada no banco) dos fabricantes em get_insert_names(). """
+        if self.get_db().get_error():
+            self.set_error(self.get_db().get_error_message())
+        else:
+            for name, manufacturer_id in zip(names, self.get_db().get_rows()):
+                self.__new_ids[normalize_name(name)] = manufacturer_id
+                self.__names[manufacturer_id] = name
+            # (O cache não é atualizado: o nome cadastrado de um fabricante já existente pode ter outra grafia.)
+        #
+        return not self.get_error()
+    
+    def get_manufacturer(self, manufacturer:dict) -> tuple:
+        """ Retorna o "id" e o "name" do fabricante resolvido(ou None e None quando não cadastrado). """
+        if 'id' in manufacturer:
+            manufacturer_id = manufacturer['id']
+        else:
+            manufacturer_id = self.__new_ids.get(normalize_name(manufacturer['name']))
+        if manufacturer_id not in self.__names:
+            return None, None
+        return manufacturer_id, self.__names[manufacturer_id]
+    
+    def execute(self):
+        if super().execute():
+            ids = self.get_lookup_ids()
+            if ids:
+                self.get_db().query(sql=_SQL_MANUFACTURER_NAMES, pars={'ids': ids}, commit=False)
+                self.set_lookup_result()
+            names = self.get_insert_names()
+            if not self.get_error() and names:
+                self.get_db().insert_many(table='manufacturer', rows=[{'name': n} for n in names], returning='id', sufix=_SQL_MANUFACTURER_UPSERT)
+                self.set_insert_result(names)
+        #
+        return not self.get_error()
+    
 class UpdateManufacturer(cls.UpdateDetailRecord):
     """ Classe para atualização(POST) de fabricantes de produtos no banco. """
     
@@ -282,21 +519,38 @@ class UpdateManufacturer(cls.UpdateDetailRecord):
          #
          self.__manufacturer_id = manufacturer_id
          self.__manufacturer_name = manufacturer_name
+    
+    def get_manufacturer_id(self) -> int:
+        return self.__manufacturer_id
+    
+    def get_manufacturer_name(self) -> str:
+        return self.__manufacturer_name
+    
+    def set_result(self) -> bool:
+        """ Trata o retorno da alteração já executada no banco. """
+        if self.get_db().get_error():
+            self.set_error(self.get_db().get_error_message(), (404 if self.get_db().key_not_found() else 400))      
+        else:
+            # Reserva a chave primária alterada...
+            self.set_primary_key({ 'id': self.__manufacturer_id })                              
+            # Atualiza o cache dos fabricantes após o commit...
+            manufacturer_id, manufacturer_name = self.__manufacturer_id, self.__manufacturer_name
+            self.get_db().add_commit_hook(lambda: _MANUFACTURER_NAMES.set(manufacturer_id, manufacturer_name))
+            # O nome do fabricante está nos detalhes dos seus produtos - Invalida os ETags após o commit...
+            self.get_db().add_commit_hook(prod.get_product_etag_cache().clear)
+            notify.publish(self.get_db(), 'manufacturer', manufacturer_id, 'update')
+        #    
+        return not self.get_error()        
          
     def execute(self):                           
         """ Atualização de fabricante. """        
         # Tenta alterar...
         if super().execute():
-            pk = { 'id': self.__manufacturer_id }
             self.get_db().update(  table='manufacturer', 
-                                   pk=pk,
+                                   pk={ 'id': self.__manufacturer_id },
                                    fields={ 'name': self.__manufacturer_name }
                                 )        
-            if self.get_db().get_error():
-                self.set_error(self.get_db().get_error_message(), (404 if self.get_db().key_not_found() else 400))      
-            else:
-                # Reserva a chave primária alterada...
-                self.set_primary_key(pk)                              
+            self.set_result()
         #    
         return not self.get_error()        
     
@@ -319,47 +573,79 @@ class GetManufacturer(cls.GetDetailRecord):
           # Order...                    
           if 'order' not in request.keys():
                request['order'] = 'id' # Ordem padrão de classificação da consulta.       
+          # Cursor da paginação por chave(já conferido na checagem do request): define a ordem...
+          self.__cursor = None
+          if 'cursor' in request.keys():
+               self.__cursor = cls.ListingCursor.decode(request['cursor'])
+               request['order'] = self.__cursor.get_order()
           #    
           super().__init__(schema=schema, request=request, db=db)              
         
-    def execute(self):           
+    def get_query(self) -> tuple:
+        """ Retorna o SQL e os parâmetros da consulta(listagem ou detalhes) pelo request. """
         # Define o tipo da consulta...        
         #  OBS: Num ambiente profissional, já existirá uma padronização/metodologia para
         #       a nomenclatura das coluna do SELECT. Usarei no momento, a mais básica possível.
         #       E certamente também já existirá até um framework/biblioteca que automatize isso tudo.   
         #       Mas se nada disso existir, desenvolvemos também, se preciso for!    
         if self.get_request()['id'] == 0:
-            # Listagem(Paginada)...        
-            order = self.get_request()['order'].strip().lower()                                              
-            sql = ('SELECT id, name '+
-                   'FROM manufacturer '+
-                   'WHERE id > %(id)s '+
-                   'ORDER BY ' + ('id' if order == '' else order) +' '+
-                   'LIMIT '+ fns.to_str(cts._QRY_PAGE_ROWS_LIMIT) +' OFFSET '+ fns.to_str((self.get_request()['page']-1) * cts._QRY_PAGE_ROWS_LIMIT))            
+            # Listagem(Paginada pelo cursor ou, na falta, pela página - Ver cls.listing_query())...        
+            return cls.listing_query(  select='SELECT id, name FROM manufacturer',
+                                       where='',
+                                       order=self.get_request()['order'].strip().lower(),
+                                       page=self.get_request()['page'],
+                                       cursor=self.__cursor
+                                    )
         else:
             # Detalhes...                 
             sql = ('SELECT id, name '+
                    'FROM manufacturer '+                          
                    'WHERE id = %(id)s') 
         #
-        self.get_db().query(sql=sql, pars={'id': self.get_request()['id']}, commit=True) 
+        return sql, {'id': self.get_request()['id']}
+    
+    def set_result(self) -> bool:
+        """ Trata o retorno(rows compactas) da consulta já executada no banco. """
         if (self.get_db().get_error()):
             self.set_error(self.get_db().get_error_message())
         else:
-            # Prepara o objeto de retorno...
+            # Prepara o objeto de retorno(projeção direta das rows compactas pelo mapa de colunas)...
             request = self.get_request()
             request['maxRowsPerPage'] = cts._QRY_PAGE_ROWS_LIMIT
-            request['rows'] = []
-            for row in self.get_db().get_rows():
-                request['rows'].append({
-                     'id': row['id'],
-                     'name': row['name']
-                })                                           
+            cols = self.get_db().get_columns()
+            c_id, c_name = cols.get('id'), cols.get('name')
+            request['rows'] = [{'id': row[c_id], 'name': row[c_name]} for row in self.get_db().get_rows()]
+            if request['id'] == 0:
+                # Cursor da próxima página(None na última)...
+                request['rows'], request['next'] = cls.listing_rows(request['rows'], request['order'])
+            # Mantém o cache dos fabricantes com as rows lidas...
+            for row in request['rows']:
+                _MANUFACTURER_NAMES.set(row['id'], row['name'])
             #
             # Atualiza o request com as propriedades/atributos para retorno da consulta...
             self.set_request(request)                            
         #    
         return not self.get_error()            
+        
+    def set_cached_result(self) -> bool:
+        """ Detalhes do fabricante pelo cache. Retorna False quando não é consulta de detalhes ou não está no cache. """
+        if self.get_request()['id'] == 0:
+            return False
+        name = _MANUFACTURER_NAMES.get(self.get_request()['id'])
+        if name is cache.LRUTTLCache.MISSING:
+            return False
+        request = self.get_request()
+        request['maxRowsPerPage'] = cts._QRY_PAGE_ROWS_LIMIT
+        request['rows'] = [{'id': request['id'], 'name': name}]
+        self.set_request(request)                            
+        return True
+        
+    def execute(self):           
+        if self.set_cached_result():
+            return True
+        sql, parameters = self.get_query()
+        self.get_db().query(sql=sql, pars=parameters, commit=True, compact=True) 
+        return self.set_result()
     
 #--------------------------------------------------------------------------------------------------                                
          
@@ -371,6 +657,25 @@ class InsertProductManufacturer(cls.InsertDetailRecord):
          #
          self.__product_id = product_id
          self.__manufacturer_id = manufacturer_id
+    
+    def get_product_id(self) -> int:
+        return self.__product_id
+    
+    def get_manufacturer_id(self) -> int:
+        return self.__manufacturer_id
+    
+    @staticmethod
+    def insert_or_reactivate(db:cls.DatabaseInterface, product_id:int, manufacturer_id:int):
+        """ 
+        Ativa a associação do produto com o fabricante: reativa a associação já existente(produto que 
+        volta a um fabricante anterior ou fabricante informado pelo "name" e encontrado pelo upsert) 
+        ou, na falta, insere a nova. O erro fica no "db".
+        --> Versão assíncrona em py_api_async_manufacturer_classes.insert_or_reactivate_async(): altere as duas juntas.
+        """
+        pk = { 'product_id': product_id, 'manufacturer_id': manufacturer_id }
+        db.update(table='productmanufacturer', pk=pk, fields={ 'active': cts._YES })
+        if db.get_error() and db.key_not_found():
+            db.insert(table='productmanufacturer', fields=dict(pk, active=cts._YES))
            
     def execute(self):       
         if super().execute(): 
@@ -382,15 +687,8 @@ class InsertProductManufacturer(cls.InsertDetailRecord):
             if self.get_db().get_error() and not self.get_db().key_not_found(): 
                 self.set_error(self.get_db().get_error_message())    
             else:
-                # Por fim, insere a nova associação...   
-                fields = { 
-                            'product_id': self.__product_id, 
-                            'manufacturer_id': self.__manufacturer_id,
-                            'active': cts._YES
-                         }        
-                self.get_db().insert(  table='productmanufacturer', 
-                                       fields=fields                              
-                                    )        
+                # Por fim, reativa ou insere a nova associação...   
+                self.insert_or_reactivate(self.get_db(), self.__product_id, self.__manufacturer_id)
                 #
                 if self.get_db().get_error():
                     self.set_error(self.get_db().get_error_message())    
@@ -403,6 +701,31 @@ class InsertProductManufacturer(cls.InsertDetailRecord):
         #    
         return not self.get_error()       
     
+class InsertProductManufacturers(cls.InsertDetailRecord):
+    """ Classe para inserção(PUT em lote) das associações de produtos novos e seus fabricantes. """
+    
+    def __init__(self, associations:list, db:cls.DatabaseInterface):
+         super().__init__(db=db)
+         #
+         self.__associations = associations  # [(product_id, manufacturer_id), ...]
+    
+    def get_rows(self) -> list:
+        return [{'product_id': p, 'manufacturer_id': m, 'active': cts._YES} for p, m in self.__associations]
+    
+    def set_result(self) -> bool:
+        if self.get_db().get_error():
+            self.set_error(self.get_db().get_error_message())    
+        #
+        return not self.get_error()
+           
+    def execute(self):       
+        # (Produtos novos: não existe associação anterior para desativar.)
+        if super().execute() and self.__associations: 
+            self.get_db().insert_many(table='productmanufacturer', rows=self.get_rows())
+            self.set_result()
+        #    
+        return not self.get_error()       
+    
 class UpdateProductManufacturer(cls.UpdateDetailRecord):
     """ Classe para atualização/troca(POST) do fabricante de um produto no banco. """
     
@@ -411,6 +734,12 @@ class UpdateProductManufacturer(cls.UpdateDetailRecord):
          #
          self.__product_id = product_id
          self.__manufacturer_id = manufacturer_id
+    
+    def get_product_id(self) -> int:
+        return self.__product_id
+    
+    def get_manufacturer_id(self) -> int:
+        return self.__manufacturer_id
          
     def execute(self):                           
         """ Troca do fabricante do produto. """        
@@ -424,14 +753,8 @@ class UpdateProductManufacturer(cls.UpdateDetailRecord):
             if self.get_db().get_error():
                 self.set_error(self.get_db().get_error_message(), (404 if self.get_db().key_not_found() else 400))      
             else:
-                # Por fim, insere a nova associação...
-                self.get_db().insert(  table='productmanufacturer', 
-                                       fields={ 
-                                                 'product_id': self.__product_id,
-                                                 'manufacturer_id': self.__manufacturer_id,
-                                                 'active': cts._YES
-                                              }
-                                    )        
+                # Por fim, reativa ou insere a nova associação...
+                InsertProductManufacturer.insert_or_reactivate(self.get_db(), self.__product_id, self.__manufacturer_id)
                 if self.get_db().get_error():
                     self.set_error(self.get_db().get_error_message())     
                 else:
@@ -440,6 +763,10 @@ class UpdateProductManufacturer(cls.UpdateDetailRecord):
                                             'product_id': self.__product_id,
                                             'manufacturer_id': self.__manufacturer_id
                                          })                                
+                    # Invalida o ETag do produto após o commit...
+                    product_id = self.__product_id
+                    self.get_db().add_commit_hook(lambda: prod.get_product_etag_cache().delete(product_id))
+                    notify.publish(self.get_db(), 'productmanufacturer', product_id, 'update')
         #    
         return not self.get_error()                     
     
@@ -450,6 +777,9 @@ class DeleteProductManufacturer(cls.DeleteDetailRecord):
          super().__init__(db=db)         
          #
          self.__product_id = product_id
+    
+    def get_product_id(self) -> int:
+        return self.__product_id
          
     def execute(self):                           
         """ 
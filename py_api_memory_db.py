@@ -0,0 +1,635 @@
+#--------------------------------------------------------------------
+# Banco em memória(por processo) com a interface DatabaseInterface,
+# para os benchmarks e testes sem PostgreSQL: mede somente o custo
+# das facades/checagens/CRUDs, sem a latência do banco.
+#  ---> Suporta os SQLs gerados pelo projeto(SELECTs com INNER JOIN,
+#       "=", ">", "ANY", comparação de tuplas, ORDER BY, LIMIT e OFFSET)
+#       e o insert/insert_many(com ON CONFLICT e RETURNING)/update/
+#       delete/count_all. As transações são desfeitas pelo rollback,
+#       mas sem isolamento entre as conexões(read uncommitted).
+#--------------------------------------------------------------------
+
+import re
+import threading
+
+from typing import Union
+
+import py_api_consts as cts
+import py_api_classes as cls
+
+# Tabelas conhecidas: chave primária, coluna auto-incremento e índices únicos(expressão -> função)...
+_TABLES = {
+    'product': {'pk': ('id',), 'serial': 'id', 'unique': {}},
+    'manufacturer': {'pk': ('id',), 'serial': 'id',
+                     'unique': {'lower(btrim(name))': lambda row: (row.get('name') or '').strip(' ').lower()}},
+    'productmanufacturer': {'pk': ('product_id', 'manufacturer_id'), 'serial': None, 'unique': {}}
+}
+
+# Partes dos SQLs suportados...
+_REF = r'(?:\w+\.)?\w+'
+_SQL_SELECT = re.compile(r'^\s*SELECT\s+(?P<columns>.+?)\s+FROM\s+(?P<source>.+?)'
+                         r'(?:\s+WHERE\s+(?P<where>.+?))?(?:\s+ORDER\s+BY\s+(?P<order>.+?))?'
+                         r'(?:\s+LIMIT\s+(?P<limit>\d+))?(?:\s+OFFSET\s+(?P<offset>\d+))?\s*;?\s*$', re.IGNORECASE | re.DOTALL)
+_SQL_JOIN = re.compile(r'\s+INNER\s+JOIN\s+', re.IGNORECASE)
+_SQL_ON = re.compile(r'^(\w+)\s+ON\s+(.+)$', re.IGNORECASE | re.DOTALL)
+_SQL_AND = re.compile(r'\s+AND\s+', re.IGNORECASE)
+_SQL_AS = re.compile(r'^(.+?)\s+AS\s+(\w+)$', re.IGNORECASE)
+_SQL_TUPLE = re.compile(r'^\((.+)\)\s*(>|<)\s*\((.+)\)$')
+_SQL_ANY = re.compile(r'^(' + _REF + r')\s*=\s*ANY\s*\(\s*%\((\w+)\)s\s*\)$', re.IGNORECASE)
+_SQL_PARAMETER = re.compile(r'^(' + _REF + r')\s*(=|<>|!=|>=|<=|>|<)\s*%\((\w+)\)s$')
+_SQL_COLUMNS = re.compile(r'^(' + _REF + r')\s*=\s*(' + _REF + r')$')
+_SQL_CONFLICT = re.compile(r'ON\s+CONFLICT\s*\(\s*\((.+?)\)\s*\)\s*DO\s+(NOTHING|UPDATE\s+SET\s+.+?)(?=\s+RETURNING\b|\s*;?\s*$)',
+                           re.IGNORECASE | re.DOTALL)
+_SQL_RETURNING = re.compile(r'RETURNING\s+(.+?)\s*;?\s*$', re.IGNORECASE | re.DOTALL)
+
+_OPERATORS = {
+    '=': lambda a, b: a == b,
+    '<>': lambda a, b: a != b,
+    '!=': lambda a, b: a != b,
+    '>': lambda a, b: a is not None and b is not None and a > b,
+    '<': lambda a, b: a is not None and b is not None and a < b,
+    '>=': lambda a, b: a is not None and b is not None and a >= b,
+    '<=': lambda a, b: a is not None and b is not None and a <= b
+}
+
+
+class MemoryDBError(Exception):
+    """ Falha de execução no banco em memória(SQL não suportado, chave duplicada...). """
+
+    def __init__(self, message:str, sqlstate:str=''):
+        super().__init__(message)
+        self.sqlstate = sqlstate
+
+
+class MemoryRow(tuple):
+    """ Row(tupla) também acessível pelo nome da coluna, como as DictRows do psycopg2. """
+
+    def __new__(cls, values, columns:dict):
+        row = super().__new__(cls, values)
+        row.__columns = columns
+        return row
+
+    def __getitem__(self, key):
+        if type(key) is str:
+            return tuple.__getitem__(self, self.__columns[key])
+        return tuple.__getitem__(self, key)
+
+    def keys(self):
+        return self.__columns.keys()
+
+
+class MemoryTable:
+    """ Rows de uma tabela(chave -> dict), com a sequence, os índices únicos e índices por coluna. """
+
+    def __init__(self, name:str):
+        definition = _TABLES.get(name, {'pk': None, 'serial': None, 'unique': {}})
+        self.__name = name
+        self.__pk = definition['pk']
+        self.__serial = definition['serial']
+        self.__unique_keys = definition['unique']
+        self.__unique = {expression: {} for expression in self.__unique_keys}  # expressão -> valor -> chave
+        self.__indexes = {}     # coluna -> valor -> {chave: None}(na ordem de inclusão)
+        self.__rows = {}        # chave -> row(dict)
+        self.__sequence = 0
+        self.__rowid = 0
+        self.__ordered = True   # Chaves incluídas em ordem crescente do "id"(dispensa o sort do ORDER BY id)
+
+    def get_name(self) -> str:
+        return self.__name
+
+    def get_serial(self) -> str:
+        return self.__serial
+
+    def get_ordered(self) -> bool:
+        return self.__ordered and self.__pk == (self.__serial,) and self.__serial is not None
+
+    def next_value(self) -> int:
+        self.__sequence += 1
+        return self.__sequence
+
+    def key_of(self, row:dict):
+        if self.__pk is None:
+            self.__rowid += 1
+            return self.__rowid
+        return row.get(self.__pk[0]) if len(self.__pk) == 1 else tuple(row.get(c) for c in self.__pk)
+
+    def get(self, key) -> dict:
+        return self.__rows.get(key)
+
+    def rows(self) -> list:
+        return list(self.__rows.items())
+
+    def __len__(self) -> int:
+        return len(self.__rows)
+
+    def find_conflict(self, row:dict, expression:str=None):
+        """ Chave da row existente em conflito(chave primária ou índice único) com a row informada. """
+        if expression is not None:
+            function = self.__unique_keys.get(expression)
+            if function is None:
+                raise MemoryDBError('Sem índice único para o ON CONFLICT(({})) na tabela "{}".'.format(expression, self.__name), '42P10')
+            return self.__unique[expression].get(function(row))
+        if self.__pk is not None:
+            key = self.key_of(row)
+            if key in self.__rows:
+                return key
+        for expression, function in self.__unique_keys.items():
+            key = self.__unique[expression].get(function(row))
+            if key is not None:
+                return key
+        return None
+
+    def put(self, key, row:dict):
+        """ Inclui/substitui a row da chave, mantendo os índices. """
+        old = self.__rows.get(key)
+        if old is not None:
+            self.__unindex(key, old)
+        elif self.get_ordered() and self.__rows and key is not None and key < next(reversed(self.__rows)):
+            self.__ordered = False
+        self.__rows[key] = row
+        for expression, function in self.__unique_keys.items():
+            self.__unique[expression][function(row)] = key
+        for column, index in self.__indexes.items():
+            index.setdefault(row.get(column), {})[key] = None
+        if self.__serial is not None and type(row.get(self.__serial)) is int:
+            self.__sequence = max(self.__sequence, row[self.__serial])
+
+    def remove(self, key):
+        row = self.__rows.pop(key, None)
+        if row is not None:
+            self.__unindex(key, row)
+
+    def __unindex(self, key, row:dict):
+        for expression, function in self.__unique_keys.items():
+            self.__unique[expression].pop(function(row), None)
+        for column, index in self.__indexes.items():
+            keys = index.get(row.get(column))
+            if keys is not None:
+                keys.pop(key, None)
+
+    def lookup(self, column:str, value) -> list:
+        """ Chaves das rows com a coluna igual ao valor(pela chave primária ou por um índice criado no primeiro uso). """
+        if self.__pk == (column,):
+            return [value] if value in self.__rows else []
+        index = self.__indexes.get(column)
+        if index is None:
+            index = {}
+            for key, row in self.__rows.items():
+                index.setdefault(row.get(column), {})[key] = None
+            self.__indexes[column] = index
+        return list(index.get(value, {}))
+
+    def find(self, condition:dict) -> list:
+        """ Chaves das rows que atendem a todas as igualdades da condição({coluna: valor}). """
+        if not condition:
+            return list(self.__rows)
+        column, value = next(iter(condition.items()))
+        keys = self.lookup(column, value)
+        return [k for k in keys if all(self.__rows[k].get(c) == v for c, v in condition.items())]
+
+    def clear(self):
+        self.__rows.clear()
+        self.__indexes.clear()
+        self.__unique = {expression: {} for expression in self.__unique_keys}
+        self.__sequence = 0
+        self.__ordered = True
+
+
+class MemoryStore:
+    """ Tabelas do processo, compartilhadas pelas conexões DBMemory. """
+
+    def __init__(self):
+        self.__lock = threading.RLock()
+        self.__tables = {}
+
+    def get_lock(self):
+        return self.__lock
+
+    def get_table(self, name:str) -> MemoryTable:
+        name = name.strip().lower()
+        table = self.__tables.get(name)
+        if table is None:
+            with self.__lock:
+                table = self.__tables.setdefault(name, MemoryTable(name))
+        return table
+
+    def clear(self):
+        """ Descarta as rows de todas as tabelas. """
+        with self.__lock:
+            for table in self.__tables.values():
+                table.clear()
+
+
+# Banco em memória do processo...
+_STORE = MemoryStore()
+
+def get_memory_store() -> MemoryStore:
+    return _STORE
+
+
+class MemorySelect:
+    """ SELECT suportado pelo banco em memória, interpretado(uma vez por SQL) e executado sobre o MemoryStore. """
+
+    def __init__(self, sql:str):
+        match = _SQL_SELECT.match(sql)
+        if match is None:
+            raise MemoryDBError('SQL não suportado pelo banco em memória: ' + sql, '0A000')
+        #
+        parts = _SQL_JOIN.split(match.group('source').strip())
+        self.__tables = [parts[0].strip().lower()]
+        self.__joins = []   # [(tabela, [predicados])]
+        for part in parts[1:]:
+            on = _SQL_ON.match(part.strip())
+            if on is None:
+                raise MemoryDBError('JOIN não suportado pelo banco em memória: ' + part, '0A000')
+            table = on.group(1).lower()
+            self.__tables.append(table)
+            self.__joins.append((table, [self.parse_predicate(p) for p in _SQL_AND.split(on.group(2).strip())]))
+        self.__where = [self.parse_predicate(p) for p in _SQL_AND.split(match.group('where').strip())] if match.group('where') else []
+        self.__order = [self.parse_ref(r) for r in match.group('order').split(',')] if match.group('order') else []
+        self.__limit = int(match.group('limit')) if match.group('limit') else None
+        self.__offset = int(match.group('offset')) if match.group('offset') else 0
+        #
+        self.__columns = []  # [(nome, ref)]
+        for column in match.group('columns').split(','):
+            alias = _SQL_AS.match(column.strip())
+            expression, name = (alias.group(1), alias.group(2)) if alias else (column.strip(), None)
+            ref = self.parse_ref(expression)
+            self.__columns.append((name or ref[1], ref))
+
+    def parse_ref(self, expression:str) -> tuple:
+        """ Referência a coluna: (tabela ou None, coluna). """
+        expression = expression.strip().lower()
+        if re.match('^' + _REF + '$', expression) is None:
+            raise MemoryDBError('Expressão não suportada pelo banco em memória: ' + expression, '0A000')
+        return tuple(expression.split('.')) if '.' in expression else (None, expression)
+
+    def parse_predicate(self, predicate:str) -> tuple:
+        predicate = predicate.strip()
+        match = _SQL_TUPLE.match(predicate)
+        if match is not None:
+            refs = [self.parse_ref(r) for r in match.group(1).split(',')]
+            names = [re.match(r'^\s*%\((\w+)\)s\s*$', p).group(1) for p in match.group(3).split(',')]
+            return ('tuple', refs, match.group(2), names)
+        match = _SQL_ANY.match(predicate)
+        if match is not None:
+            return ('any', self.parse_ref(match.group(1)), match.group(2))
+        match = _SQL_PARAMETER.match(predicate)
+        if match is not None:
+            return ('parameter', self.parse_ref(match.group(1)), match.group(2), match.group(3))
+        match = _SQL_COLUMNS.match(predicate)
+        if match is not None:
+            return ('columns', self.parse_ref(match.group(1)), self.parse_ref(match.group(2)))
+        raise MemoryDBError('Condição não suportada pelo banco em memória: ' + predicate, '0A000')
+
+    def get_column_names(self) -> list:
+        return [c[0] for c in self.__columns]
+
+    def resolve(self, store:MemoryStore, context:dict, ref:tuple):
+        """ Valor da coluna na row da tabela(ou na primeira tabela que tem a coluna). """
+        if ref[0] is not None:
+            row = context.get(ref[0])
+            return row.get(ref[1]) if row is not None else None
+        for table in self.__tables:
+            row = context.get(table)
+            if row is not None and ref[1] in row:
+                return row[ref[1]]
+        return None
+
+    def test(self, store:MemoryStore, context:dict, predicate:tuple, pars:dict) -> bool:
+        kind = predicate[0]
+        if kind == 'parameter':
+            return _OPERATORS[predicate[2]](self.resolve(store, context, predicate[1]), pars[predicate[3]])
+        if kind == 'any':
+            return self.resolve(store, context, predicate[1]) in pars[predicate[2]]
+        if kind == 'columns':
+            return self.resolve(store, context, predicate[1]) == self.resolve(store, context, predicate[2])
+        left = tuple(self.resolve(store, context, r) for r in predicate[1])
+        right = tuple(pars[n] for n in predicate[3])
+        return _OPERATORS[predicate[2]](left, right)
+
+    def owns(self, table:str, ref:tuple) -> bool:
+        """ A referência é da tabela(qualificada ou, sem JOIN, sem qualificação). """
+        return ref[0] == table or ref[0] is None and len(self.__tables) == 1
+
+    def candidates(self, store:MemoryStore, table:str, predicates:list, context:dict, pars:dict) -> list:
+        """ Chaves candidatas da tabela pelas igualdades indexáveis dos predicados(ou todas). """
+        memory_table = store.get_table(table)
+        for predicate in predicates:
+            if predicate[0] in ('parameter', 'any') and not self.owns(table, predicate[1]):
+                continue
+            if predicate[0] == 'parameter' and predicate[2] == '=':
+                return memory_table.lookup(predicate[1][1], pars[predicate[3]])
+            if predicate[0] == 'any':
+                keys = {}
+                for value in pars[predicate[2]]:
+                    keys.update(dict.fromkeys(memory_table.lookup(predicate[1][1], value)))
+                return list(keys)
+            if predicate[0] == 'columns':
+                for own, other in ((predicate[1], predicate[2]), (predicate[2], predicate[1])):
+                    if own[0] == table and other[0] in context:
+                        return memory_table.lookup(own[1], self.resolve(store, context, other))
+        return None
+
+    def execute(self, store:MemoryStore, pars:dict) -> list:
+        """ Retorna as rows(tuplas na ordem das colunas do SELECT). """
+        base = store.get_table(self.__tables[0])
+        keys = self.candidates(store, self.__tables[0], self.__where, {}, pars)
+        # ORDER BY "id" em tabela já ordenada: sem sort e com a leitura interrompida no LIMIT...
+        presorted = (self.__order in ([(None, 'id')], [(self.__tables[0], 'id')]) and base.get_ordered())
+        if keys is None:
+            keys = [k for k, row in base.rows()]
+        elif presorted:
+            keys = sorted(keys)
+        stop = (self.__offset + self.__limit) if (presorted and self.__limit is not None) else None
+        #
+        contexts = []
+        for key in keys:
+            row = base.get(key)
+            if row is None:
+                continue
+            for context in self.join({self.__tables[0]: row}, 0, store, pars):
+                if all(self.test(store, context, p, pars) for p in self.__where):
+                    contexts.append(context)
+            if stop is not None and len(contexts) >= stop:
+                break
+        #
+        if self.__order and not presorted:
+            contexts.sort(key=lambda c: tuple(self.sort_value(self.resolve(store, c, r)) for r in self.__order))
+        end = (self.__offset + self.__limit) if self.__limit is not None else None
+        return [tuple(self.resolve(store, c, ref) for name, ref in self.__columns) for c in contexts[self.__offset:end]]
+
+    @staticmethod
+    def sort_value(value) -> tuple:
+        # NULLs por último, como no PostgreSQL(ordem ascendente)...
+        return (value is None, value if value is not None else 0)
+
+    def join(self, context:dict, index:int, store:MemoryStore, pars:dict):
+        """ Generator dos contextos(tabela -> row) do INNER JOIN a partir do índice do join. """
+        if index >= len(self.__joins):
+            yield context
+            return
+        table, predicates = self.__joins[index]
+        memory_table = store.get_table(table)
+        keys = self.candidates(store, table, predicates, context, pars)
+        for key in (keys if keys is not None else [k for k, row in memory_table.rows()]):
+            row = memory_table.get(key)
+            if row is None:
+                continue
+            joined = dict(context)
+            joined[table] = row
+            if all(self.test(store, joined, p, pars) for p in predicates):
+                yield from self.join(joined, index + 1, store, pars)
+
+
+class DBMemory(cls.DatabaseInterface):
+    """
+    Wrapper do banco em memória do processo, com a mesma interface do DBPostgres(rows
+    acessíveis pelo índice e pelo nome da coluna, modo compacto e get_columns()).
+    Selecionado no handler pela chave "backend": "memory" dos parâmetros de conexão ou
+    pela variável de ambiente PYAPI_DB_BACKEND=memory.
+    """
+
+    def __init__(self, store:MemoryStore=None) -> None:
+        super().__init__()
+        #
+        self.__store = store if store is not None else get_memory_store()
+        self.__connected = False
+        self.__in_transaction = False
+        self.__undo = []           # [(tabela, chave, row anterior ou None)]
+        self.__rows = []
+        self.__row_count = 0
+        self.__columns = {}
+        self.__key_not_found = False
+
+    def readable_exception(self, exception_err):
+        if exception_err:
+            sqlstate = getattr(exception_err, 'sqlstate', '')
+            return (sqlstate + ' - ' if sqlstate else '') + str(exception_err)
+        return 'Exception desconhecida.'
+
+    def key_not_found(self) -> bool:
+        return self.__key_not_found
+
+    def connect(self, conn_pars:dict=None) -> bool:
+        self.no_errors()
+        self.__connected = True
+        return True
+
+    def get_connection(self):
+        return self.__store if self.__connected else None
+
+    def get_store(self) -> MemoryStore:
+        return self.__store
+
+    def close_connection(self, pars:dict=None) -> bool:
+        if self.__in_transaction:
+            self.rollback()
+        self.__connected = False
+        self.discard_commit_hooks()
+        return True
+
+    def is_connected(self) -> bool:
+        return self.__connected
+
+    def start_transaction(self) -> bool:
+        self.no_errors()
+        self.__in_transaction = self.__connected
+        self.__undo = []
+        return self.__in_transaction
+
+    def in_transaction(self) -> bool:
+        return self.__in_transaction
+
+    def commit(self) -> bool:
+        self.no_errors()
+        self.__in_transaction = False
+        self.__undo = []
+        self.pop_notifications()   # Sem outros processos para notificar
+        self.run_commit_hooks()
+        return True
+
+    def rollback(self) -> bool:
+        self.no_errors()
+        with self.__store.get_lock():
+            for table, key, row in reversed(self.__undo):
+                memory_table = self.__store.get_table(table)
+                if row is None:
+                    memory_table.remove(key)
+                else:
+                    memory_table.put(key, row)
+        self.__in_transaction = False
+        self.__undo = []
+        self.discard_commit_hooks()
+        return True
+
+    def __begin(self) -> bool:
+        """ Início de um comando: zera o retorno anterior e confere a conexão. """
+        self.no_errors()
+        self.__rows = []
+        self.__row_count = 0
+        self.__columns = {}
+        if not self.__connected:
+            self.set_error(msg='Sem conexão com o banco.')
+        return not self.get_error()
+
+    def __changed(self, table:MemoryTable, key, old:dict):
+        """ Registra o estado anterior da row para o rollback. """
+        if self.__in_transaction:
+            self.__undo.append((table.get_name(), key, old))
+
+    def query(self, sql:str, pars:Union[dict,list], commit:False, compact:bool=False):
+        """ Executa um SELECT suportado(ver MemorySelect). Retorna bool True/False: Quanto ao sucesso na execução. """
+        if not self.__begin():
+            return False
+        try:
+            select = _SELECTS.get(sql)
+            if select is None:
+                select = MemorySelect(sql)
+                if len(_SELECTS) >= cts._SQL_TEMPLATE_CACHE_MAX:
+                    _SELECTS.clear()
+                _SELECTS[sql] = select
+            with self.__store.get_lock():
+                rows = select.execute(self.__store, pars if type(pars) is dict else {})
+            self.__columns = {name: i for i, name in enumerate(select.get_column_names())}
+            self.__rows = rows if compact else [MemoryRow(row, self.__columns) for row in rows]
+            self.__row_count = len(rows)
+            if not compact:
+                self.__columns = {}
+        except (MemoryDBError, KeyError, TypeError) as error:
+            self.set_error(msg='Falha em execução de query. [{}]'.format(self.readable_exception(error)))
+        #
+        return not self.get_error()
+
+    def stream(self, sql:str, pars:Union[dict,list], itersize:int=cts._PG_STREAM_ITERSIZE, compact:bool=False):
+        """ Mesmo generator do DBPostgres.stream(), sobre o resultado do SELECT em memória(get_row_count() = rows já entregues). """
+        if self.query(sql=sql, pars=pars, commit=False, compact=compact):
+            rows, self.__rows, self.__row_count = self.__rows, [], 0
+            for row in rows:
+                self.__row_count += 1
+                yield row
+
+    def fetch(self, clause:str, cursor) -> bool:
+        """ No banco em memória o retorno já está em get_rows() após a query. """
+        return not self.get_error()
+
+    def insert_row(self, table:MemoryTable, fields:dict, conflict:tuple=None) -> dict:
+        """
+        Inclui uma row(colunas em minúsculas, como no PostgreSQL). Com "conflict"(expressão, ação)
+        retorna a row existente("update") ou None("nothing") no conflito; sem ele, o conflito é erro.
+        """
+        row = {c.lower(): v for c, v in fields.items()}
+        if table.get_serial() is not None and row.get(table.get_serial()) is None:
+            existing = table.find_conflict(row, conflict[0]) if conflict is not None else None
+            if existing is not None:
+                return table.get(existing) if conflict[1] == 'update' else None
+            row[table.get_serial()] = table.next_value()
+        existing = table.find_conflict(row, conflict[0] if conflict is not None else None)
+        if existing is not None:
+            if conflict is None:
+                raise MemoryDBError('duplicate key value violates unique constraint "{}_pkey"'.format(table.get_name()), '23505')
+            return table.get(existing) if conflict[1] == 'update' else None
+        key = table.key_of(row)
+        table.put(key, row)
+        self.__changed(table, key, None)
+        return row
+
+    @staticmethod
+    def parse_sufix(sufix:str) -> tuple:
+        """ ON CONFLICT((expressão)) DO NOTHING/UPDATE e as colunas do RETURNING do sufix. """
+        conflict, returning = None, []
+        match = _SQL_CONFLICT.search(sufix or '')
+        if match is not None:
+            conflict = (match.group(1).strip().lower(), 'nothing' if match.group(2).upper() == 'NOTHING' else 'update')
+        match = _SQL_RETURNING.search(sufix or '')
+        if match is not None:
+            returning = [c.strip().lower() for c in match.group(1).split(',')]
+        return conflict, returning
+
+    def insert(self, table:str, fields:dict, sufix:str=''):
+        """ Inclusão de um registro. Com RETURNING no sufix, get_rows() é a row retornada(como o fetchone()). """
+        if self.__begin():
+            try:
+                conflict, returning = self.parse_sufix(sufix)
+                with self.__store.get_lock():
+                    row = self.insert_row(self.__store.get_table(table), fields, conflict)
+                if row is not None:
+                    self.__row_count = 1
+                    if returning:
+                        self.__rows = MemoryRow(tuple(row.get(c) for c in returning), {c: i for i, c in enumerate(returning)})
+            except MemoryDBError as error:
+                self.set_error(msg='Falha em execução de query. [{}]'.format(self.readable_exception(error)))
+        return not self.get_error()
+
+    def insert_many(self, table:str, rows:list, returning:str='', sufix:str=''):
+        """ Inclusão de vários registros; get_rows() com os valores da coluna em "returning". """
+        if self.__begin() and rows:
+            try:
+                conflict, sufix_returning = self.parse_sufix(sufix)
+                with self.__store.get_lock():
+                    memory_table = self.__store.get_table(table)
+                    inserted = [self.insert_row(memory_table, fields, conflict) for fields in rows]
+                inserted = [row for row in inserted if row is not None]
+                self.__rows = [row.get(returning.lower()) for row in inserted] if returning != '' else []
+                self.__row_count = len(inserted)
+            except MemoryDBError as error:
+                self.set_error(msg='Falha na inclusão em lote. [{}]'.format(self.readable_exception(error)))
+        return not self.get_error()
+
+    def update(self, table:str, pk:dict, fields:dict):
+        """ Alteração das rows da chave(todas as igualdades em "pk"). """
+        self.__key_not_found = False
+        if self.__begin():
+            with self.__store.get_lock():
+                memory_table = self.__store.get_table(table)
+                keys = memory_table.find({c.lower(): v for c, v in pk.items()})
+                for key in keys:
+                    old = memory_table.get(key)
+                    row = dict(old)
+                    row.update({c.lower(): v for c, v in fields.items()})
+                    memory_table.put(key, row)
+                    self.__changed(memory_table, key, old)
+            self.__row_count = len(keys)
+            if self.__row_count == 0:
+                self.__key_not_found = True
+                self.set_error('Tentativa de alterar registro não existente na tabela.')
+        return not self.get_error()
+
+    def delete(self, table:str, pk:dict):
+        """ Exclusão das rows da chave(todas as igualdades em "pk"). """
+        self.__key_not_found = False
+        if self.__begin():
+            with self.__store.get_lock():
+                memory_table = self.__store.get_table(table)
+                keys = memory_table.find({c.lower(): v for c, v in pk.items()})
+                for key in keys:
+                    old = memory_table.get(key)
+                    memory_table.remove(key)
+                    self.__changed(memory_table, key, old)
+            self.__row_count = len(keys)
+            if self.__row_count == 0:
+                self.__key_not_found = True
+                self.set_error('Tentativa de excluir registro não existente na tabela.')
+        return not self.get_error()
+
+    def count_all(self, table:str, condition:dict):
+        """ Contagem das rows da condição, em get_rows()[0]['count']. """
+        if self.__begin():
+            with self.__store.get_lock():
+                count = len(self.__store.get_table(table).find({c.lower(): v for c, v in condition.items()}))
+            self.__rows = [MemoryRow((count,), {'count': 0})]
+            self.__row_count = 1
+        return not self.get_error()
+
+    def get_rows(self) -> list:
+        return self.__rows
+
+    def get_columns(self) -> dict:
+        return self.__columns
+
+    def get_row_count(self) -> int:
+        return self.__row_count
+
+
+# SELECTs já interpretados(SQL -> MemorySelect)...
+_SELECTS = {}
@@ -0,0 +1,139 @@
+#--------------------------------------------------------------------
+# Invalidação dos caches do processo entre os processos(workers) da
+# API por LISTEN/NOTIFY do PostgreSQL: os CRUDs de alteração publicam
+# os eventos(NOTIFY) no commit e cada processo mantém uma thread que
+# escuta o canal(LISTEN) e descarta as entradas dos seus caches.
+#--------------------------------------------------------------------
+
+import os
+import json
+import select
+import socket
+import logging
+import threading
+import psycopg2
+import psycopg2.extensions
+
+import py_api_consts as cts
+import py_api_classes as cls
+import py_api_cache as cache
+
+logger = logging.getLogger('pyapi.notify')
+
+# Handlers dos eventos por entidade: entidade -> [fn(id, op)]...
+_HANDLERS = {}
+_HANDLERS_LOCK = threading.Lock()
+
+# Listener do processo(recriado no processo filho após o fork)...
+_LISTENER = {'pid': None, 'thread': None, 'stop': None}
+_LISTENER_LOCK = threading.Lock()
+
+
+def get_sender() -> str:
+    """ Identificação do processo publicador(host:pid), avaliada a cada chamada por causa do fork. """
+    return '{}:{}'.format(socket.gethostname(), os.getpid())
+
+def publish(db:cls.DatabaseInterface, entity:str, id, op:str):
+    """
+    Registra na transação em curso o evento de alteração do cadastro, publicado(NOTIFY)
+    somente no commit. Sem efeito com o NOTIFY desligado na conexão ou fora de transação.
+    Parâmetros:
+      DatabaseInterface db: Conexão da transação
+      str entity: Entidade alterada(Ex: 'product', 'manufacturer', 'productmanufacturer')
+      id: Chave da entidade
+      str op: Operação('insert', 'update' ou 'delete')
+    """
+    payload = json.dumps({'sender': get_sender(), 'entity': entity, 'id': id, 'op': op}, separators=(',', ':'))
+    db.add_notification(cts._PG_NOTIFY_CHANNEL, payload)
+
+def register_handler(entity:str, fn):
+    """ Registra a função fn(id, op) chamada a cada evento de alteração da entidade vindo de outro processo. """
+    with _HANDLERS_LOCK:
+        _HANDLERS.setdefault(entity, []).append(fn)
+
+def dispatch(payload:str) -> bool:
+    """
+    Trata um evento recebido no canal, ignorando os publicados pelo próprio processo(os
+    caches locais já foram atualizados no commit). Retorna True se o evento foi tratado.
+    """
+    try:
+        event = json.loads(payload)
+        entity, id, op = event['entity'], event.get('id'), event.get('op')
+    except (ValueError, TypeError, KeyError):
+        logger.warning('Notificação inválida ignorada: %s', payload)
+        return False
+    if event.get('sender') == get_sender():
+        return False
+    #
+    with _HANDLERS_LOCK:
+        handlers = list(_HANDLERS.get(entity, []))
+    for fn in handlers:
+        try:
+            fn(id, op)
+        except Exception:
+            logger.exception('Falha no handler de notificação da entidade "%s".', entity)
+    #
+    return True
+
+def clear_caches():
+    """ Limpa todos os caches do processo(eventos podem ter sido perdidos sem o LISTEN ativo). """
+    for process_cache in cache.get_caches().values():
+        process_cache.clear()
+
+def listen(conn_pars:dict, stop:threading.Event):
+    """
+    Laço do listener: conexão dedicada(autocommit) em LISTEN no canal, reconectando após
+    as falhas. A cada (re)conexão os caches do processo são limpos.
+    """
+    while not stop.is_set():
+        connection = None
+        try:
+            connection = psycopg2.connect(cls.pg_dsn(conn_pars))
+            connection.set_session(autocommit=True)
+            cursor = connection.cursor()
+            cursor.execute('LISTEN {}'.format(psycopg2.extensions.quote_ident(cts._PG_NOTIFY_CHANNEL, cursor)))
+            cursor.close()
+            clear_caches()
+            #
+            while not stop.is_set():
+                if select.select([connection], [], [], cts._PG_NOTIFY_POLL) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    dispatch(connection.notifies.pop(0).payload)
+        except (psycopg2.Error, OSError, ValueError) as error:
+            logger.warning('Falha no listener de notificações, reconectando em %ss: %s', cts._PG_NOTIFY_RECONNECT, error)
+            stop.wait(cts._PG_NOTIFY_RECONNECT)
+        finally:
+            if connection is not None:
+                try:
+                    connection.close()
+                except psycopg2.Error:
+                    pass
+
+def start_listener(conn_pars:dict) -> bool:
+    """
+    Inicia(uma vez por processo) a thread do listener das notificações. Chamado a cada
+    request: com o listener já ativo no processo não faz nada.
+    Retorna bool True se o listener foi iniciado nessa chamada.
+    """
+    pid = os.getpid()
+    if _LISTENER['pid'] == pid:
+        return False
+    with _LISTENER_LOCK:
+        if _LISTENER['pid'] == pid:
+            return False
+        stop = threading.Event()
+        thread = threading.Thread(target=listen, args=(conn_pars, stop), name='pyapi-notify', daemon=True)
+        thread.start()
+        _LISTENER.update({'pid': pid, 'thread': thread, 'stop': stop})
+    #
+    return True
+
+def stop_listener():
+    """ Encerra a thread do listener do processo(aguarda no máximo uma volta do laço). """
+    with _LISTENER_LOCK:
+        if _LISTENER['pid'] == os.getpid() and _LISTENER['stop'] is not None:
+            _LISTENER['stop'].set()
+            _LISTENER['thread'].join(cts._PG_NOTIFY_POLL + 1)
+        _LISTENER.update({'pid': None, 'thread': None, 'stop': None})
@@ -7,16 +7,31 @@ import json
 import jsonschema
 
 from typing import Union
-from jsonschema import validate
 
 import py_api_consts as cts
 import py_api_classes as cls          
 import py_api_functions as fns               
+import py_api_cache as cache
+import py_api_notify as notify
+
+# Cache dos ETags dos detalhes de produto(id -> ETag) do processo: preenchido pelas consultas
+# de detalhes e invalidado pelas alterações/exclusões após o commit...
+_PRODUCT_ETAGS = cache.get_cache(  name='product_etag', 
+                                   max_size=cts._PRODUCT_ETAG_CACHE_MAX, 
+                                   ttl=cts._PRODUCT_ETAG_CACHE_TTL, 
+                                   enabled=cts._PRODUCT_ETAG_CACHE
+                                )
+
+def get_product_etag_cache() -> cache.LRUTTLCache:
+    return _PRODUCT_ETAGS
+
+# Alterações de produtos nos outros processos(NOTIFY) - Invalida o ETag do produto...
+notify.register_handler('product', lambda product_id, op: _PRODUCT_ETAGS.delete(product_id))
 
 class CheckProductPUTRequest(cls.CheckRequest):
     """ Checagem do request para PUT(Inclusão de produto). """
     
-    def __init__(self, body:Union[str,dict], db:cls.DatabaseInterface):
+    def __init__(self, body:Union[str,dict,cls.RequestContext], db:cls.DatabaseInterface):
         super().__init__(http_method=cts._PUT, body=body, db=db) 
         
         # Importa o schema json de validação do request...
@@ -27,18 +42,17 @@ class CheckProductPUTRequest(cls.CheckRequest):
             
     def check(self):
         """ Implementação da validação dos atributos do request. """
-        if super().check():
-            try:
-                 validate(instance=self.get_request(), schema=self.get_schema())
-            except jsonschema.exceptions.ValidationError as err:
-                 self.set_error('Request inválido. [{}]'.format(err.message))
+        try:
+            self.validate_schema()
+        except jsonschema.exceptions.ValidationError as err:
+            self.set_error('Request inválido. [{}]'.format(err.message))
         #
         return not self.get_error() 
     
 class CheckProductPOSTRequest(cls.CheckRequest):
     """ Checagem do request para POST(Alteração de produto). """
     
-    def __init__(self, body:Union[str,dict], db:cls.DatabaseInterface):
+    def __init__(self, body:Union[str,dict,cls.RequestContext], db:cls.DatabaseInterface):
         super().__init__(http_method=cts._POST, body=body, db=db) 
         
         # Importa o schema json de validação do request...
@@ -50,7 +64,7 @@ class CheckProductPOSTRequest(cls.CheckRequest):
     def check(self):
         """ Implementação da validação dos atributos do request. """
         try:
-            validate(instance=self.get_request(), schema=self.get_schema())
+            self.validate_schema()
         except jsonschema.exceptions.ValidationError as err:
             self.set_error('Request inválido. [{}]'.format(err.message))
         #
@@ -63,7 +77,7 @@ class CheckProductDELETERequest(cls.CheckRequest):
     OBS: Um produto nunca é excluído, ele somente é desativado.
     """    
     
-    def __init__(self, body:Union[str,dict], db:cls.DatabaseInterface):
+    def __init__(self, body:Union[str,dict,cls.RequestContext], db:cls.DatabaseInterface):
         super().__init__(http_method=cts._DEL, body=body, db=db) 
         
         # Importa o schema json de validação do request...
@@ -75,7 +89,7 @@ class CheckProductDELETERequest(cls.CheckRequest):
     def check(self):
         """ Implementação da validação dos atributos do request. """
         try:
-            validate(instance=self.get_request(), schema=self.get_schema())
+            self.validate_schema()
         except jsonschema.exceptions.ValidationError as err:
             self.set_error('Request inválido. [{}]'.format(err.message))
         #
@@ -86,7 +100,7 @@ class CheckProductGETRequest(cls.CheckRequest):
     Checagem do request para GET(Consultas/Queries). 
     """    
     
-    def __init__(self, body:Union[str,dict], db:cls.DatabaseInterface):
+    def __init__(self, body:Union[str,dict,cls.RequestContext], db:cls.DatabaseInterface):
         super().__init__(http_method=cts._GET, body=body, db=db) 
         
         # Importa o schema json de validação do request...
@@ -98,41 +112,161 @@ class CheckProductGETRequest(cls.CheckRequest):
     def check(self):
         """ Implementação da validação dos atributos do request. """
         try:
-            validate(instance=self.get_request(), schema=self.get_schema())
+            self.validate_schema()
         except jsonschema.exceptions.ValidationError as err:
             self.set_error('Request inválido. [{}]'.format(err.message))            
         #
+        if not self.get_error():
+            self.check_cursor()
+        #
+        if not self.get_error() and 'export' in self.get_request():
+            # Exportação de todo o catálogo - Sem filtros/paginação...
+            if any(a in self.get_request() for a in ('id', 'ids', 'page', 'cursor')):
+                self.set_error('A exportação("export") não aceita "id", "ids", "page" ou "cursor".')
+        #
+        if not self.get_error() and 'ids' in self.get_request():
+            # Consulta de vários produtos...
+            if 'id' in self.get_request():
+                self.set_error('Informe o "id" ou os "ids", não ambos.')
+            elif 'cursor' in self.get_request():
+                self.set_error('A consulta de vários produtos("ids") não aceita "cursor".')
+            elif len(GetProduct.parse_ids(self.get_request()['ids'])) > cts._QRY_MAX_IDS_PER_REQUEST:
+                self.set_error('Máximo de {} "ids" por requisição.'.format(cts._QRY_MAX_IDS_PER_REQUEST))
+        #
         return not self.get_error()               
 
 #---------------------------------------------------------------------------------------    
 
+class CheckProductBulkPUTRequest(cls.CheckRequest):
+    """ 
+    Checagem do request para PUT em lote(Inclusão de vários produtos). 
+    Cada produto é validado separadamente e o resultado fica em get_items().
+    """
+    
+    def __init__(self, body:Union[str,dict,cls.RequestContext], db:cls.DatabaseInterface):
+        super().__init__(http_method=cts._PUT, body=body, db=db) 
+        
+        self.__items = []
+        
+        # Importa os schemas json de validação do request e de cada produto...
+        self.__schema = cts._BULK_INSERT_PRODUCT_JSON_SCHEMA
+        self.__item_schema = cts._INSERT_PRODUCT_JSON_SCHEMA
+        
+    def get_schema(self) -> dict:        
+        return self.__schema
+    
+    def get_item_schema(self) -> dict:        
+        return self.__item_schema
+    
+    def get_atomic(self) -> bool:
+        """ True(padrão) quando todos os produtos devem ser incluídos ou nenhum. """
+        return self.get_request().get('atomic', True)
+    
+    def get_items(self) -> list:
+        """ Produtos do request: dicts com "index", "request" e "error"(mensagem ou ''). """
+        return self.__items
+    
+    def get_valid_items(self) -> list:
+        return [item for item in self.__items if not item['error']]
+    
+    def get_item_errors(self) -> int:
+        return len(self.__items) - len(self.get_valid_items())
+                
+    def check(self):
+        """ Implementação da validação dos atributos do request e de cada produto. """
+        try:
+            self.validate_schema()
+        except jsonschema.exceptions.ValidationError as err:
+            self.set_error('Request inválido. [{}]'.format(err.message))
+        #
+        if not self.get_error():
+            for index, product in enumerate(self.get_request()['products']):
+                item = {'index': index, 'request': product, 'error': ''}
+                try:
+                    cls.validate_schema(instance=product, schema=self.__item_schema)
+                    if 'id' not in product['manufacturer'] and 'name' not in product['manufacturer']:
+                        item['error'] = 'Fabricante não informado(Informe o "id" ou o "name" ou ambos).'
+                except jsonschema.exceptions.ValidationError as err:
+                    item['error'] = 'Request inválido. [{}]'.format(err.message)
+                self.__items.append(item)
+        #
+        return not self.get_error()
+
+#---------------------------------------------------------------------------------------    
+
 class InsertProduct(cls.InsertMasterRecord):
     """ Classe para inserção(PUT) de produtos no banco. """
 
     def __init__(self, schema:dict, request:dict, db:cls.DatabaseInterface):
           super().__init__(schema=schema, request=request, db=db)
+    
+    def get_field_values(self) -> dict:
+        """ Campos e valores da tabela "product" para a inclusão. """
+        fieldValues = {'active': cts._YES} # Marca o produto como ativo na inclusão
+     
+        # Lê os atributos do schema e faz relay para os campos da tabela...           
+        for a in self.get_schema()['properties'].keys():
+            if a != 'id' and a != 'manufacturer':
+                # Desvia do "id" que é PK auto-incremento e do "manufacturer" que é tratado em outra classe.
+                # --> Com um framework e dicionário de dados isso seria automático.
+                fieldValues[a] = self.get_request()[a]
+        #
+        return fieldValues
+    
+    def set_result(self) -> bool:
+        """ Trata o retorno da inclusão já executada no banco. """
+        if self.get_db().get_error():
+            self.set_error(self.get_db().get_error_message())    
+        else:
+            # Reserva a chave primária criada na inclusão...                
+            self.set_primary_key({'id': self.get_db().get_rows()[0]})                              
+            notify.publish(self.get_db(), 'product', self.get_primary_key()['id'], 'insert')
+        #    
+        return not self.get_error()                     
         
     def execute(self):           
         if super().execute():                  
-            fieldValues = {'active': cts._YES} # Marca o produto como ativo na inclusão
-         
-            # Lê os atributos do schema e faz relay para os campos da tabela...           
-            for a in self.get_schema()['properties'].keys():
-                if a != 'id' and a != 'manufacturer':
-                    # Desvia do "id" que é PK auto-incremento e do "manufacturer" que é tratado em outra classe.
-                    # --> Com um framework e dicionário de dados isso seria automático.
-                    fieldValues[a] = self.get_request()[a]
-                 
             # Tenta incluir(Com retorno do novo ID no sufix.)...
             self.get_db().insert(  table='product', 
-                                   fields=fieldValues, 
+                                   fields=self.get_field_values(), 
                                    sufix='RETURNING id;'
                                 )        
-            if self.get_db().get_error():
-                self.set_error(self.get_db().get_error_message())    
-            else:
-                # Reserva a chave primária criada na inclusão...                
-                self.set_primary_key({'id': self.get_db().get_rows()[0]})                              
+            self.set_result()
+        #    
+        return not self.get_error()                     
+    
+class InsertProducts(cls.InsertMasterRecord):
+    """ Classe para inserção(PUT) de vários produtos no banco, em lotes(insert_many). """
+
+    def __init__(self, schema:dict, request:dict, db:cls.DatabaseInterface):
+          # request: {"products": [produto, ...]}, com cada produto já validado por "schema"...
+          super().__init__(schema=schema, request=request, db=db)
+    
+    def get_rows(self) -> list:
+        """ Campos e valores da tabela "product" para a inclusão de cada produto. """
+        rows = []
+        for product in self.get_request()['products']:
+            row = {'active': cts._YES} # Marca o produto como ativo na inclusão
+            for a in self.get_schema()['properties'].keys():
+                if a != 'id' and a != 'manufacturer':
+                    row[a] = product[a]
+            rows.append(row)
+        #
+        return rows
+    
+    def set_result(self) -> bool:
+        """ Trata o retorno da inclusão já executada no banco: os "ids" criados na ordem dos produtos. """
+        if self.get_db().get_error():
+            self.set_error(self.get_db().get_error_message())    
+        else:
+            self.set_primary_key({'ids': list(self.get_db().get_rows())})                              
+        #    
+        return not self.get_error()                     
+        
+    def execute(self):           
+        if super().execute():                  
+            self.get_db().insert_many(table='product', rows=self.get_rows(), returning='id')        
+            self.set_result()
         #    
         return not self.get_error()                     
     
@@ -141,29 +275,45 @@ class UpdateProduct(cls.UpdateMasterRecord):
 
     def __init__(self, schema:dict, request:dict, db:cls.DatabaseInterface):
           super().__init__(schema=schema, request=request, db=db)
+    
+    def get_pk(self) -> dict:
+        return { 'id': self.get_request()['id'] }
+    
+    def get_field_values(self) -> dict:
+        """ Campos e valores da tabela "product" para a alteração. """
+        fieldValues = {}
+     
+        # Lê os atributos do schema e faz relay para os campos da tabela...
+        for a in self.get_schema()['properties'].keys():
+            if a != 'id' and a != 'manufacturer':
+                # Desvia do "id" que é PK auto-incremento e do "manufacturer" que é tratado em outra classe.
+                # --> Com um framework e dicionário de dados isso seria automático.
+                fieldValues[a] = self.get_request()[a]
+        #
+        return fieldValues
+    
+    def set_result(self) -> bool:
+        """ Trata o retorno da alteração já executada no banco. """
+        if self.get_db().get_error():
+            self.set_error(self.get_db().get_error_message(), (404 if self.get_db().key_not_found() else 400))    
+        else:
+            # Reserva a chave primária alterada...
+            self.set_primary_key(self.get_pk())                              
+            # Invalida o ETag do produto após o commit...
+            product_id = self.get_pk()['id']
+            self.get_db().add_commit_hook(lambda: _PRODUCT_ETAGS.delete(product_id))
+            notify.publish(self.get_db(), 'product', product_id, 'update')
+        #    
+        return not self.get_error()                         
         
     def execute(self):             
         if super().execute():                
-            fieldValues = {}
-            pk = { 'id': self.get_request()['id'] }
-         
-            # Lê os atributos do schema e faz relay para os campos da tabela...
-            for a in self.get_schema()['properties'].keys():
-                if a != 'id' and a != 'manufacturer':
-                    # Desvia do "id" que é PK auto-incremento e do "manufacturer" que é tratado em outra classe.
-                    # --> Com um framework e dicionário de dados isso seria automático.
-                    fieldValues[a] = self.get_request()[a]
-                 
             # Tenta atualizar...
             self.get_db().update(  table='product', 
-                                   pk=pk,
-                                   fields=fieldValues
+                                   pk=self.get_pk(),
+                                   fields=self.get_field_values()
                                 )        
-            if self.get_db().get_error():
-                self.set_error(self.get_db().get_error_message(), (404 if self.get_db().key_not_found() else 400))    
-            else:
-                # Reserva a chave primária alterada...
-                self.set_primary_key(pk)                              
+            self.set_result()
         #    
         return not self.get_error()                         
     
@@ -175,29 +325,50 @@ class DeleteProduct(cls.DeleteMasterRecord):
     
     def __init__(self, schema:dict, request:dict, db:cls.DatabaseInterface):
           super().__init__(schema=schema, request=request, db=db)
-        
-    def execute(self):                             
-        fieldValues = {'active': cts._NO} # Marca o produto como inativo na exclusão            
-        # Lê a PK no request...
-        pk = { 'id': self.get_request()['id'] }                
-        # Tenta atualizar...
-        self.get_db().update(  table='product', 
-                               pk=pk,
-                               fields=fieldValues
-                            )        
+    
+    def get_pk(self) -> dict:
+        return { 'id': self.get_request()['id'] }
+    
+    def get_field_values(self) -> dict:
+        return {'active': cts._NO} # Marca o produto como inativo na exclusão            
+    
+    def set_result(self) -> bool:
+        """ Trata o retorno da exclusão(desativação) já executada no banco. """
         if self.get_db().get_error():
             self.set_error(self.get_db().get_error_message(), (404 if self.get_db().key_not_found() else 400))     
         else:
             # Reserva a chave primária excluída(desativada)...
-            self.set_primary_key(pk)                              
+            self.set_primary_key(self.get_pk())                              
+            # Invalida o ETag do produto após o commit...
+            product_id = self.get_pk()['id']
+            self.get_db().add_commit_hook(lambda: _PRODUCT_ETAGS.delete(product_id))
+            notify.publish(self.get_db(), 'product', product_id, 'delete')
         #    
         return not self.get_error()                             
+        
+    def execute(self):                             
+        # Tenta atualizar...
+        self.get_db().update(  table='product', 
+                               pk=self.get_pk(),
+                               fields=self.get_field_values()
+                            )        
+        return self.set_result()
     
 class GetProduct(cls.GetMasterRecord):
     """
     Classe para consultas(GET) de produtos no banco.
+    Nos detalhes de um produto, o retorno tem um ETag(get_etag()) e, com o If-None-Match
+    do cliente contendo o ETag atual, get_not_modified() retorna True(HTTP 304) sem o body;
+    com o ETag no cache, nem a consulta é executada.
+    Com "ids"(lista), os detalhes de vários produtos numa única consulta: as rows na ordem
+    dos "ids" e os não encontrados em "missing".
     """    
-    def __init__(self, schema:dict, request:dict, db:cls.DatabaseInterface):
+    def __init__(self, schema:dict, request:dict, db:cls.DatabaseInterface, if_none_match:str=None):
+          self.__if_none_match = if_none_match
+          self.__etag = None
+          self.__etag_generation = None
+          self.__not_modified = False
+          #
           # Define o filtro da consulta pela presença e valor do atributo "id" no request...
           # 'id' = 0 ou ausente implicará em listagem de todos os produtos, senão retornará detalhes de um produto. 
           if 'id' not in request.keys():
@@ -212,11 +383,71 @@ class GetProduct(cls.GetMasterRecord):
           # Order...     
           if 'order' not in request.keys():
                request['order'] = 'id' # Ordem padrão de classificação da consulta.       
+          # Cursor da paginação por chave(já conferido na checagem do request): define a ordem...
+          self.__cursor = None
+          if 'cursor' in request.keys():
+               self.__cursor = cls.ListingCursor.decode(request['cursor'])
+               request['order'] = self.__cursor.get_order()
+          # Vários produtos("ids")...
+          self.__ids = None
+          if 'ids' in request.keys():
+               self.__ids = self.parse_ids(request['ids'])
+               request['ids'] = self.__ids  # Conversão
           #    
           super().__init__(schema=schema, request=request, db=db)              
         
-    def execute(self):        
-        getType = 'L' # Listagem é default
+    @staticmethod
+    def parse_ids(value:Union[str,list]) -> list:
+        """ Lista dos "ids"(str "1,2,3" ou lista) convertidos, sem os repetidos e na ordem informada. """
+        ids = value.split(',') if type(value) is str else value
+        return list(dict.fromkeys(int(id) for id in ids))
+    
+    def get_ids(self) -> list:
+        """ "ids" da consulta de vários produtos(None nas demais consultas). """
+        return self.__ids
+        
+    def get_etag(self) -> str:
+        """ ETag dos detalhes do produto consultado(None na listagem ou produto não encontrado). """
+        return self.__etag
+    
+    def get_not_modified(self) -> bool:
+        """ Retornará True quando o If-None-Match do cliente contém o ETag atual do produto. """
+        return self.__not_modified
+    
+    def check_not_modified(self) -> bool:
+        """ 
+        Confere o If-None-Match pelo ETag em cache, sem consultar o banco. Retorna True quando não modificado.
+        Reserva antes da consulta a geração do ETag no cache: o ETag calculado da consulta só vai para o
+        cache se o produto não foi invalidado(commit/NOTIFY) enquanto isso.
+        """
+        if self.get_request()['id'] != 0:
+            self.__etag_generation = _PRODUCT_ETAGS.get_generation(self.get_request()['id'])
+        if self.get_request()['id'] != 0 and not fns.is_empty(self.__if_none_match):
+            etag = _PRODUCT_ETAGS.get(self.get_request()['id'])
+            if etag is not cache.LRUTTLCache.MISSING and fns.etag_matches(self.__if_none_match, etag):
+                self.__etag = etag
+                self.__not_modified = True
+        #
+        return self.__not_modified
+    
+    @staticmethod
+    def detail_row(row:tuple, cols:dict) -> dict:
+        """ Projeta uma row compacta da consulta de detalhes no dict de retorno do produto. """
+        return {
+              "id": row[cols["id"]],
+              "name": row[cols["product_name"]],
+              "description": row[cols["description"]],
+              "barcode": row[cols["barcode"]],
+              "manufacturer": {
+                    "id": row[cols["manufacturer_id"]],
+                    "name": row[cols["manufacturer_name"]],
+              },
+              "unitPrice": float(row[cols["unitprice"]]),
+              "active": "Yes" if row[cols["active"]] == cts._YES else 'No',
+        }
+        
+    def get_query(self) -> tuple:
+        """ Retorna o SQL e os parâmetros da consulta(listagem ou detalhes) pelo request. """
         parameters = {'id': self.get_request()['id'], 'active': cts._YES}
         #
         # Define o tipo da consulta...        
@@ -224,61 +455,128 @@ class GetProduct(cls.GetMasterRecord):
         #       a nomenclatura das coluna do SELECT. Usarei no momento, a mais básica possível.
         #       E certamente também já existirá até um framework/biblioteca que automatize isso tudo.   
         #       Mas se nada disso existir, desenvolvemos também, se preciso for!    
-        if self.get_request()['id'] == 0:
+        if self.__ids is not None:
+            # Detalhes de vários produtos(uma única consulta)...
+            parameters = {'ids': self.__ids, 'active': cts._YES}
+            sql = self.detail_sql(where='product.id = ANY(%(ids)s)')
+        elif self.get_request()['id'] == 0:
             # Listagem(Paginada)...        
-            order = self.get_request()['order'].strip().lower()                                              
-            sql = ('SELECT id, name '+
-                   'FROM product '+
-                   'WHERE id > %(id)s AND active = %(active)s '+
-                   'ORDER BY ' + ('id' if self.get_request()['order'] == '' else self.get_request()['order']) +' '+
-                   'LIMIT '+ fns.to_str(cts._QRY_PAGE_ROWS_LIMIT) +' OFFSET '+ fns.to_str((self.get_request()['page']-1) * cts._QRY_PAGE_ROWS_LIMIT))            
+            # (Paginação pelo cursor ou, na falta, pela página - Ver cls.listing_query()...)
+            sql, listing_parameters = cls.listing_query(  select='SELECT id, name FROM product',
+                                                          where='active = %(active)s',
+                                                          order=self.get_request()['order'].strip().lower(),
+                                                          page=self.get_request()['page'],
+                                                          cursor=self.__cursor
+                                                       )
+            parameters.update(listing_parameters)
         else:
             # Detalhes...                 
-            getType = 'D'
-            sql = ('SELECT product.id, product.name AS product_name, product.description, '+
-                          'product.barcode, product.unitprice, product.active, '+
-                          'manufacturer.id AS manufacturer_id, manufacturer.name AS manufacturer_name '+
-                   'FROM product'+
-                   
-                   ' INNER JOIN productmanufacturer'+
-                      ' ON productmanufacturer.product_id = product.id'+
-                     ' AND productmanufacturer.active = %(active)s'+
-                     
-                       ' INNER JOIN manufacturer'+
-                          ' ON manufacturer.id = productmanufacturer.manufacturer_id '+  
-                          
-                   'WHERE product.id = %(id)s') 
+            sql = self.detail_sql(where='product.id = %(id)s') 
         #
-        self.get_db().query(sql=sql, pars=parameters, commit=True) 
+        return sql, parameters
+    
+    @staticmethod
+    def detail_sql(where:str) -> str:
+        """ SQL da consulta de detalhes de produto(com o fabricante ativo) com o filtro informado. """
+        return ('SELECT product.id, product.name AS product_name, product.description, '+
+                       'product.barcode, product.unitprice, product.active, '+
+                       'manufacturer.id AS manufacturer_id, manufacturer.name AS manufacturer_name '+
+                'FROM product'+
+                
+                ' INNER JOIN productmanufacturer'+
+                   ' ON productmanufacturer.product_id = product.id'+
+                  ' AND productmanufacturer.active = %(active)s'+
+                  
+                    ' INNER JOIN manufacturer'+
+                       ' ON manufacturer.id = productmanufacturer.manufacturer_id '+  
+                       
+                'WHERE ' + where)
+    
+    def set_result(self) -> bool:
+        """ Trata o retorno(rows compactas) da consulta já executada no banco. """
         if (self.get_db().get_error()):
             self.set_error(self.get_db().get_error_message())
         else:
-            # Prepara o objeto de retorno...
+            # Prepara o objeto de retorno(projeção direta das rows compactas pelo mapa de colunas)...
             request = self.get_request()
             request['maxRowsPerPage'] = cts._QRY_PAGE_ROWS_LIMIT
-            request['rows'] = []
-            for row in self.get_db().get_rows():
-                if getType == 'L':
-                    request['rows'].append({
-                          'id': row['id'],
-                        'name': row['name']
-                    })                                           
-                else:
-                    request['rows'].append({
-                          "id": row["id"],
-                          "name": row["product_name"],
-                          "description": row["description"],
-                          "barcode": row["barcode"],
-                          "manufacturer": {
-                                "id": row["manufacturer_id"],
-                                "name": row["manufacturer_name"],
-                          },
-                          "unitPrice": float(row["unitprice"]),
-                          "active": "Yes" if row["active"] == cts._YES else 'No',
-                    })     
+            cols = self.get_db().get_columns()
+            if self.__ids is not None:
+                # Vários produtos - Na ordem dos "ids" e os não encontrados em "missing"...
+                found = {}
+                for row in self.get_db().get_rows():
+                    found[row[cols['id']]] = self.detail_row(row, cols)
+                request['rows'] = [found[id] for id in self.__ids if id in found]
+                request['missing'] = [id for id in self.__ids if id not in found]
+            elif request['id'] == 0:
+                # Listagem...
+                c_id, c_name = cols.get('id'), cols.get('name')
+                request['rows'] = [{'id': row[c_id], 'name': row[c_name]} for row in self.get_db().get_rows()]
+                # Cursor da próxima página(None na última)...
+                request['rows'], request['next'] = cls.listing_rows(request['rows'], request['order'])
+            else:
+                request['rows'] = [self.detail_row(row, cols) for row in self.get_db().get_rows()]
+                # ETag dos detalhes(reservado no cache para os próximos If-None-Match, exceto quando lido de
+                # uma réplica, possivelmente atrasada, ou quando o produto foi alterado durante a consulta)...
+                if request['rows']:
+                    self.__etag = fns.etag(request['rows'][0])
+                    if self.__etag_generation is not None and not self.get_db().reads_from_replica():
+                        _PRODUCT_ETAGS.set(request['id'], self.__etag, generation=self.__etag_generation)
+                    self.__not_modified = fns.etag_matches(self.__if_none_match, self.__etag)
             #
             # Atualiza o request com as propriedades/atributos para retorno da consulta...
             self.set_request(request)                            
         #    
         return not self.get_error()      
-#--------------------------------------------------------------------------------------    
\ No newline at end of file
+        
+    def execute(self):        
+        if self.check_not_modified():
+            return True
+        sql, parameters = self.get_query()
+        self.get_db().query(sql=sql, pars=parameters, commit=True, compact=True) 
+        return self.set_result()
+
+class ExportProducts(cls.GetMasterRecord):
+    """
+    Classe para a exportação(GET com "export") de todos os produtos ativos, com o fabricante, em
+    NDJSON(um produto por linha, no mesmo formato dos detalhes). As rows chegam por um cursor 
+    server-side(db.stream()) e as linhas são entregues por um generator(stream()), com memória 
+    constante e a primeira linha enviada logo.
+    """
+    
+    def get_query(self) -> tuple:
+        """ SQL e parâmetros da exportação(ordem do "id": estável entre exportações). """
+        return (GetProduct.detail_sql(where='product.active = %(active)s') + ' ORDER BY product.id', 
+                {'active': cts._YES})
+    
+    @staticmethod
+    def encode_row(row:tuple, cols:dict) -> bytes:
+        """ Linha NDJSON do produto(row compacta da consulta de detalhes). """
+        return fns.json_encode(GetProduct.detail_row(row, cols)) + b'\n'
+    
+    def get_error_line(self) -> bytes:
+        """ 
+        Linha final da exportação interrompida por falha({"error": ...}): o status HTTP 200
+        já foi enviado com as primeiras linhas.
+        """
+        return fns.json_encode({'error': self.get_error_message()}) + b'\n'
+    
+    def add_line(self, chunk:bytearray, row:tuple) -> bool:
+        """ Acumula a linha do produto no chunk. Retorna True quando o chunk deve ser enviado. """
+        chunk += self.encode_row(row, self.get_db().get_columns())
+        return self.get_db().get_row_count() == 1 or len(chunk) >= cts._EXPORT_CHUNK_BYTES
+    
+    def stream(self):
+        """ Generator dos chunks(bytes) de linhas NDJSON. Consulta o banco somente quando iterado. """
+        sql, parameters = self.get_query()
+        chunk = bytearray()
+        for row in self.get_db().stream(sql=sql, pars=parameters, compact=True):
+            if self.add_line(chunk, row):
+                yield bytes(chunk)
+                chunk.clear()
+        if self.get_db().get_error():
+            self.set_error(self.get_db().get_error_message())
+            chunk += self.get_error_line()
+        if chunk:
+            yield bytes(chunk)
+#--------------------------------------------------------------------------------------
\ No newline at end of file
@@ -25,6 +25,12 @@ class CRUDFacade:
         self.__body = body
         
         self.__status_code = 200
+        self.__headers = {}
+        self.__stream = None
+        
+        # Origem das queries executadas pela facade(instrumentação)...
+        if db is not None:
+            db.set_query_source(type(self).__name__)
         
     def get_db(self):
         return self.__db
@@ -35,6 +41,20 @@ class CRUDFacade:
     def get_status_code(self):
         return self.__status_code
     
+    def set_header(self, name:str, value:str):
+        """ Header adicional da resposta HTTP(Ex: ETag). """
+        self.__headers[name] = value
+    
+    def get_headers(self) -> dict:
+        return self.__headers
+    
+    def set_stream(self, value):
+        """ Generator dos chunks(bytes) da resposta em streaming(Ex: exportação), no lugar do body. """
+        self.__stream = value
+    
+    def get_stream(self):
+        return self.__stream
+    
     def set_body(self, value, add_line=False):
         if add_line and type(value) is str:
             self.__body = '(L'+str(sys._getframe().f_back.f_lineno)+') ' + value
@@ -50,6 +70,19 @@ class CRUDFacade:
         else:    
             return self.__body    
     
+    def finish_transaction(self):
+        """ Commit(sucesso) ou rollback(falha) da transação em curso. """
+        if self.get_db().in_transaction():
+            # Tenta commit...
+            if self.get_status_code() == 200:
+                if not self.get_db().commit():
+                    self.set_status_code(self.get_db().get_error_code())
+                    self.set_body(self.get_db().get_error_message(), True)   
+            #      
+            # Rollback...
+            if self.get_status_code() != 200:
+                self.get_db().rollback()               
+    
     @abstractmethod            
     def execute(self):   
         """ Executa o CRUD. """
@@ -71,10 +104,16 @@ class PUTProductFacade(CRUDFacade):
         Retorna:
            bool True/False quanto ao sucesso na execução.
         """
+        # Request decodificado/validado uma única vez para as checagens de produto e fabricante...
+        request_context = cls.RequestContext(body=self.get_body())
+        if 'products' in request_context.get_request():
+            # Inclusão em lote...
+            return self.execute_bulk(request_context)
+        #
         # Inicia o controle de transações...
         if self.get_db().start_transaction():                                    
             # Checagem da estrutura do request...
-            check_put_request = prod.CheckProductPUTRequest(body=self.get_body(), db=self.get_db())
+            check_put_request = prod.CheckProductPUTRequest(body=request_context, db=self.get_db())
             if check_put_request.execute():
                 # Inclusão...     
                 insert_product = prod.InsertProduct(  schema=check_put_request.get_schema(), 
@@ -83,7 +122,7 @@ class PUTProductFacade(CRUDFacade):
                                                    )                         
                 if insert_product.execute():
                     # Tratamento do fabricante do produto...
-                    check_manufacturer_put_request = manu.CheckManufacturerPUTRequest(body=self.get_body(), db=self.get_db())
+                    check_manufacturer_put_request = manu.CheckManufacturerPUTRequest(body=request_context, db=self.get_db())
                     if check_manufacturer_put_request.execute():
                         if check_manufacturer_put_request.get_insert_manufacturer():
                             # Inclusão do fabricante...                                                      
@@ -93,6 +132,7 @@ class PUTProductFacade(CRUDFacade):
                             if insert_manufacturer.execute():
                                 # Reserva a PK do fabricante incluído...
                                 check_manufacturer_put_request.set_manufacturer_id(insert_manufacturer.get_primary_key()['id'])                                        
+                                check_manufacturer_put_request.set_manufacturer_name(insert_manufacturer.get_registered_name())
                                 # Inclusão do fabricante para o produto...                                                      
                                 insert_product_manufacturer = manu.InsertProductManufacturer(  product_id=insert_product.get_primary_key()['id'],
                                                                                                manufacturer_id=check_manufacturer_put_request.get_manufacturer_id(), 
@@ -134,17 +174,71 @@ class PUTProductFacade(CRUDFacade):
                 self.set_body(check_put_request.get_error_message(), True)   
                 
             # Commit & Rollback...
-            if self.get_db().in_transaction():
-                # Tenta commit...
-                if self.get_status_code() == 200:
-                    if not self.get_db().commit():
-                        self.set_status_code(self.get_db().get_error_code())
-                        self.set_body(self.get_db().get_error_message(), True)   
-                #      
-                # Rollback...
-                if self.get_status_code() != 200:
-                    self.get_db().rollback()               
-            #     
+            self.finish_transaction()
+                   
+        else:   
+            self.set_status_code(self.get_db().get_error_code())
+            self.set_body(self.get_db().get_error_message(), True)             
+        #
+        return self.get_status_code() == 200
+    
+    def execute_bulk(self, request_context:cls.RequestContext):    
+        """ 
+        Executa o PUT em lote({"products": [...], "atomic": true/false}), numa única transação:
+        os fabricantes de todos os produtos resolvidos numa passada, os produtos e as associações
+        com os fabricantes incluídos em lotes. O body traz o resultado de cada produto(set_bulk_result()).
+        Retorna:
+           bool True/False quanto ao sucesso na execução.
+        """
+        items_failed = False
+        # Inicia o controle de transações...
+        if self.get_db().start_transaction():                                    
+            # Checagem da estrutura do request e de cada produto...
+            check_bulk_put_request = prod.CheckProductBulkPUTRequest(body=request_context, db=self.get_db())
+            if check_bulk_put_request.execute():
+                if not self.get_bulk_failed(check_bulk_put_request):
+                    # Fabricantes de todos os produtos...
+                    resolve_manufacturers = manu.ResolveManufacturers(  manufacturers=[i['request']['manufacturer'] for i in check_bulk_put_request.get_valid_items()],
+                                                                        db=self.get_db()
+                                                                     )
+                    if resolve_manufacturers.execute():
+                        self.set_bulk_manufacturers(check_bulk_put_request, resolve_manufacturers)
+                        items = check_bulk_put_request.get_valid_items()
+                        if items and not self.get_bulk_failed(check_bulk_put_request):
+                            # Inclusão dos produtos...
+                            insert_products = prod.InsertProducts(  schema=check_bulk_put_request.get_item_schema(),
+                                                                    request={'products': [i['request'] for i in items]},
+                                                                    db=self.get_db()
+                                                                 )
+                            if insert_products.execute():
+                                # Inclusão dos fabricantes para os produtos...
+                                insert_product_manufacturers = manu.InsertProductManufacturers(  associations=self.get_bulk_associations(items, insert_products),
+                                                                                                 db=self.get_db()
+                                                                                              )
+                                if not insert_product_manufacturers.execute():
+                                    self.set_status_code(insert_product_manufacturers.get_error_code())
+                                    self.set_body(insert_product_manufacturers.get_error_message(), True)
+                            else:
+                                self.set_status_code(insert_products.get_error_code())
+                                self.set_body(insert_products.get_error_message(), True)
+                    else:
+                        self.set_status_code(resolve_manufacturers.get_error_code())
+                        self.set_body(resolve_manufacturers.get_error_message(), True)
+                #
+                if self.get_status_code() == 200 and self.get_bulk_failed(check_bulk_put_request):
+                    # Inclusão atômica com produtos inválidos - Nenhum é incluído...
+                    self.set_status_code(400)
+                    items_failed = True
+            else:   
+                self.set_status_code(check_bulk_put_request.get_error_code())
+                self.set_body(check_bulk_put_request.get_error_message(), True)   
+                
+            # Commit & Rollback...
+            self.finish_transaction()
+            #
+            if self.get_status_code() == 200 or items_failed:
+                # Resultado de cada produto(sucesso ou falha atômica pelos produtos inválidos)...
+                self.set_bulk_result(check_bulk_put_request)
                    
         else:   
             self.set_status_code(self.get_db().get_error_code())
@@ -152,6 +246,49 @@ class PUTProductFacade(CRUDFacade):
         #
         return self.get_status_code() == 200
     
+    @staticmethod
+    def get_bulk_failed(check_bulk_put_request:prod.CheckProductBulkPUTRequest) -> bool:
+        """ Retornará True quando a inclusão em lote é atômica e algum produto é inválido. """
+        return check_bulk_put_request.get_atomic() and check_bulk_put_request.get_item_errors() > 0
+    
+    @staticmethod
+    def set_bulk_manufacturers(check_bulk_put_request:prod.CheckProductBulkPUTRequest, resolve_manufacturers:manu.ResolveManufacturers):
+        """ Reserva o fabricante resolvido de cada produto válido(ou o erro do fabricante não cadastrado). """
+        for item in check_bulk_put_request.get_valid_items():
+            manufacturer_id, manufacturer_name = resolve_manufacturers.get_manufacturer(item['request']['manufacturer'])
+            if manufacturer_id is None:
+                item['error'] = 'Fabricante não cadastrado(id={})'.format(item['request']['manufacturer']['id'])
+            else:
+                item['manufacturer'] = {'id': manufacturer_id, 'name': manufacturer_name}
+    
+    @staticmethod
+    def get_bulk_associations(items:list, insert_products:prod.InsertProducts) -> list:
+        """ Reserva o "id" incluído de cada produto e retorna as associações(product_id, manufacturer_id). """
+        for item, product_id in zip(items, insert_products.get_primary_key()['ids']):
+            item['id'] = product_id
+        return [(item['id'], item['manufacturer']['id']) for item in items]
+    
+    def set_bulk_result(self, check_bulk_put_request:prod.CheckProductBulkPUTRequest):
+        """ Body do PUT em lote: totais e o resultado de cada produto, na ordem do request. """
+        included = self.get_status_code() == 200
+        results = []
+        for item in check_bulk_put_request.get_items():
+            if item['error']:
+                results.append({'index': item['index'], 'statusCode': 400, 'message': item['error']})
+            elif included:
+                results.append({'index': item['index'], 'statusCode': 200, 'id': item['id'], 'manufacturer': item['manufacturer']})
+            else:
+                # Produto válido não incluído pela falha dos demais(inclusão atômica)...
+                results.append({'index': item['index'], 'statusCode': 424, 'message': 'Produto não incluído(inclusão atômica com falhas em outros produtos).'})
+        #
+        inserted = len([r for r in results if r['statusCode'] == 200])
+        self.set_body({
+                         'atomic': check_bulk_put_request.get_atomic(),
+                         'inserted': inserted,
+                         'failed': len(results) - inserted,
+                         'products': results
+                      })
+    
 class POSTProductFacade(CRUDFacade):
     """ 
     Executa os requests de POST de produto.
@@ -170,7 +307,9 @@ class POSTProductFacade(CRUDFacade):
         # Inicia o controle de transações...
         if self.get_db().start_transaction():                                    
             # Checagem da estrutura do request...
-            check_post_request = prod.CheckProductPOSTRequest(body=self.get_body(), db=self.get_db())
+            # Request decodificado/validado uma única vez para as checagens de produto e fabricante...
+            request_context = cls.RequestContext(body=self.get_body())
+            check_post_request = prod.CheckProductPOSTRequest(body=request_context, db=self.get_db())
             if check_post_request.execute():
                 # Alteração...     
                 update_product = prod.UpdateProduct(  schema=check_post_request.get_schema(), 
@@ -179,7 +318,7 @@ class POSTProductFacade(CRUDFacade):
                                                    )                         
                 if update_product.execute():
                     # Tratamento do fabricante do produto...
-                    check_manufacturer_post_request = manu.CheckManufacturerPOSTRequest(body=self.get_body(), db=self.get_db())
+                    check_manufacturer_post_request = manu.CheckManufacturerPOSTRequest(body=request_context, db=self.get_db())
                     if check_manufacturer_post_request.execute():
                         if check_manufacturer_post_request.get_insert_manufacturer():
                             # Inclusão do fabricante...                                                      
@@ -189,6 +328,7 @@ class POSTProductFacade(CRUDFacade):
                             if insert_manufacturer.execute():
                                 # Reserva a PK do fabricante incluído...
                                 check_manufacturer_post_request.set_manufacturer_id(insert_manufacturer.get_primary_key()['id'])                                        
+                                check_manufacturer_post_request.set_manufacturer_name(insert_manufacturer.get_registered_name())
                                 # Inclusão do fabricante para o produto...                                                      
                                 insert_product_manufacturer = manu.InsertProductManufacturer(  product_id=update_product.get_primary_key()['id'],
                                                                                                manufacturer_id=check_manufacturer_post_request.get_manufacturer_id(), 
@@ -242,16 +382,7 @@ class POSTProductFacade(CRUDFacade):
                 self.set_body(check_post_request.get_error_message(), True) 
                 
             # Commit & Rollback...
-            if self.get_db().in_transaction():
-                # Tenta commit...
-                if self.get_status_code() == 200:
-                    if not self.get_db().commit():
-                        self.set_status_code(self.get_db().get_error_code())
-                        self.set_body(self.get_db().get_error_message(), True) 
-                #      
-                # Rollback...
-                if self.get_status_code() != 200:
-                    self.get_db().rollback()               
+            self.finish_transaction()
             #                          
                 
         else:   
@@ -268,25 +399,61 @@ class GETProductFacade(CRUDFacade):
          evitar sobrecarregar o consumer com toda a lógica do GET de produtos. Penso que os riscos
          valem a pena, nesse caso.
     """    
+    
+    def __init__(self, body:Union[str,dict], db:cls.DatabaseInterface, if_none_match:str=None):
+        super().__init__(body=body, db=db)
+        #
+        self.__if_none_match = if_none_match  # Header If-None-Match do cliente(detalhes de produto)
+    
+    def get_if_none_match(self) -> str:
+        return self.__if_none_match
+    
+    def set_export(self, export_products:prod.ExportProducts):
+        """ Response da exportação: as linhas NDJSON em streaming, consultadas somente quando enviadas. """
+        self.set_header('Content-Type', cts._EXPORT_NDJSON_MIMETYPE)
+        self.set_stream(export_products.stream())
+        self.set_body({})
+    
+    def set_result(self, get_product:prod.GetProduct):
+        """ Response da consulta já executada: body ou, com o ETag do cliente ainda válido, 304 sem body. """
+        if get_product.get_etag() is not None:
+            self.set_header('ETag', get_product.get_etag())
+        if get_product.get_not_modified():
+            self.set_status_code(304)
+            self.set_body({})
+        else:
+            # Response(json encode)...
+            self.set_body(get_product.get_request())
        
     def execute(self):    
         """ 
         Executa o GET. 
         Inicializa as propriedade __status_code e __body.
         Retorna:
-           bool True/False quanto ao sucesso na execução.
+           bool True/False quanto ao sucesso na execução(200 ou 304).
         """    
         # Checagem da estrutura do request...
         check_get_request = prod.CheckProductGETRequest(body=self.get_body(), db=self.get_db())
-        if check_get_request.execute():
+        if check_get_request.execute() and 'export' in check_get_request.get_request():
+            # Exportação...
+            export_products = prod.ExportProducts(  schema=check_get_request.get_schema(), 
+                                                    request=check_get_request.get_request(), 
+                                                    db=self.get_db()
+                                                 )
+            if export_products.execute():
+                self.set_export(export_products)
+            else:
+                self.set_status_code(export_products.get_error_code())
+                self.set_body(export_products.get_error_message(), True) 
+        elif not check_get_request.get_error():
             # Consulta...     
             get_product = prod.GetProduct(  schema=check_get_request.get_schema(), 
                                             request=check_get_request.get_request(), 
-                                            db=self.get_db()
+                                            db=self.get_db(),
+                                            if_none_match=self.__if_none_match
                                          )                         
             if get_product.execute():
-                # Response(json encode)...
-                 self.set_body(get_product.get_request())
+                self.set_result(get_product)
             else:   
                 self.set_status_code(get_product.get_error_code())
                 self.set_body(get_product.get_error_message(), True) 
@@ -295,7 +462,7 @@ class GETProductFacade(CRUDFacade):
             self.set_status_code(check_get_request.get_error_code())
             self.set_body(check_get_request.get_error_message(), True) 
         #
-        return self.get_status_code() == 200    
+        return self.get_status_code() in (200, 304)    
 
 
 class DELETEProductFacade(CRUDFacade):
@@ -345,16 +512,7 @@ class DELETEProductFacade(CRUDFacade):
                 self.set_body(check_del_request.get_error_message(), True) 
                 
             # Commit & Rollback...
-            if self.get_db().in_transaction():
-                # Tenta commit...
-                if self.get_status_code() == 200:
-                    if not self.get_db().commit():
-                        self.set_status_code(self.get_db().get_error_code())
-                        self.set_body(self.get_db().get_error_message(), True) 
-                #      
-                # Rollback...
-                if self.get_status_code() != 200:
-                    self.get_db().rollback()               
+            self.finish_transaction()
             #      
                        
         else:   
@@ -0,0 +1,256 @@
+#--------------------------------------------------------------------
+# Profiling(cProfile) sob demanda das requisições: pelo header com o
+# token protegido(variável de ambiente PYAPI_PROFILE_TOKEN) ou por
+# amostragem(PYAPI_PROFILE_SAMPLE=0.001...). O dump(.prof) de cada
+# requisição perfilada vai para uma pasta em rotação e o resumo das
+# funções com maior tempo vai nos headers da resposta.
+# --> Desligado por padrão(custo de uma checagem por requisição). Uma
+#     única requisição por processo é perfilada de cada vez.
+# --> Na exportação(body em streaming) o profiling continua durante o
+#     envio dos chunks e o dump é gravado no final do envio; o resumo
+#     vai somente para o log(os headers já foram enviados).
+#--------------------------------------------------------------------
+
+import os
+import hmac
+import time
+import random
+import pstats
+import inspect
+import logging
+import cProfile
+import functools
+import itertools
+import threading
+
+import py_api_consts as cts
+
+logger = logging.getLogger('pyapi.profile')
+
+
+def parse_sample_rate(value) -> float:
+    """ Taxa de amostragem(Ex: variável PYAPI_PROFILE_SAMPLE). Valor inválido: registrado no log e amostragem desligada(0). """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        logger.warning('Taxa de amostragem do profiling inválida(%r): amostragem desligada.', value)
+        return 0.0
+
+
+class RequestProfiler:
+    """
+    Configuração e execução do profiling das requisições do processo(thread-safe).
+    Ligado quando há token ou taxa de amostragem > 0.
+    """
+
+    def __init__(self, token:str='', sample_rate:float=cts._PROFILE_SAMPLE_RATE, directory:str=cts._PROFILE_DIR,
+                 max_files:int=cts._PROFILE_MAX_FILES, top:int=cts._PROFILE_TOP):
+        self.__token = token or ''
+        self.__sample_rate = min(1.0, max(0.0, parse_sample_rate(sample_rate)))
+        self.__directory = directory
+        self.__max_files = int(max_files)
+        self.__top = int(top)
+        self.__enabled = self.__token != '' or self.__sample_rate > 0
+        self.__busy = threading.Lock()   # Uma requisição perfilada por vez(um único profiler ativo)
+        self.__sequence = itertools.count(1)
+
+    def get_enabled(self) -> bool:
+        return self.__enabled
+
+    def set_token(self, value:str):
+        self.__token = value or ''
+        self.__enabled = self.__token != '' or self.__sample_rate > 0
+
+    def set_sample_rate(self, value:float):
+        self.__sample_rate = min(1.0, max(0.0, parse_sample_rate(value)))
+        self.__enabled = self.__token != '' or self.__sample_rate > 0
+
+    def get_sample_rate(self) -> float:
+        return self.__sample_rate
+
+    def get_directory(self) -> str:
+        return self.__directory
+
+    def set_directory(self, value:str):
+        self.__directory = value
+
+    def set_max_files(self, value:int):
+        self.__max_files = int(value)
+
+    def set_top(self, value:int):
+        self.__top = int(value)
+
+    def trigger(self, token) -> str:
+        """
+        Motivo do profiling da requisição: 'token'(header com o token correto), 'sample'(amostragem)
+        ou '' quando a requisição não deve ser perfilada.
+        """
+        if self.__token != '' and token and hmac.compare_digest(str(token).encode(), self.__token.encode()):
+            return 'token'
+        if self.__sample_rate > 0 and random.random() < self.__sample_rate:
+            return 'sample'
+        return ''
+
+    def summary(self, profile:cProfile.Profile) -> str:
+        """ Funções com maior tempo próprio: "arquivo:linha(função)=próprio/acumulado ms", separadas por ";". """
+        stats = pstats.Stats(profile).stats
+        top = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:self.__top]
+        items = []
+        for (filename, line, function), (cc, nc, tt, ct, callers) in top:
+            items.append('{}:{}({})={:.1f}/{:.1f}ms'.format(os.path.basename(filename), line, function, tt * 1000.0, ct * 1000.0))
+        # Header HTTP: somente ASCII...
+        return ';'.join(items).encode('ascii', 'replace').decode('ascii')
+
+    def new_name(self) -> str:
+        """ Nome do próximo dump: "AAAAMMDDHHMMSS-pid-sequência.prof". """
+        return '{}-{}-{}.prof'.format(time.strftime('%Y%m%d%H%M%S'), os.getpid(), next(self.__sequence))
+
+    def save(self, profile:cProfile.Profile, name:str=None) -> str:
+        """ Grava o dump na pasta e descarta os mais antigos além de max_files. Retorna o nome do arquivo. """
+        os.makedirs(self.__directory, exist_ok=True)
+        name = name or self.new_name()
+        profile.dump_stats(os.path.join(self.__directory, name))
+        #
+        dumps = sorted((entry for entry in os.scandir(self.__directory) if entry.name.endswith('.prof')),
+                       key=lambda entry: entry.stat().st_mtime)
+        for entry in dumps[:max(0, len(dumps) - self.__max_files)]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+        return name
+
+    def finish(self, profile:cProfile.Profile, trigger:str, name:str=None) -> dict:
+        """ Resumo, gravação do dump e log da requisição perfilada. Retorna os headers do profiling. """
+        headers = {}
+        try:
+            headers[cts._PROFILE_SUMMARY_HEADER] = self.summary(profile)
+            headers[cts._PROFILE_ID_HEADER] = self.save(profile, name)
+            logger.info('Requisição perfilada(%s): %s | %s', trigger, headers[cts._PROFILE_ID_HEADER],
+                        headers[cts._PROFILE_SUMMARY_HEADER])
+        except (OSError, ValueError):
+            # O profiling nunca derruba a requisição...
+            logger.exception('Falha na gravação do profiling da requisição.')
+        return headers
+
+    def release(self):
+        """ Libera o profiling para a próxima requisição(final do envio do body em streaming). """
+        self.__busy.release()
+
+    def run(self, fn, trigger:str, *args, **kwargs):
+        """
+        Executa fn(*args, **kwargs) sob o cProfile e retorna (resultado, headers do profiling).
+        Com outra requisição já em profiling no processo, executa sem profiling(headers vazios).
+        Com o "body" do resultado em streaming(generator), o body é trocado por um ProfiledStream e
+        os headers têm somente o nome do dump, gravado(e o profiling liberado) no final do envio.
+        """
+        if not self.__busy.acquire(blocking=False):
+            return fn(*args, **kwargs), {}
+        streaming = False
+        try:
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                profile.disable()
+            #
+            if type(result) is dict and inspect.isgenerator(result.get('body')):
+                name = self.new_name()
+                result['body'] = ProfiledStream(self, profile, result['body'], trigger, name)
+                streaming = True
+                return result, {cts._PROFILE_ID_HEADER: name}
+            return result, self.finish(profile, trigger)
+        finally:
+            if not streaming:
+                self.__busy.release()
+
+
+class ProfiledStream:
+    """
+    Body em streaming(chunks da exportação) de uma requisição perfilada: o profiling continua na
+    leitura de cada chunk e, no final do envio ou na desconexão do cliente(close() pelo servidor),
+    o stream é fechado(devolve a conexão), o dump é gravado e o profiling é liberado.
+    """
+
+    def __init__(self, profiler:RequestProfiler, profile:cProfile.Profile, stream, trigger:str, name:str):
+        self.__profiler = profiler
+        self.__profile = profile
+        self.__stream = stream
+        self.__trigger = trigger
+        self.__name = name
+        self.__closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.__closed:
+            raise StopIteration
+        self.__profile.enable()
+        try:
+            return next(self.__stream)
+        except BaseException:
+            # Final do envio(StopIteration) ou falha...
+            self.__profile.disable()
+            self.close()
+            raise
+        finally:
+            self.__profile.disable()
+
+    def close(self):
+        if self.__closed:
+            return
+        self.__closed = True
+        try:
+            self.__stream.close()
+        finally:
+            self.__profiler.finish(self.__profile, self.__trigger, self.__name)
+            self.__profiler.release()
+
+    def __del__(self):
+        # Body descartado sem envio/close(): não deixa o profiling preso...
+        self.close()
+
+
+# Profiler do processo...
+_PROFILER = RequestProfiler(token=os.environ.get('PYAPI_PROFILE_TOKEN', ''),
+                            sample_rate=parse_sample_rate(os.environ.get('PYAPI_PROFILE_SAMPLE', cts._PROFILE_SAMPLE_RATE)),
+                            directory=os.environ.get('PYAPI_PROFILE_DIR', cts._PROFILE_DIR))
+
+def get_profiler() -> RequestProfiler:
+    return _PROFILER
+
+def configure(token:str=None, sample_rate:float=None, directory:str=None, max_files:int=None, top:int=None) -> RequestProfiler:
+    """ Define o token, a taxa de amostragem, a pasta dos dumps, o máximo de dumps e/ou o total de funções do resumo. """
+    if token is not None:
+        _PROFILER.set_token(token)
+    if sample_rate is not None:
+        _PROFILER.set_sample_rate(sample_rate)
+    if directory is not None:
+        _PROFILER.set_directory(directory)
+    if max_files is not None:
+        _PROFILER.set_max_files(max_files)
+    if top is not None:
+        _PROFILER.set_top(top)
+    return _PROFILER
+
+def profiled(handler):
+    """
+    Decorator do handler da API: perfila a requisição(dict com a chave "profileToken") quando
+    disparada pelo token ou pela amostragem, e inclui o resumo/dump nos "headers" da resposta.
+    """
+    @functools.wraps(handler)
+    def wrapper(request, *args, **kwargs):
+        if not _PROFILER.get_enabled():
+            return handler(request, *args, **kwargs)
+        trigger = _PROFILER.trigger(request.get('profileToken') if type(request) is dict else None)
+        if trigger == '':
+            return handler(request, *args, **kwargs)
+        #
+        response, headers = _PROFILER.run(handler, trigger, request, *args, **kwargs)
+        if headers and (trigger == 'token' or cts._PROFILE_SAMPLE_HEADERS):
+            response['headers'].update(headers)
+        return response
+    #
+    return wrapper
@@ -10,6 +10,10 @@ import json
 import py_api_consts as cts
 import py_api_classes as cls     
 import py_api_functions as fns                   
+import py_api_cache as cache
+import py_api_notify as notify
+import py_api_memory_db as memdb
+import py_api_profiling as profiling
 import py_api_product_facades as facade     
 
 from pathlib import Path
@@ -43,6 +47,15 @@ def check_request(request):
     return check    
 
 
+def stream_and_close(stream, database:cls.DatabaseInterface):
+    """ Entrega os chunks da resposta em streaming e, no final(ou na desconexão do cliente), devolve a conexão ao pool. """
+    try:
+        yield from stream
+    finally:
+        database.close_connection()
+
+
+@profiling.profiled
 def handler(request, in_production=False):
     """Atende as requisições.
 
@@ -51,63 +64,100 @@ def handler(request, in_production=False):
         in_production (bool, optional): Em produção?. Defaults to False.
     Returns:
         dict: "statusCode"(int): HTML Status code(remember that 200 = OK)
-              "headers"(dict): Hardcoded para {'Content-Type': 'application/json'},
+              "headers"(dict): Hardcoded para {'Content-Type': 'application/json'}, mais o "ETag" dos detalhes
+              de produto e, nas requisições perfiladas(py_api_profiling), o dump e o resumo do profiling,
               "body"(dict): Retorno da requisição, conforme documentação no README.md.
+              O dict não é json encoded aqui: o encode é feito uma única vez, na resposta HTTP.
+              Na exportação(GET com "export") é um generator dos chunks(bytes) NDJSON, com o
+              "Content-Type" correspondente, e a conexão é devolvida ao pool no final do envio.
     """
-    # Estrutura para o retorno da API...
-    response = cts._API_RESPONSE
+    # Estrutura para o retorno da API(cópia: o dict padrão não pode ser alterado)...
+    response = dict(cts._API_RESPONSE, headers=dict(cts._API_RESPONSE['headers']))
+    # Contadores dos caches do processo no log, a cada cts._CACHE_STATS_INTERVAL segundos...
+    cache.maybe_report_stats()
     #
     # Consiste estrutura da requisição...
     check = check_request(request=request)
+    backend = os.environ.get(cts._DB_BACKEND_ENV)  # Banco forçado pelo ambiente(Ex: benchmarks)
     if not check['success']:
         response['statusCode'] = 400
         response['body'] = {"message": check['message']}   
-    elif not os.path.isfile(str(Path(__file__).parent) + '/db/pg_conn.py'):
+    elif backend != cts._DB_BACKEND_MEMORY and not os.path.isfile(str(Path(__file__).parent) + '/db/pg_conn.py'):
         # Script com os parâmetros de conexão não encontrado...
         response['statusCode'] = 400
         response['body'] = {"message": 'O script "db/pg_conn.py" não foi encontrado.'}   
     else:   
-        # Parâmetros de conexão PostgreSQL...
-        from db.pg_conn import _PG_CONNECTION 
+        if backend == cts._DB_BACKEND_MEMORY:
+            conn_pars = {}
+        else:
+            # Parâmetros de conexão PostgreSQL...
+            from db.pg_conn import _PG_CONNECTION 
+            conn_pars = _PG_CONNECTION['production'] if in_production else _PG_CONNECTION['devel'] # Tipo do ambiente
+            backend = conn_pars.get('backend', cts._DB_BACKEND)
         #
-        # Conexão com o banco PostgreSQL...
-        conn_pars = _PG_CONNECTION['production'] if in_production else _PG_CONNECTION['devel'] # Tipo do ambiente
-        database = cls.DBPostgres()  # Wrapper      
-        if database.connect(conn_pars=conn_pars) :      
-            # Atendimento das requisições...            
-            if request['httpMethod'] == cts._PUT:
-                # Inclusões... 
-                put_product_facade = facade.PUTProductFacade(body=request['body'], db=database)
-                put_product_facade.execute()
-                response['statusCode'] = put_product_facade.get_status_code()
-                response['body'] = put_product_facade.get_body_as_dict()        
-            #        
-            elif request['httpMethod'] == cts._GET:
-                # Consultas... 
-                get_product_facade = facade.GETProductFacade(body=request['body'], db=database)
-                get_product_facade.execute()
-                response['statusCode'] = get_product_facade.get_status_code()
-                response['body'] = get_product_facade.get_body_as_dict()      
-            #
-            elif request['httpMethod'] == cts._POST:
-                # Alterações... 
-                post_product_facade = facade.POSTProductFacade(body=request['body'], db=database)
-                post_product_facade.execute()
-                response['statusCode'] = post_product_facade.get_status_code()
-                response['body'] = post_product_facade.get_body_as_dict()                     
-            #
-            elif request['httpMethod'] == cts._DEL:
-                # Exclusões... 
-                del_product_facade = facade.DELETEProductFacade(body=request['body'], db=database)
-                del_product_facade.execute()
-                response['statusCode'] = del_product_facade.get_status_code()
-                response['body'] = del_product_facade.get_body_as_dict()                  
-            #                                    
-        else:                   
-            response['statusCode'] = 400
-            response['body'] = {"message": database.get_error_message()}     
+        client_id = request.get('clientId')
+        if backend == cts._DB_BACKEND_MEMORY:
+            # Banco em memória do processo(sem réplicas nem listener)...
+            replicas = None
+            database = memdb.DBMemory()  # Wrapper
+        else:
+            # Conexão com o banco PostgreSQL(emprestada do pool do processo)...
+            # Listener(LISTEN) das alterações feitas pelos outros processos, para a invalidação dos caches...
+            if conn_pars.get('notify', cts._PG_NOTIFY):
+                notify.start_listener(conn_pars)
+            # As consultas(GET) são roteadas para as réplicas de leitura, quando configuradas...
+            replicas = cls.get_pg_replica_router(conn_pars)
+            if request['httpMethod'] == cts._GET and replicas is not None:
+                database = cls.DBPostgres(pool=replicas.get_primary(), replicas=replicas, client_id=client_id)  # Wrapper
+            else:
+                database = cls.DBPostgres(pool=cls.get_pg_pool(conn_pars))  # Wrapper      
+        streaming = False
+        try:
+            if database.connect(conn_pars=conn_pars) :      
+                # Atendimento das requisições...            
+                if request['httpMethod'] == cts._PUT:
+                    # Inclusões... 
+                    put_product_facade = facade.PUTProductFacade(body=request['body'], db=database)
+                    put_product_facade.execute()
+                    response['statusCode'] = put_product_facade.get_status_code()
+                    response['body'] = put_product_facade.get_body_as_dict()        
+                #        
+                elif request['httpMethod'] == cts._GET:
+                    # Consultas... 
+                    get_product_facade = facade.GETProductFacade(body=request['body'], db=database, if_none_match=request.get('ifNoneMatch'))
+                    get_product_facade.execute()
+                    response['statusCode'] = get_product_facade.get_status_code()
+                    response['headers'].update(get_product_facade.get_headers())
+                    response['body'] = get_product_facade.get_body_as_dict()      
+                    if get_product_facade.get_stream() is not None:
+                        # Exportação - A conexão acompanha o generator até o final do envio...
+                        response['body'] = stream_and_close(get_product_facade.get_stream(), database)
+                        streaming = True
+                #
+                elif request['httpMethod'] == cts._POST:
+                    # Alterações... 
+                    post_product_facade = facade.POSTProductFacade(body=request['body'], db=database)
+                    post_product_facade.execute()
+                    response['statusCode'] = post_product_facade.get_status_code()
+                    response['body'] = post_product_facade.get_body_as_dict()                     
+                #
+                elif request['httpMethod'] == cts._DEL:
+                    # Exclusões... 
+                    del_product_facade = facade.DELETEProductFacade(body=request['body'], db=database)
+                    del_product_facade.execute()
+                    response['statusCode'] = del_product_facade.get_status_code()
+                    response['body'] = del_product_facade.get_body_as_dict()                  
+                #                                    
+                if replicas is not None and request['httpMethod'] != cts._GET and response['statusCode'] == 200:
+                    # Escrita confirmada - Abre a janela read-your-writes do cliente...
+                    replicas.mark_write(client_id)
+            else:                   
+                response['statusCode'] = database.get_error_code()
+                response['body'] = {"message": database.get_error_message()}     
+        finally:
+            # Devolve a conexão ao pool, inclusive em caso de erro/exception...
+            if not streaming:
+                database.close_connection()
         # 
     #
-    response['body'] = json.dumps(response['body'])
-    #
     return response
\ No newline at end of file
@@ -0,0 +1,94 @@
+#--------------------------------------------------------------------
+# Responde as solicitações da API REST para operações de
+# manutenção e consulta de produtos - versão assíncrona(asyncio).
+#--------------------------------------------------------------------
+
+import os
+
+import py_api_consts as cts
+import rest_products as rest
+import py_api_cache as cache
+import py_api_notify as notify
+import py_api_async_classes as acls
+import py_api_async_product_facades as afacade
+
+from pathlib import Path
+
+# Facades assíncronas por método HTTP...
+_FACADES = {
+              cts._PUT: afacade.AsyncPUTProductFacade,
+              cts._GET: afacade.AsyncGETProductFacade,
+              cts._POST: afacade.AsyncPOSTProductFacade,
+              cts._DEL: afacade.AsyncDELETEProductFacade
+           }
+
+async def stream_and_close(stream, database:acls.AsyncDBPostgres):
+    """ Entrega os chunks da resposta em streaming e, no final(ou na desconexão do cliente), devolve a conexão ao pool. """
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        await database.close_connection()
+
+async def handler(request, in_production=False):
+    """Atende as requisições(corrotina), com o mesmo contrato do rest_products.handler.
+
+    Args:
+        request (any): Parâmetros da requisição
+        in_production (bool, optional): Em produção?. Defaults to False.
+    Returns:
+        dict: "statusCode"(int), "headers"(dict) e "body"(dict), conforme o rest_products.handler.
+    """
+    # Estrutura para o retorno da API(cópia por requisição: várias ficam em curso ao mesmo tempo)...
+    response = dict(cts._API_RESPONSE, headers=dict(cts._API_RESPONSE['headers']))
+    # Contadores dos caches do processo no log, a cada cts._CACHE_STATS_INTERVAL segundos...
+    cache.maybe_report_stats()
+    #
+    # Consiste estrutura da requisição...
+    check = rest.check_request(request=request)
+    if not check['success']:
+        response['statusCode'] = 400
+        response['body'] = {"message": check['message']}
+    elif not os.path.isfile(str(Path(__file__).parent) + '/db/pg_conn.py'):
+        # Script com os parâmetros de conexão não encontrado...
+        response['statusCode'] = 400
+        response['body'] = {"message": 'O script "db/pg_conn.py" não foi encontrado.'}
+    else:
+        # Parâmetros de conexão PostgreSQL...
+        from db.pg_conn import _PG_CONNECTION
+        #
+        # Conexão com o banco PostgreSQL(emprestada do pool asyncpg do event loop)...
+        conn_pars = _PG_CONNECTION['production'] if in_production else _PG_CONNECTION['devel'] # Tipo do ambiente
+        # Listener(LISTEN) das alterações feitas pelos outros processos, para a invalidação dos caches...
+        if conn_pars.get('notify', cts._PG_NOTIFY):
+            notify.start_listener(conn_pars)
+        pool = None
+        if acls.asyncpg is not None:
+            pool = await acls.get_async_pg_pool(conn_pars)
+        database = acls.AsyncDBPostgres(pool=pool)  # Wrapper
+        streaming = False
+        try:
+            if await database.connect(conn_pars=conn_pars):
+                # Atendimento das requisições...
+                if request['httpMethod'] == cts._GET:
+                    crud_facade = _FACADES[cts._GET](body=request['body'], db=database, if_none_match=request.get('ifNoneMatch'))
+                else:
+                    crud_facade = _FACADES[request['httpMethod']](body=request['body'], db=database)
+                await crud_facade.execute()
+                response['statusCode'] = crud_facade.get_status_code()
+                response['headers'].update(crud_facade.get_headers())
+                response['body'] = crud_facade.get_body_as_dict()
+                if crud_facade.get_stream() is not None:
+                    # Exportação - A conexão acompanha o generator até o final do envio...
+                    response['body'] = stream_and_close(crud_facade.get_stream(), database)
+                    streaming = True
+            else:
+                response['statusCode'] = database.get_error_code()
+                response['body'] = {"message": database.get_error_message()}
+        finally:
+            # Devolve a conexão ao pool, inclusive em caso de erro/exception...
+            if not streaming:
+                await database.close_connection()
+        #
+    #
+    return response
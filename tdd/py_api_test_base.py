@@ -0,0 +1,66 @@
+# coding:utf-8
+
+#--------------------------------------------------------------------
+# TDD UNITTEST - Base dos testes que rodam sem a API no ar: a aplicação
+# (app.application) pelo Flask test client, no banco em memória do
+# processo(py_api_memory_db), limpo antes de cada teste.
+#--------------------------------------------------------------------
+# Executa junto com os scripts de teste "tdd/py_api_test_*.py", Ex:
+#    $ python3 tdd/py_api_test_etag.py
+#--------------------------------------------------------------------
+
+import os
+import sys
+import unittest
+
+from pathlib import Path
+
+# Bibliotecas...
+root_dir = str(Path(__file__).parent.parent)
+sys.path.append(root_dir)
+
+import py_api_consts as cts
+import py_api_cache as cache
+import py_api_memory_db as memdb
+
+# Banco em memória para todas as requisições do processo de teste...
+os.environ[cts._DB_BACKEND_ENV] = cts._DB_BACKEND_MEMORY
+
+from app import application
+#----------------------------------------------------------------------------------
+
+class MemoryAPITestCase(unittest.TestCase):
+    """ Requisições pela aplicação(test client) no banco em memória, sem produtos e com os caches vazios. """
+
+    def setUp(self):
+        memdb.get_memory_store().clear()
+        for process_cache in cache.get_caches().values():
+            process_cache.clear()
+        self.client = application.test_client()
+
+    @staticmethod
+    def new_product(seq:int, manufacturer:dict=None) -> dict:
+        """ Body de inclusão de um produto(fabricante novo pelo nome, quando não informado). """
+        return {
+                  "name": "Produto de teste {:04d}".format(seq),
+                  "description": "Produto incluído pelos testes",
+                  "barcode": str(seq).rjust(13, '0'),
+                  "manufacturer": manufacturer if manufacturer is not None else {"name": "Fabricante de teste"},
+                  "unitPrice": 10.5 + seq
+               }
+
+    def send(self, method:str, body:dict) -> dict:
+        """ PUT/POST/DELETE com o body. Retorna o envelope da resposta(statusCode, headers e body). """
+        response = self.client.open('/', method=method, json={'body': body})
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        return response.get_json()
+
+    def get(self, query:str, headers:dict=None):
+        """ GET com a query string(Ex: "id=1"). Retorna o response HTTP do test client. """
+        return self.client.get('/?' + query, headers=headers or {})
+
+    def insert_product(self, seq:int, manufacturer:dict=None) -> dict:
+        """ Inclui um produto e retorna o body da resposta(com o "id" do produto e do fabricante). """
+        envelope = self.send(cts._PUT, self.new_product(seq, manufacturer))
+        self.assertEqual(envelope['statusCode'], 200, envelope['body'])
+        return envelope['body']
@@ -0,0 +1,107 @@
+# coding:utf-8
+
+#--------------------------------------------------------------------
+# TDD UNITTEST - Inclusão(PUT) de produtos em lote: atômica e não
+# atômica(sem a API no ar, no banco em memória).
+#    $ python3 tdd/py_api_test_bulk.py
+#--------------------------------------------------------------------
+
+import unittest
+
+from py_api_test_base import MemoryAPITestCase
+
+import py_api_consts as cts
+import py_api_memory_db as memdb
+#----------------------------------------------------------------------------------
+
+class ProductBulkPUTTests(MemoryAPITestCase):
+
+    def put_bulk(self, products:list, atomic:bool=None) -> dict:
+        body = {'products': products}
+        if atomic is not None:
+            body['atomic'] = atomic
+        return self.send(cts._PUT, body)
+
+    def count(self, table:str) -> int:
+        return len(memdb.get_memory_store().get_table(table))
+
+    def details(self, ids:list) -> dict:
+        """ Detalhes dos produtos(id -> row) pela consulta de vários produtos. """
+        envelope = self.get('ids=' + ','.join(str(id) for id in ids)).get_json()
+        self.assertEqual(envelope['statusCode'], 200, envelope['body'])
+        return {row['id']: row for row in envelope['body']['rows']}
+
+    def test_atomic_success(self):
+        """ Todos incluídos, com um único fabricante novo para os nomes iguais(sem diferenciar maiúsculas). """
+        products = [self.new_product(1, {'name': 'Fabricante em lote'}),
+                    self.new_product(2, {'name': ' FABRICANTE em lote'}),
+                    self.new_product(3, {'name': 'Outro fabricante'})]
+        envelope = self.put_bulk(products)
+        self.assertEqual(envelope['statusCode'], 200, envelope['body'])
+        body = envelope['body']
+        self.assertEqual((body['atomic'], body['inserted'], body['failed']), (True, 3, 0))
+        self.assertEqual([r['index'] for r in body['products']], [0, 1, 2])
+        self.assertEqual(body['products'][0]['manufacturer']['id'], body['products'][1]['manufacturer']['id'])
+        self.assertNotEqual(body['products'][0]['manufacturer']['id'], body['products'][2]['manufacturer']['id'])
+        self.assertEqual(self.count('manufacturer'), 2)
+        # Produtos associados aos fabricantes(visíveis na consulta de detalhes)...
+        details = self.details([r['id'] for r in body['products']])
+        self.assertEqual(len(details), 3)
+        for result in body['products']:
+            self.assertEqual(details[result['id']]['manufacturer']['id'], result['manufacturer']['id'])
+
+    def test_atomic_with_invalid_product(self):
+        """ Atômica com um produto inválido: 400 nele, 424 nos demais e nada incluído. """
+        products = [self.new_product(1, {'name': 'Fabricante em lote'}),
+                    dict(self.new_product(2), name='Curto'),
+                    self.new_product(3)]
+        envelope = self.put_bulk(products, atomic=True)
+        self.assertEqual(envelope['statusCode'], 400, envelope['body'])
+        body = envelope['body']
+        self.assertEqual((body['inserted'], body['failed']), (0, 3))
+        self.assertEqual([r['statusCode'] for r in body['products']], [424, 400, 424])
+        self.assertIn('Curto', body['products'][1]['message'])
+        self.assertEqual((self.count('product'), self.count('manufacturer'), self.count('productmanufacturer')), (0, 0, 0))
+
+    def test_atomic_with_unknown_manufacturer(self):
+        """ Atômica com o "id" de fabricante não cadastrado: 400 nele, 424 nos demais e rollback do fabricante novo. """
+        products = [self.new_product(1, {'name': 'Fabricante em lote'}),
+                    self.new_product(2, {'id': 999})]
+        envelope = self.put_bulk(products)
+        self.assertEqual(envelope['statusCode'], 400, envelope['body'])
+        results = envelope['body']['products']
+        self.assertEqual([r['statusCode'] for r in results], [424, 400])
+        self.assertIn('Fabricante não cadastrado(id=999)', results[1]['message'])
+        self.assertEqual((self.count('product'), self.count('manufacturer'), self.count('productmanufacturer')), (0, 0, 0))
+
+    def test_non_atomic_partial_insert(self):
+        """ Não atômica: os válidos incluídos e os inválidos/fabricante não cadastrado com 400. """
+        existing = self.insert_product(1, {'name': 'Fabricante existente'})
+        products = [self.new_product(2, {'id': existing['manufacturer']['id']}),
+                    dict(self.new_product(3), unitPrice=0),
+                    self.new_product(4, {'id': 999}),
+                    self.new_product(5, {'name': 'Fabricante existente'})]
+        envelope = self.put_bulk(products, atomic=False)
+        self.assertEqual(envelope['statusCode'], 200, envelope['body'])
+        body = envelope['body']
+        self.assertEqual((body['atomic'], body['inserted'], body['failed']), (False, 2, 2))
+        self.assertEqual([r['statusCode'] for r in body['products']], [200, 400, 400, 200])
+        # O fabricante existente(pelo "id" e pelo nome) é reaproveitado...
+        self.assertEqual(body['products'][0]['manufacturer']['id'], existing['manufacturer']['id'])
+        self.assertEqual(body['products'][3]['manufacturer']['id'], existing['manufacturer']['id'])
+        self.assertEqual(self.count('manufacturer'), 1)
+        self.assertEqual(len(self.details([body['products'][0]['id'], body['products'][3]['id']])), 2)
+        self.assertEqual(self.count('product'), 3)
+
+    def test_invalid_bulk_request(self):
+        """ Lista vazia ou "atomic" fora do tipo: HTTP 400 sem o resultado por produto. """
+        for body in ({'products': []}, {'products': [self.new_product(1)], 'atomic': 'yes'}):
+            envelope = self.send(cts._PUT, body)
+            self.assertEqual(envelope['statusCode'], 400, envelope['body'])
+            self.assertNotIn('products', envelope['body'])
+        self.assertEqual(self.count('product'), 0)
+
+# ----------------------------------------------------------------------------------------------------------------------            
+
+if __name__ == '__main__':  
+   unittest.main(verbosity=2)
@@ -0,0 +1,106 @@
+# coding:utf-8
+
+#--------------------------------------------------------------------
+# TDD UNITTEST - ETag dos detalhes de produto e o cache dos ETags(sem
+# a API no ar, no banco em memória).
+#    $ python3 tdd/py_api_test_etag.py
+#--------------------------------------------------------------------
+
+import json
+import unittest
+
+from py_api_test_base import MemoryAPITestCase
+
+import py_api_consts as cts
+import py_api_cache as cache
+import py_api_notify as notify
+import py_api_memory_db as memdb
+import py_api_product_classes as prod
+#----------------------------------------------------------------------------------
+
+class ReplicaDBMemory(memdb.DBMemory):
+    """ Banco em memória lendo como uma réplica de leitura. """
+
+    def reads_from_replica(self) -> bool:
+        return True
+
+
+class ProductETagTests(MemoryAPITestCase):
+
+    def test_not_modified_with_current_etag(self):
+        """ O If-None-Match com o ETag atual retorna 304 sem body. """
+        product = self.insert_product(1)
+        etag = self.get('id={}'.format(product['id'])).headers.get('ETag')
+        self.assertIsNotNone(etag)
+        self.assertEqual(self.get('id={}'.format(product['id']), {'If-None-Match': etag}).status_code, 304)
+
+    def test_update_invalidates_etag(self):
+        """ Após a alteração, o ETag anterior não retorna mais 304. """
+        product = self.insert_product(1)
+        old_etag = self.get('id={}'.format(product['id'])).headers.get('ETag')
+        #
+        envelope = self.send(cts._POST, dict(self.new_product(1, {'id': product['manufacturer']['id']}),
+                                             id=product['id'], name='Produto de teste alterado'))
+        self.assertEqual(envelope['statusCode'], 200, envelope['body'])
+        #
+        response = self.get('id={}'.format(product['id']), {'If-None-Match': old_etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers.get('ETag'), old_etag)
+
+    def test_read_before_commit_does_not_cache_old_etag(self):
+        """
+        Consulta que leu a row antes do commit de uma alteração: o ETag antigo não vai para o
+        cache e o If-None-Match com ele continua indo ao banco(200 com o ETag novo).
+        """
+        product = self.insert_product(1)
+        db = memdb.DBMemory()
+        db.connect()
+        get_product = prod.GetProduct(schema=cts._GET_PRODUCT_JSON_SCHEMA, request={'id': str(product['id'])}, db=db)
+        # Geração do ETag e leitura da row ainda não alterada...
+        self.assertFalse(get_product.check_not_modified())
+        sql, parameters = get_product.get_query()
+        db.query(sql=sql, pars=parameters, commit=True, compact=True)
+        #
+        # Alteração efetivada(commit) antes do set_result() da consulta...
+        envelope = self.send(cts._POST, dict(self.new_product(1, {'id': product['manufacturer']['id']}),
+                                             id=product['id'], name='Produto de teste alterado'))
+        self.assertEqual(envelope['statusCode'], 200, envelope['body'])
+        #
+        self.assertTrue(get_product.set_result())
+        old_etag = get_product.get_etag()
+        self.assertIs(prod.get_product_etag_cache().get(product['id']), cache.LRUTTLCache.MISSING)
+        #
+        response = self.get('id={}'.format(product['id']), {'If-None-Match': old_etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['body']['rows'][0]['name'], 'Produto de teste alterado')
+        self.assertNotEqual(response.headers.get('ETag'), old_etag)
+
+    def test_notify_during_read_does_not_cache_old_etag(self):
+        """ A invalidação vinda de outro processo(NOTIFY) durante a consulta também descarta o ETag lido. """
+        product = self.insert_product(1)
+        db = memdb.DBMemory()
+        db.connect()
+        get_product = prod.GetProduct(schema=cts._GET_PRODUCT_JSON_SCHEMA, request={'id': str(product['id'])}, db=db)
+        get_product.check_not_modified()
+        sql, parameters = get_product.get_query()
+        db.query(sql=sql, pars=parameters, commit=True, compact=True)
+        #
+        self.assertTrue(notify.dispatch(json.dumps({'sender': 'outro-host:1', 'entity': 'product',
+                                                    'id': product['id'], 'op': 'update'})))
+        get_product.set_result()
+        self.assertIs(prod.get_product_etag_cache().get(product['id']), cache.LRUTTLCache.MISSING)
+
+    def test_replica_read_does_not_fill_cache(self):
+        """ O ETag lido de uma réplica(possivelmente atrasada) não vai para o cache. """
+        product = self.insert_product(1)
+        db = ReplicaDBMemory()
+        db.connect()
+        get_product = prod.GetProduct(schema=cts._GET_PRODUCT_JSON_SCHEMA, request={'id': str(product['id'])}, db=db)
+        self.assertTrue(get_product.execute())
+        self.assertIsNotNone(get_product.get_etag())
+        self.assertIs(prod.get_product_etag_cache().get(product['id']), cache.LRUTTLCache.MISSING)
+
+# ----------------------------------------------------------------------------------------------------------------------            
+
+if __name__ == '__main__':  
+   unittest.main(verbosity=2)
@@ -0,0 +1,111 @@
+# coding:utf-8
+
+#--------------------------------------------------------------------
+# TDD UNITTEST - Exportação do catálogo em NDJSON(GET com "export"),
+# sem a API no ar, no banco em memória.
+#    $ python3 tdd/py_api_test_export.py
+#--------------------------------------------------------------------
+
+import json
+import unittest
+
+from unittest import mock
+
+from py_api_test_base import MemoryAPITestCase
+
+import py_api_consts as cts
+import py_api_memory_db as memdb
+import py_api_product_classes as prod
+import rest_products as rest
+#----------------------------------------------------------------------------------
+
+class FailingDBMemory(memdb.DBMemory):
+    """ Banco em memória com falha em todas as consultas. """
+
+    def query(self, sql, pars, commit=False, compact=False):
+        self.set_error(msg='Falha simulada na consulta.')
+        return False
+
+
+class ProductExportTests(MemoryAPITestCase):
+
+    def export(self):
+        """ Resposta do handler para a exportação(o "body" é o generator dos chunks). """
+        return rest.handler({'httpMethod': cts._GET, 'body': {'export': cts._EXPORT_NDJSON}})
+
+    def test_export_response(self):
+        """ Content-Type NDJSON e uma linha por produto ativo, na ordem do "id", no formato dos detalhes. """
+        ids = [self.insert_product(seq)['id'] for seq in range(1, 5)]
+        self.assertEqual(self.send(cts._DEL, {'id': ids[1]})['statusCode'], 200)
+        #
+        response = self.get('export=' + cts._EXPORT_NDJSON)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, cts._EXPORT_NDJSON_MIMETYPE)
+        lines = response.get_data(as_text=True).splitlines()
+        products = [json.loads(line) for line in lines]
+        self.assertEqual([p['id'] for p in products], [ids[0], ids[2], ids[3]])
+        details = self.get('id={}'.format(ids[2])).get_json()['body']['rows'][0]
+        self.assertEqual(products[1], details)
+
+    def test_empty_catalog(self):
+        """ Sem produtos ativos: resposta vazia. """
+        response = self.get('export=' + cts._EXPORT_NDJSON)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_data(), b'')
+
+    def test_first_line_is_sent_alone(self):
+        """ A primeira linha vai num chunk próprio; as demais são acumuladas até cts._EXPORT_CHUNK_BYTES. """
+        for seq in range(1, 5):
+            self.insert_product(seq)
+        chunks = list(self.export()['body'])
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(chunks[0].count(b'\n'), 1)
+        self.assertEqual(chunks[1].count(b'\n'), 3)
+        #
+        with mock.patch.object(cts, '_EXPORT_CHUNK_BYTES', 1):
+            self.assertEqual([chunk.count(b'\n') for chunk in self.export()['body']], [1, 1, 1, 1])
+
+    def test_connection_closed_on_client_disconnect(self):
+        """ A conexão acompanha o generator e é devolvida quando o cliente desconecta no meio do envio. """
+        for seq in range(1, 4):
+            self.insert_product(seq)
+        with mock.patch.object(memdb.DBMemory, 'close_connection', autospec=True, return_value=True) as close:
+            response = self.export()
+            self.assertEqual(response['headers']['Content-Type'], cts._EXPORT_NDJSON_MIMETYPE)
+            close.assert_not_called()
+            body = response['body']
+            next(body)
+            close.assert_not_called()
+            body.close()  # Desconexão do cliente(o servidor fecha o generator)
+            close.assert_called_once()
+
+    def test_stream_and_close(self):
+        """ stream_and_close() devolve a conexão no final do envio e na desconexão. """
+        for consume in (list, lambda stream: next(stream) and stream.close()):
+            db = memdb.DBMemory()
+            db.connect()
+            stream = rest.stream_and_close(iter([b'a\n', b'b\n']), db)
+            self.assertTrue(db.is_connected())
+            consume(stream)
+            self.assertFalse(db.is_connected())
+
+    def test_error_line(self):
+        """ Falha na leitura: a exportação termina com a linha {"error": ...}. """
+        db = FailingDBMemory()
+        db.connect()
+        export = prod.ExportProducts(schema=cts._GET_PRODUCT_JSON_SCHEMA, request={'export': cts._EXPORT_NDJSON}, db=db)
+        lines = b''.join(export.stream()).splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn('Falha simulada', json.loads(lines[0])['error'])
+
+    def test_conflicting_parameters(self):
+        """ "export" com "id", "page" ou "cursor": HTTP 400 em json. """
+        for query in ('export=ndjson&id=1', 'export=ndjson&page=2', 'export=ndjson&cursor=WyJpZCIsMSwxXQ', 'export=csv'):
+            response = self.get(query)
+            self.assertEqual(response.mimetype, 'application/json')
+            self.assertEqual(response.get_json()['statusCode'], 400, query)
+
+# ----------------------------------------------------------------------------------------------------------------------            
+
+if __name__ == '__main__':  
+   unittest.main(verbosity=2)
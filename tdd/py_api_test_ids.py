@@ -0,0 +1,70 @@
+# coding:utf-8
+
+#--------------------------------------------------------------------
+# TDD UNITTEST - Consulta dos detalhes de vários produtos("ids") numa
+# única requisição(sem a API no ar, no banco em memória).
+#    $ python3 tdd/py_api_test_ids.py
+#--------------------------------------------------------------------
+
+import unittest
+
+from py_api_test_base import MemoryAPITestCase
+
+import py_api_consts as cts
+import py_api_product_classes as prod
+#----------------------------------------------------------------------------------
+
+class ProductIdsTests(MemoryAPITestCase):
+
+    def get_ids(self, ids) -> dict:
+        """ GET com "ids"(str pela query string ou lista pelo json). Retorna o envelope. """
+        if type(ids) is str:
+            return self.get('ids=' + ids).get_json()
+        return self.client.get('/', json={'queryStringParameters': {'ids': ids}}).get_json()
+
+    def test_parse_ids(self):
+        """ Conversão dos "ids": sem os repetidos e na ordem informada. """
+        self.assertEqual(prod.GetProduct.parse_ids('3,1,3,2,1'), [3, 1, 2])
+        self.assertEqual(prod.GetProduct.parse_ids([5, 5, 4]), [5, 4])
+
+    def test_order_duplicates_and_missing(self):
+        """ As rows na ordem dos "ids", sem repetidos, e os não encontrados em "missing". """
+        ids = [self.insert_product(seq)['id'] for seq in range(1, 4)]
+        for value in ('{2},999,{0},{2},{1}'.format(*ids), [ids[2], 999, ids[0], ids[2], ids[1]]):
+            envelope = self.get_ids(value)
+            self.assertEqual(envelope['statusCode'], 200, envelope['body'])
+            self.assertEqual([row['id'] for row in envelope['body']['rows']], [ids[2], ids[0], ids[1]])
+            self.assertEqual(envelope['body']['missing'], [999])
+            self.assertEqual(envelope['body']['rows'][0]['name'], self.new_product(3)['name'])
+
+    def test_inactive_product_is_missing(self):
+        """ O produto excluído(desativado) vai para "missing". """
+        ids = [self.insert_product(seq)['id'] for seq in range(1, 3)]
+        self.assertEqual(self.send(cts._DEL, {'id': ids[0]})['statusCode'], 200)
+        envelope = self.get_ids('{},{}'.format(*ids))
+        self.assertEqual([row['id'] for row in envelope['body']['rows']], [ids[1]])
+        self.assertEqual(envelope['body']['missing'], [ids[0]])
+
+    def test_max_ids(self):
+        """ Até cts._QRY_MAX_IDS_PER_REQUEST "ids"(após remover os repetidos); acima disso, HTTP 400. """
+        limit = cts._QRY_MAX_IDS_PER_REQUEST
+        self.assertEqual(self.get_ids(','.join(str(i) for i in range(1, limit + 1)))['statusCode'], 200)
+        self.assertEqual(self.get_ids(','.join(str(i) for i in range(1, limit + 1)) + ',1')['statusCode'], 200)
+        self.assertEqual(self.get_ids(','.join(str(i) for i in range(1, limit + 2)))['statusCode'], 400)
+        self.assertEqual(self.get_ids(list(range(1, limit + 2)))['statusCode'], 400)
+
+    def test_invalid_ids(self):
+        """ "ids" fora do formato: HTTP 400. """
+        for value in ('1,,2', 'a,b', '', [], [0], ['1']):
+            self.assertEqual(self.get_ids(value)['statusCode'], 400, value)
+
+    def test_conflicting_parameters(self):
+        """ "ids" com "id", "cursor" ou "export": HTTP 400. """
+        for query in ('ids=1,2&id=1', 'ids=1,2&cursor=WyJpZCIsMSwxXQ', 'ids=1,2&export=ndjson'):
+            envelope = self.get(query).get_json()
+            self.assertEqual(envelope['statusCode'], 400, query)
+
+# ----------------------------------------------------------------------------------------------------------------------            
+
+if __name__ == '__main__':  
+   unittest.main(verbosity=2)
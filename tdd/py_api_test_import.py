@@ -0,0 +1,118 @@
+# coding:utf-8
+
+#--------------------------------------------------------------------
+# TDD UNITTEST - Importação em massa(py_api_import): colunas e regras
+# do schema e os comandos da inclusão dos produtos, sem o banco.
+#    $ python3 tdd/py_api_test_import.py
+#--------------------------------------------------------------------
+
+import sys
+import unittest
+
+from pathlib import Path
+
+# Bibliotecas...
+root_dir = str(Path(__file__).parent.parent)
+sys.path.append(root_dir)
+
+import py_api_consts as cts
+import py_api_import as imp
+#----------------------------------------------------------------------------------
+
+class FakeDB:
+    """ Banco que somente registra os comandos; "rows" são as rows retornadas por trecho do SQL. """
+
+    def __init__(self, rows:dict=None):
+        self.sqls = []
+        self.__rows = rows or {}
+        self.__last = []
+
+    def query(self, sql, pars, commit=False, compact=False):
+        self.sqls.append(sql)
+        self.__last = next((rows for part, rows in self.__rows.items() if part in sql), [])
+        return True
+
+    def get_rows(self):
+        return self.__last
+
+    def get_row_count(self):
+        return 3
+
+    def get_error_message(self):
+        return ''
+
+
+class SchemaColumnsTests(unittest.TestCase):
+
+    def test_columns(self):
+        """ Atributos achatados na ordem do schema, sem o "id" do produto. """
+        columns = imp.schema_columns(cts._INSERT_PRODUCT_JSON_SCHEMA)
+        self.assertEqual([(label, column) for label, column, prop in columns],
+                         [('name', 'name'), ('description', 'description'), ('barcode', 'barcode'),
+                          ('manufacturer.id', 'manufacturer_id'), ('manufacturer.name', 'manufacturer_name'),
+                          ('unitPrice', 'unitprice')])
+        self.assertEqual(columns[3][2], {'type': 'number', 'minimum': 1})
+
+    def test_nested_prefix(self):
+        """ Objetos aninhados: rótulos com "." e colunas com "_"; o "id" interno é mantido. """
+        schema = {'properties': {'id': {'type': 'number'},
+                                 'a': {'type': 'object', 'properties': {'id': {'type': 'number'},
+                                                                        'B': {'type': 'object', 'properties': {'c': {'type': 'string'}}}}}}}
+        self.assertEqual([c[:2] for c in imp.schema_columns(schema)], [('a.id', 'a_id'), ('a.B.c', 'a_b_c')])
+
+
+class SchemaChecksTests(unittest.TestCase):
+
+    def test_checks(self):
+        """ Regras do schema de inclusão, na ordem de avaliação. """
+        checks = dict(imp.schema_checks(cts._INSERT_PRODUCT_JSON_SCHEMA))
+        self.assertEqual(checks['name IS NULL'], '"name" não informado.')
+        self.assertEqual(checks['char_length(name) < 10'], '"name" com menos de 10 caracteres.')
+        self.assertEqual(checks['char_length(name) > 60'], '"name" com mais de 60 caracteres.')
+        self.assertEqual(checks['manufacturer_id IS NULL AND manufacturer_name IS NULL'],
+                         '"manufacturer" não informado(Informe o "id" ou o "name" ou ambos).')
+        self.assertEqual(checks['manufacturer_id::numeric < 1'], '"manufacturer.id" menor que 1.')
+        self.assertEqual(checks['unitprice::numeric > 9999999999.99'], '"unitPrice" maior que 9999999999.99.')
+        self.assertNotIn('manufacturer_id IS NULL', checks)   # Atributos do fabricante não são obrigatórios
+        self.assertFalse(any(c.startswith('id ') for c in checks))
+
+    def test_numeric_format_before_cast(self):
+        """ A conversão numérica(::numeric) só é avaliada depois da conferência do formato. """
+        conditions = [c[0] for c in imp.schema_checks(cts._INSERT_PRODUCT_JSON_SCHEMA)]
+        self.assertLess(conditions.index('unitprice !~ ' + imp._SQL_NUMERIC), conditions.index('unitprice::numeric < 0.01'))
+        self.assertLess(conditions.index('manufacturer_id !~ ' + imp._SQL_NUMERIC), conditions.index('manufacturer_id::numeric < 1'))
+
+    def test_required_string(self):
+        schema = {'properties': {'code': {'type': 'string', 'minLength': 2}}, 'required': ['code']}
+        self.assertEqual(imp.schema_checks(schema), [('code IS NULL', '"code" não informado.'),
+                                                     ('char_length(code) < 2', '"code" com menos de 2 caracteres.')])
+
+
+class MergeProductsTests(unittest.TestCase):
+
+    def test_serial_sequence(self):
+        """ Sequence vinculada à coluna: "ids" reservados na staging e incluídos no INSERT. """
+        db = FakeDB(rows={'pg_get_serial_sequence': [{'sequence': 'public.product_id_seq'}]})
+        import_products = imp.ImportProducts(db=db)
+        self.assertTrue(import_products.merge_products())
+        self.assertIn('nextval(', db.sqls[1])
+        self.assertTrue(db.sqls[2].startswith('INSERT INTO product (id, active,'))
+        self.assertEqual(import_products.get_counts()['products'], 3)
+
+    def test_sequence_not_owned(self):
+        """ Sequence não vinculada(pg_get_serial_sequence NULL): inclusão pelo DEFAULT com o RETURNING na staging. """
+        db = FakeDB(rows={'pg_get_serial_sequence': [{'sequence': None}]})
+        import_products = imp.ImportProducts(db=db)
+        self.assertTrue(import_products.merge_products())
+        self.assertEqual(len(db.sqls), 2)
+        self.assertNotIn('nextval(', db.sqls[1])
+        self.assertIn('INSERT INTO product (active,', db.sqls[1])
+        self.assertIn('RETURNING id', db.sqls[1])
+        self.assertIn('row_number() OVER (ORDER BY line)', db.sqls[1])
+        self.assertIn('UPDATE ' + imp._STAGING + ' s SET product_id = ids.id', db.sqls[1])
+        self.assertEqual(import_products.get_counts()['products'], 3)
+
+# ----------------------------------------------------------------------------------------------------------------------            
+
+if __name__ == '__main__':  
+   unittest.main(verbosity=2)
@@ -0,0 +1,150 @@
+# coding:utf-8
+
+#--------------------------------------------------------------------
+# TDD UNITTEST - Paginação por chave(keyset) das listagens: o cursor,
+# o SQL gerado e a paginação com empates na ordem(sem a API no ar, no
+# banco em memória).
+#    $ python3 tdd/py_api_test_listing.py
+#--------------------------------------------------------------------
+
+import json
+import base64
+import unittest
+
+from unittest import mock
+
+from py_api_test_base import MemoryAPITestCase
+
+import py_api_consts as cts
+import py_api_classes as cls
+#----------------------------------------------------------------------------------
+
+def raw_token(content) -> str:
+    """ Token de cursor montado à mão(conteúdo json qualquer). """
+    return base64.urlsafe_b64encode(json.dumps(content).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+class ListingCursorTests(unittest.TestCase):
+
+    def test_encode_decode(self):
+        """ O token decodificado traz a ordem, a chave e o "id" do cursor codificado. """
+        for order, key, id in (('id', 42, 42), ('name', 'Produto ção "aspas"', 7)):
+            cursor = cls.ListingCursor.decode(cls.ListingCursor(order=order, key=key, id=id).encode())
+            self.assertEqual((cursor.get_order(), cursor.get_key(), cursor.get_id()), (order, key, id))
+
+    def test_token_is_url_safe(self):
+        """ O token não tem padding nem caracteres fora do schema do request. """
+        token = cls.ListingCursor(order='name', key='???>>>~~~', id=1).encode()
+        self.assertRegex(token, '^[A-Za-z0-9_-]+$')
+
+    def test_malformed_tokens(self):
+        """ Tokens que não são base64/json ou com a estrutura errada levantam ValueError. """
+        for token in ('', '!!!', 'bm90IGpzb24', raw_token({'order': 'id'}), raw_token(['id', 1]),
+                      raw_token(['price', 1, 1]), raw_token(['name', 'Produto', '1']), raw_token(['name', 'Produto', None])):
+            with self.assertRaises(ValueError, msg=token):
+                cls.ListingCursor.decode(token)
+
+    def test_name_key_type(self):
+        """ Na ordem por "name", a chave deve ser string(lista/objeto/null não chegam ao SQL). """
+        for key in (['Produto'], {'a': 1}, None, 10, True):
+            with self.assertRaises(ValueError, msg=repr(key)):
+                cls.ListingCursor.decode(raw_token(['name', key, 1]))
+
+    def test_tampered_token(self):
+        """ Na ordem por "id", a chave diferente do "id"(token alterado) é rejeitada. """
+        with self.assertRaises(ValueError):
+            cls.ListingCursor.decode(raw_token(['id', 10, 3]))
+
+    def test_listing_query_with_cursor(self):
+        """ Com o cursor: comparação de tupla(chave, id), ORDER BY desempatado pelo "id" e sem OFFSET. """
+        cursor = cls.ListingCursor(order='name', key='Produto', id=5)
+        sql, pars = cls.listing_query(select='SELECT id, name FROM product', where='active = %(active)s',
+                                      order='name', page=3, cursor=cursor)
+        self.assertIn('WHERE active = %(active)s AND (name, id) > (%(after_key)s, %(after_id)s)', sql)
+        self.assertIn('ORDER BY name, id', sql)
+        self.assertNotIn('OFFSET', sql)
+        self.assertEqual(pars, {'after_key': 'Produto', 'after_id': 5})
+        #
+        sql, pars = cls.listing_query(select='SELECT id, name FROM product', where='', order='id',
+                                      cursor=cls.ListingCursor(order='id', key=5, id=5))
+        self.assertIn('WHERE id > %(after_id)s ORDER BY id LIMIT', sql)
+        self.assertEqual(pars, {'after_id': 5})
+
+    def test_listing_query_with_page(self):
+        """ Sem o cursor, a página vai pelo OFFSET e busca uma row a mais que o limite. """
+        sql, pars = cls.listing_query(select='SELECT id, name FROM product', where='', order='name', page=3)
+        self.assertTrue(sql.endswith('ORDER BY name, id LIMIT {} OFFSET {}'.format(cts._QRY_PAGE_ROWS_LIMIT + 1,
+                                                                                     2 * cts._QRY_PAGE_ROWS_LIMIT)), sql)
+        self.assertEqual(pars, {})
+
+    def test_listing_rows_with_ties(self):
+        """ O cursor da próxima página leva a chave e o "id" da última row entregue(desempate dos nomes iguais). """
+        rows = [{'id': i, 'name': 'Mesmo nome'} for i in range(1, cts._QRY_PAGE_ROWS_LIMIT + 2)]
+        page, token = cls.listing_rows(rows, 'name')
+        self.assertEqual(len(page), cts._QRY_PAGE_ROWS_LIMIT)
+        cursor = cls.ListingCursor.decode(token)
+        self.assertEqual((cursor.get_order(), cursor.get_key(), cursor.get_id()), ('name', 'Mesmo nome', cts._QRY_PAGE_ROWS_LIMIT))
+        #
+        self.assertEqual(cls.listing_rows(rows[:-1], 'name'), (rows[:-1], None))
+
+
+class ListingPaginationTests(MemoryAPITestCase):
+
+    def insert_named(self, names:list) -> list:
+        ids = []
+        for seq, name in enumerate(names, 1):
+            envelope = self.send(cts._PUT, dict(self.new_product(seq), name=name))
+            self.assertEqual(envelope['statusCode'], 200, envelope['body'])
+            ids.append(envelope['body']['id'])
+        return ids
+
+    def walk(self, order:str) -> list:
+        """ Percorre a listagem pelos cursores. Retorna as rows de todas as páginas. """
+        rows = []
+        body = self.get('page=1&order=' + order).get_json()['body']
+        while True:
+            rows += body['rows']
+            if body['next'] is None:
+                return rows
+            envelope = self.get('cursor=' + body['next']).get_json()
+            self.assertEqual(envelope['statusCode'], 200, envelope['body'])
+            body = envelope['body']
+
+    def test_cursor_pagination_with_ties_on_name(self):
+        """ Ordem por nome com nomes repetidos entre as páginas: nenhuma row repetida ou perdida. """
+        names = ['Produto B empatado', 'Produto A empatado', 'Produto B empatado', 'Produto B empatado',
+                 'Produto A empatado', 'Produto C sozinho', 'Produto B empatado']
+        ids = self.insert_named(names)
+        with mock.patch.object(cts, '_QRY_PAGE_ROWS_LIMIT', 2):
+            rows = self.walk('name')
+        expected = sorted(zip(names, ids))
+        self.assertEqual([(r['name'], r['id']) for r in rows], expected)
+
+    def test_cursor_pagination_by_id(self):
+        """ Ordem por "id": todas as rows, em ordem, pelos cursores. """
+        ids = self.insert_named(['Produto número {}'.format(i) for i in range(5)])
+        with mock.patch.object(cts, '_QRY_PAGE_ROWS_LIMIT', 2):
+            rows = self.walk('id')
+        self.assertEqual([r['id'] for r in rows], ids)
+
+    def test_invalid_cursor_request(self):
+        """ Cursor malformado/adulterado no request: HTTP 400 no envelope. """
+        for token in ('bm90IGpzb24', raw_token(['id', 10, 3])):
+            envelope = self.get('cursor=' + token).get_json()
+            self.assertEqual(envelope['statusCode'], 400, envelope['body'])
+        for key in (['Produto'], None):
+            envelope = self.get('order=name&cursor=' + raw_token(['name', key, 1])).get_json()
+            self.assertIn('Cursor inválido', envelope['body']['message'])
+            self.assertEqual(envelope['statusCode'], 400, envelope['body'])
+
+    def test_cursor_order_mismatch(self):
+        """ Cursor de uma ordem com outra "order" no request: HTTP 400. """
+        token = cls.ListingCursor(order='id', key=1, id=1).encode()
+        envelope = self.get('cursor={}&order=name'.format(token)).get_json()
+        self.assertEqual(envelope['statusCode'], 400, envelope['body'])
+        self.assertIn('ordem', envelope['body']['message'])
+
+# ----------------------------------------------------------------------------------------------------------------------            
+
+if __name__ == '__main__':  
+   unittest.main(verbosity=2)
@@ -0,0 +1,50 @@
+# coding:utf-8
+
+#--------------------------------------------------------------------
+# TDD UNITTEST - Fabricante do produto informado pelo "name"(upsert)
+# nas alterações(POST), sem a API no ar, no banco em memória.
+#    $ python3 tdd/py_api_test_manufacturer.py
+#--------------------------------------------------------------------
+
+import unittest
+
+from py_api_test_base import MemoryAPITestCase
+
+import py_api_consts as cts
+import py_api_memory_db as memdb
+#----------------------------------------------------------------------------------
+
+class ProductManufacturerTests(MemoryAPITestCase):
+
+    def update(self, product:dict, manufacturer:dict) -> dict:
+        return self.send(cts._POST, dict(product, manufacturer=manufacturer, description='Produto alterado'))
+
+    def manufacturer_of(self, product_id:int) -> dict:
+        return self.get('id={}'.format(product_id)).get_json()['body']['rows'][0]['manufacturer']
+
+    def test_same_manufacturer_name(self):
+        """ POST com o mesmo fabricante pelo "name": a associação existente é mantida(sem chave duplicada). """
+        product = self.insert_product(1, {'name': 'Fabricante de teste'})
+        for _ in range(2):
+            response = self.update(product, {'name': 'fabricante de teste '})
+            self.assertEqual(response['statusCode'], 200, response['body'])
+        self.assertEqual(self.manufacturer_of(product['id']), product['manufacturer'])
+        self.assertEqual(len(memdb.get_memory_store().get_table('productmanufacturer')), 1)
+
+    def test_back_to_previous_manufacturer(self):
+        """ Troca para outro fabricante e volta ao anterior: a associação anterior é reativada. """
+        product = self.insert_product(1, {'name': 'Fabricante de teste'})
+        other = self.insert_product(2, {'name': 'Outro fabricante de teste'})['manufacturer']
+        for manufacturer in ({'id': other['id']}, {'id': product['manufacturer']['id']}, {'name': other['name']}):
+            response = self.update(product, manufacturer)
+            self.assertEqual(response['statusCode'], 200, response['body'])
+            self.assertEqual(self.manufacturer_of(product['id'])['id'], response['body']['manufacturer']['id'])
+        self.assertEqual(self.manufacturer_of(product['id']), other)
+        actives = [row for key, row in memdb.get_memory_store().get_table('productmanufacturer').rows()
+                   if row['product_id'] == product['id'] and row['active'] == cts._YES]
+        self.assertEqual(len(actives), 1)
+
+# ----------------------------------------------------------------------------------------------------------------------            
+
+if __name__ == '__main__':  
+   unittest.main(verbosity=2)
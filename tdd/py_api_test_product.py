@@ -71,7 +71,7 @@ class ProductAPITests(unittest.TestCase):
         self.assertGreater(len(put.json()['body']) , 0, 'O atributo "body" foi retornado vazio.')
         
         try:
-            body = json.loads(put.json()['body'])       
+            body = put.json()['body']       
             json_valid = True
         except Exception:
             json_valid = False
@@ -125,7 +125,7 @@ class ProductAPITests(unittest.TestCase):
         self.assertGreater(len(post.json()['body']) , 0, 'O atributo "body" foi retornado vazio.')
         
         try:
-            body = json.loads(post.json()['body'])       
+            body = post.json()['body']       
             json_valid = True
         except Exception:
             json_valid = False
@@ -173,7 +173,7 @@ class ProductAPITests(unittest.TestCase):
         self.assertGreater(len(delete.json()['body']) , 0, 'O atributo "body" foi retornado vazio.')
         
         try:
-            body = json.loads(delete.json()['body'])       
+            body = delete.json()['body']       
             json_valid = True
         except Exception:
             json_valid = False
@@ -218,7 +218,7 @@ class ProductAPITests(unittest.TestCase):
         self.assertGreater(len(get.json()['body']) , 0, 'O atributo "body" foi retornado vazio.')
         
         try:
-            body = json.loads(get.json()['body'])       
+            body = get.json()['body']       
             json_valid = True
         except Exception:
             json_valid = False
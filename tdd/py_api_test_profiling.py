@@ -0,0 +1,88 @@
+# coding:utf-8
+
+#--------------------------------------------------------------------
+# TDD UNITTEST - Profiling sob demanda(py_api_profiling) do handler,
+# sem a API no ar, no banco em memória.
+#    $ python3 tdd/py_api_test_profiling.py
+#--------------------------------------------------------------------
+
+import os
+import tempfile
+import unittest
+
+from py_api_test_base import MemoryAPITestCase
+
+import py_api_consts as cts
+import py_api_profiling as profiling
+import rest_products as rest
+#----------------------------------------------------------------------------------
+
+_TOKEN = 'token-de-teste'
+
+class SampleRateTests(unittest.TestCase):
+
+    def test_parse_sample_rate(self):
+        """ Taxa de amostragem inválida(Ex: PYAPI_PROFILE_SAMPLE=abc): log e amostragem desligada. """
+        self.assertEqual(profiling.parse_sample_rate('0.25'), 0.25)
+        for value in ('abc', '', None, '1,5'):
+            with self.assertLogs('pyapi.profile', level='WARNING'):
+                self.assertEqual(profiling.parse_sample_rate(value), 0.0)
+        profiler = profiling.RequestProfiler(sample_rate='0,001')
+        self.assertEqual(profiler.get_sample_rate(), 0.0)
+        self.assertFalse(profiler.get_enabled())
+
+
+class RequestProfilingTests(MemoryAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        profiling.configure(token=_TOKEN, sample_rate=0, directory=self.directory.name)
+
+    def tearDown(self):
+        profiling.configure(token='', sample_rate=0, directory=cts._PROFILE_DIR)
+        self.directory.cleanup()
+        super().tearDown()
+
+    def request(self, body:dict) -> dict:
+        return rest.handler({'httpMethod': cts._GET, 'body': body, 'profileToken': _TOKEN})
+
+    def dumps(self) -> list:
+        return sorted(os.listdir(self.directory.name))
+
+    def test_profiled_request(self):
+        """ Requisição com o token: resumo e nome do dump nos headers, dump gravado. """
+        product = self.insert_product(1)
+        response = self.request({'id': str(product['id'])})
+        self.assertEqual(response['statusCode'], 200)
+        self.assertIn(cts._PROFILE_SUMMARY_HEADER, response['headers'])
+        self.assertEqual(self.dumps(), [response['headers'][cts._PROFILE_ID_HEADER]])
+
+    def test_profiled_export(self):
+        """ Exportação: o dump é gravado no final do envio dos chunks e o profiling é liberado. """
+        for seq in range(1, 4):
+            self.insert_product(seq)
+        response = self.request({'export': cts._EXPORT_NDJSON})
+        name = response['headers'][cts._PROFILE_ID_HEADER]
+        self.assertNotIn(cts._PROFILE_SUMMARY_HEADER, response['headers'])
+        self.assertEqual(self.dumps(), [])
+        self.assertEqual(b''.join(response['body']).count(b'\n'), 3)
+        self.assertEqual(self.dumps(), [name])
+        # Profiling liberado para a próxima requisição...
+        self.assertIn(cts._PROFILE_ID_HEADER, self.request({'page': '1'})['headers'])
+
+    def test_profiled_export_disconnect(self):
+        """ Exportação interrompida pelo cliente: dump gravado e profiling liberado no close(). """
+        for seq in range(1, 4):
+            self.insert_product(seq)
+        response = self.request({'export': cts._EXPORT_NDJSON})
+        body = response['body']
+        next(body)
+        body.close()
+        self.assertEqual(self.dumps(), [response['headers'][cts._PROFILE_ID_HEADER]])
+        self.assertIn(cts._PROFILE_ID_HEADER, self.request({'page': '1'})['headers'])
+
+# ----------------------------------------------------------------------------------------------------------------------            
+
+if __name__ == '__main__':  
+   unittest.main(verbosity=2)
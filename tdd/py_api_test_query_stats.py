@@ -0,0 +1,134 @@
+# coding:utf-8
+
+#--------------------------------------------------------------------
+# TDD UNITTEST - Instrumentação(py_api_instrumentation) dos comandos
+# do DBPostgres executados fora do query(): streaming, inclusão em
+# lote e COPY, com uma conexão falsa(sem o PostgreSQL).
+#    $ python3 tdd/py_api_test_query_stats.py
+#--------------------------------------------------------------------
+
+import sys
+import unittest
+
+from pathlib import Path
+from unittest import mock
+
+# Bibliotecas...
+root_dir = str(Path(__file__).parent.parent)
+sys.path.append(root_dir)
+
+import py_api_consts as cts
+import py_api_classes as cls
+import py_api_instrumentation as ins
+#----------------------------------------------------------------------------------
+
+class FakeCursor:
+
+    def __init__(self, rows:list=None):
+        self.rows = rows or []
+        self.rowcount = -1
+        self.description = [('id',)]
+        self.itersize = 0
+
+    def execute(self, sql, pars=None):
+        pass
+
+    def fetchall(self):
+        return self.rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def copy_expert(self, sql, file):
+        self.rowcount = sum(1 for line in file if line.strip())
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+
+    def __init__(self, rows:list=None):
+        self.rows = rows
+
+    def cursor(self, name=None, cursor_factory=None):
+        return FakeCursor(self.rows)
+
+
+class QueryStatsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.stats = ins.get_query_stats()
+        self.stats.reset()
+        self.stats.set_enabled(True)
+        self.events = []
+        self.stats.add_hook(self.events.append)
+
+    def tearDown(self):
+        self.stats.remove_hook(self.events.append)
+        self.stats.set_enabled(False)
+        self.stats.reset()
+
+    def database(self, rows:list=None) -> cls.DBPostgres:
+        db = cls.DBPostgres()
+        db._DBPostgres__connection = FakeConnection(rows)
+        db.set_query_source('teste')
+        return db
+
+    def test_stream(self):
+        """ Streaming: um registro no final da leitura, com o total de rows lidas. """
+        db = self.database(rows=[(1,), (2,), (3,)])
+        rows = db.stream('SELECT id FROM product WHERE active = %(active)s', {'active': cts._YES}, compact=True)
+        next(rows)
+        self.assertEqual(self.events, [])
+        self.assertEqual(len(list(rows)), 2)
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(self.events[0]['rows'], 3)
+        self.assertEqual(self.events[0]['source'], 'teste')
+        self.assertEqual(self.events[0]['fingerprint'], 'select id from product where active = ?')
+
+    def test_stream_closed(self):
+        """ Streaming interrompido(close do generator): registra as rows lidas até ali. """
+        db = self.database(rows=[(1,), (2,), (3,)])
+        rows = db.stream('SELECT id FROM product', {})
+        next(rows)
+        rows.close()
+        self.assertEqual([e['rows'] for e in self.events], [1])
+
+    def test_insert_many_values(self):
+        """ INSERT ... VALUES: um registro por lote. """
+        db = self.database()
+        rows = [{'name': 'Fabricante {:04d}'.format(i)} for i in range(cts._PG_INSERT_BATCH_ROWS + 1)]
+        with mock.patch.object(cls.psycopg2.extras, 'execute_values', return_value=[]) as execute_values:
+            self.assertTrue(db.insert_many(table='manufacturer', rows=rows))
+        self.assertEqual(execute_values.call_count, 2)
+        self.assertEqual([e['rows'] for e in self.events], [cts._PG_INSERT_BATCH_ROWS, 1])
+        self.assertEqual(self.events[0]['fingerprint'], 'insert into manufacturer (name) values ?')
+
+    def test_insert_many_copy(self):
+        """ COPY: reserva dos valores na sequence e o COPY, um registro cada. """
+        total = cts._PG_COPY_MIN_ROWS
+        db = self.database(rows=[(i,) for i in range(1, total + 1)])
+        rows = [{'name': 'Fabricante {:04d}'.format(i)} for i in range(total)]
+        self.assertTrue(db.insert_many(table='manufacturer', rows=rows, returning='id'))
+        self.assertEqual([(e['sql'].split()[0], e['rows']) for e in self.events], [('SELECT', total), ('COPY', total)])
+
+    def test_copy_expert(self):
+        """ copy_expert: um registro com as rows do COPY. """
+        db = self.database()
+        self.assertTrue(db.copy_expert('COPY product_import (name) FROM STDIN WITH (FORMAT csv)', ['a\n', 'b\n']))
+        self.assertEqual([e['rows'] for e in self.events], [2])
+
+    def test_disabled(self):
+        """ Instrumentação desligada: nada registrado. """
+        self.stats.set_enabled(False)
+        db = self.database(rows=[(1,)])
+        list(db.stream('SELECT id FROM product', {}))
+        db.copy_expert('COPY product_import (name) FROM STDIN WITH (FORMAT csv)', ['a\n'])
+        self.assertEqual(self.events, [])
+        self.assertEqual(self.stats.get_stats(), [])
+
+# ----------------------------------------------------------------------------------------------------------------------            
+
+if __name__ == '__main__':  
+   unittest.main(verbosity=2)